@@ -20,14 +20,25 @@ module is executed as a standalone program."
 
 # standard library imports
 import argparse
+import json
+import os
 from pathlib import Path
 
 # local imports
-from p1.run import run
+from p1.exploration.profiling import write_profiles
+from p1.preprocessing import FOLD_ASSIGNMENTS
+from p1.run import ingest, run
+from p1.serve import generate_load, sample_records, serve
+from p1.sweep import load_grid, run_sweep
 
 
 # Parse arguments
 parser = argparse.ArgumentParser()
+parser.add_argument(
+    "command", nargs="?", default="run", choices=["run", "ingest", "profile", "serve", "load"],
+    help="run (default) to train and score; ingest to write each dataset to the column store; profile to write a "
+         "column profiling report; serve to serve trained models; load to send requests to a running server"
+)
 parser.add_argument(
     "--src_dir", "-i", type=Path, help="Input directory"
 )
@@ -43,12 +54,135 @@ parser.add_argument(
 parser.add_argument(
     "--random_state", "-r", default=777, type=int, help="Pseudo-random seed"
 )
+parser.add_argument(
+    "--jobs", "-j", default=1, type=int, help="Number of worker processes; -1 to use every CPU"
+)
+parser.add_argument(
+    "--cache_dir", "--cache-dir", type=Path, help="Preprocessed dataset cache directory (default: <dst_dir>/.cache)"
+)
+parser.add_argument(
+    "--no_cache", "--no-cache", action="store_true", help="Do not read or write the preprocessed dataset cache"
+)
+parser.add_argument(
+    "--compact_dtypes", "--compact-dtypes", action="store_true", help="Use the smallest safe dtypes for each column"
+)
+parser.add_argument(
+    "--timings", action="store_true",
+    help="Save per-stage wall time, CPU time, rows, and peak RSS growth to timings.csv"
+)
+parser.add_argument(
+    "--trace_memory", "--trace-memory", action="store_true",
+    help="With --timings, also save each stage's tracemalloc peak to timings.csv; tracing slows the run down"
+)
+parser.add_argument(
+    "--profile", action="store_true", help="Save cProfile dumps of each dataset and fold to <dst_dir>/profiles"
+)
+parser.add_argument(
+    "--batched", action="store_true", help="Score every fold of a dataset at once from per-fold label statistics"
+)
+parser.add_argument(
+    "--sweep", type=Path, help="JSON grid of random_state, k_folds, and val_frac values to sweep over"
+)
+parser.add_argument(
+    "--store_dir", "--store-dir", type=Path, help="Column store directory (default: <dst_dir>/.store)"
+)
+parser.add_argument(
+    "--resume", action="store_true", help="Skip the folds an interrupted run with the same configuration wrote"
+)
+parser.add_argument(
+    "--prefetch", default=2, type=int, help="Number of datasets to load ahead in threads; 0 to load on demand"
+)
+parser.add_argument(
+    "--fold_assignment", "--fold-assignment", default="shuffle", choices=FOLD_ASSIGNMENTS,
+    help="shuffle and split by position, or split by seeded hash of each row's id columns or content"
+)
+parser.add_argument(
+    "--incremental", action="store_true",
+    help="Update fold scores from the rows appended since the last incremental run (needs --fold-assignment hash)"
+)
+parser.add_argument(
+    "--encoding", default="dense", choices=["dense", "codes"],
+    help="One-hot encode categorical columns densely, or keep them as integer codes expanded per fold"
+)
+parser.add_argument(
+    "--host", default="127.0.0.1", help="Host the server binds or the load generator connects to"
+)
+parser.add_argument(
+    "--port", default=8000, type=int, help="TCP port the server binds or the load generator connects to"
+)
+parser.add_argument(
+    "--socket", type=Path, help="Unix socket path to serve on or connect to instead of a TCP port"
+)
+parser.add_argument(
+    "--model_dir", "--model-dir", type=Path, help="Saved model directory (default: <dst_dir>/models)"
+)
+parser.add_argument(
+    "--max_batch", "--max-batch", default=4096, type=int, help="Largest number of records predicted in one batch"
+)
+parser.add_argument(
+    "--max_wait", "--max-wait", default=0.0, type=float,
+    help="Seconds the server waits for more requests after the first one of a batch"
+)
+parser.add_argument(
+    "--transform", action="store_true", help="Transform served records through the fitted pipeline before predicting"
+)
+parser.add_argument(
+    "--requests", default=10_000, type=int, help="Number of requests the load generator sends"
+)
+parser.add_argument(
+    "--concurrency", default=8, type=int, help="Number of concurrent load generator connections"
+)
+parser.add_argument(
+    "--batch_size", "--batch-size", default=1, type=int, help="Number of records per load generator request"
+)
 args = parser.parse_args()
+cache_dir = None if args.no_cache or args.command != "run" else (args.cache_dir or args.dst_dir / ".cache")
+store_dir = args.store_dir or (args.dst_dir / ".store" if args.dst_dir is not None else None)
+if args.command == "ingest" and store_dir is None:
+    parser.error("ingest needs --dst_dir or --store_dir")
 
-run(
-    args.src_dir,
-    args.dst_dir,
-    args.k_folds,
-    args.val_frac,
-    args.random_state
-)
+if args.command == "ingest":
+    print(ingest(args.src_dir, store_dir).to_string(index=False))
+elif args.command == "serve":
+    serve(args.src_dir, args.model_dir or args.dst_dir / "models", args.host, args.port, args.socket, args.max_batch,
+          args.max_wait, args.transform)
+elif args.command == "load":
+    address = args.socket or (args.host, args.port)
+    report = generate_load(address, sample_records(args.src_dir), args.requests, args.concurrency, args.batch_size)
+    print(json.dumps(report, indent=2))
+elif args.command == "profile":
+    write_profiles(args.src_dir, args.dst_dir, n_jobs=os.cpu_count() if args.jobs == -1 else args.jobs)
+elif args.sweep is not None:
+    defaults = {"random_state": args.random_state, "k_folds": args.k_folds, "val_frac": args.val_frac}
+    run_sweep(
+        args.src_dir,
+        args.dst_dir,
+        load_grid(args.sweep, defaults),
+        compact_dtypes=args.compact_dtypes,
+        batched=args.batched,
+        store_dir=store_dir,
+        resume=args.resume,
+        fold_assignment=args.fold_assignment,
+        encoding=args.encoding,
+    )
+else:
+    run(
+        args.src_dir,
+        args.dst_dir,
+        args.k_folds,
+        args.val_frac,
+        args.random_state,
+        n_jobs=args.jobs,
+        cache_dir=cache_dir,
+        compact_dtypes=args.compact_dtypes,
+        timings=args.timings,
+        profile_dir=args.dst_dir / "profiles" if args.profile else None,
+        batched=args.batched,
+        store_dir=store_dir,
+        resume=args.resume,
+        prefetch_depth=args.prefetch,
+        fold_assignment=args.fold_assignment,
+        incremental=args.incremental,
+        encoding=args.encoding,
+        trace_memory=args.trace_memory,
+    )
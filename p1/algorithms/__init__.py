@@ -1 +1,2 @@
-from p1.algorithms.majority_predictor import MajorityPredictor
\ No newline at end of file
+from p1.algorithms.majority_predictor import MajorityPredictor
+from p1.algorithms.batched_cv import FoldLabelStats, score_majority_cv
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""Peter Rasmussen, Programming Assignment 1, batched_cv.py
+
+This module scores majority predictors on every fold, and every repeat, of cross-validation at once.
+
+A majority predictor only depends on label counts (classification) or label sums (regression), so each fold's beta,
+predictions, and score follow from a (fold x class) count matrix or per-fold label sums computed with np.bincount,
+with each fold's train-validation statistics derived from the totals less those of the fold. FoldLabelStats holds
+those per-fold statistics and can add batches of labels, so the scores of a growing dataset can be updated from its
+new rows alone.
+
+"""
+# Standard library imports
+import typing as t
+
+# Third party libraries
+import numpy as np
+import pandas as pd
+
+
+class FoldLabelStats:
+    """
+    Per-fold sufficient statistics of a label: counts, sums and sums of squares of deviations from a fixed center,
+    minima, maxima, and for classification a (fold x class) count table.
+    Missing and infinite labels are only counted per fold; scoring fills them with the mean of the finite labels, as
+    Preprocessor.transform_columns imputes them, so the fill value follows every added batch.
+    """
+
+    def __init__(self, problem_class: str, k_folds: int, center: float = 0.0):
+        """
+        Instantiate the FoldLabelStats object.
+        :param problem_class: 'classification' or 'regression'
+        :param k_folds: Number of folds
+        :param center: Value deviations are taken from, e.g. the label mean of the first batch; a center close to the
+            mean keeps the sums of squares accurate
+        """
+        if problem_class not in ["classification", "regression"]:
+            raise ValueError("Problem class must be either 'classification' or 'regression'.")
+        self.problem_class = problem_class
+        self.k_folds = k_folds
+        self.center = float(center)
+        self.counts = np.zeros(k_folds, dtype=np.int64)
+        self.missing = np.zeros(k_folds, dtype=np.int64)
+        self.sums = np.zeros(k_folds)
+        self.sumsqs = np.zeros(k_folds)
+        self.mins = np.full(k_folds, np.inf)
+        self.maxs = np.full(k_folds, -np.inf)
+        self.classes: t.Union[np.ndarray, None] = None
+        self.table = np.zeros((k_folds, 0), dtype=np.int64)
+
+    def __repr__(self):
+        return f"FoldLabelStats({self.problem_class}, {self.counts.sum()} rows, {self.k_folds} folds)"
+
+    def update(self, labels: np.ndarray, folds: np.ndarray) -> "FoldLabelStats":
+        """
+        Add a batch of labels to the statistics of their folds.
+        :param labels: Label values in row order
+        :param folds: 1-indexed fold of each observation
+        :return: Updated statistics
+        """
+        labels = np.asarray(labels)
+        group = np.asarray(folds).astype(np.intp) - 1
+        values = labels.astype(np.float64)
+        finite = np.isfinite(values)
+        if not finite.all():
+            self.missing += np.bincount(group[~finite], minlength=self.k_folds)
+            labels, group, values = labels[finite], group[finite], values[finite]
+        deviations = values - self.center
+        self.counts += np.bincount(group, minlength=self.k_folds)
+        self.sums += np.bincount(group, weights=deviations, minlength=self.k_folds)
+        self.sumsqs += np.bincount(group, weights=deviations ** 2, minlength=self.k_folds)
+        np.minimum.at(self.mins, group, values)
+        np.maximum.at(self.maxs, group, values)
+        if self.problem_class == "classification":
+            classes, inverse = np.unique(labels, return_inverse=True)
+            if self.classes is not None:
+                # Widen the table to the classes of both batches
+                merged = np.union1d(self.classes, classes)
+                table = np.zeros((self.k_folds, len(merged)), dtype=np.int64)
+                table[:, np.searchsorted(merged, self.classes)] = self.table
+                inverse = np.searchsorted(merged, classes)[inverse.ravel()]
+                classes, self.table = merged, table
+            else:
+                self.table = np.zeros((self.k_folds, len(classes)), dtype=np.int64)
+            n_classes = len(classes)
+            counts = np.bincount(group * n_classes + inverse.ravel(), minlength=self.k_folds * n_classes)
+            self.table += counts.reshape(self.k_folds, n_classes)
+            self.classes = classes
+        return self
+
+    def score(self, standardize_label: bool = False, label_params: tuple = None, fill: float = None) -> tuple:
+        """
+        Train on each fold's train-validation set and score on its test set.
+        :param standardize_label: True to standardize the label with each fold's train-validation mean and standard
+            deviation unless it is Boolean there
+        :param label_params: Optional tuple of per-fold label shifts and scales that replace the ones computed for
+            standardize_label
+        :param fill: Value that imputes missing labels, e.g. a streamed mean; the mean of every finite label if None
+        :return: Tuple of per-fold test scores and betas
+        """
+        k_folds, fold_counts, fold_sums, fold_sumsqs = self.k_folds, self.counts, self.sums, self.sumsqs
+        fold_mins, fold_maxs = self.mins, self.maxs
+
+        # Mean impute missing labels: each fold gains its missing count of the fill value
+        if self.missing.any():
+            fill = self.center + fold_sums.sum() / fold_counts.sum() if fill is None else fill
+            fold_counts = fold_counts + self.missing
+            fold_sums = fold_sums + self.missing * (fill - self.center)
+            fold_sumsqs = fold_sumsqs + self.missing * (fill - self.center) ** 2
+            fold_mins = np.where(self.missing > 0, np.minimum(fold_mins, fill), fold_mins)
+            fold_maxs = np.where(self.missing > 0, np.maximum(fold_maxs, fill), fold_maxs)
+        tv_counts = fold_counts.sum() - fold_counts
+
+        # Each train-validation set's label sums by subtraction of its test fold
+        tv_sums = fold_sums.sum() - fold_sums
+        tv_sumsqs = fold_sumsqs.sum() - fold_sumsqs
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tv_means = self.center + tv_sums / tv_counts
+            tv_std_devs = np.sqrt(np.maximum(tv_sumsqs - tv_sums ** 2 / tv_counts, 0) / (tv_counts - 1))
+
+        # Label shifts and scales of each fold; Boolean labels are not standardized
+        shifts, scales = np.zeros(k_folds), np.ones(k_folds)
+        if label_params is not None:
+            shifts, scales = label_params
+        elif standardize_label:
+            others = ~np.eye(k_folds, dtype=bool)
+            tv_mins = np.where(others, fold_mins, np.inf).min(axis=1)
+            tv_maxs = np.where(others, fold_maxs, -np.inf).max(axis=1)
+            boolean = (tv_mins == 0) & (tv_maxs == 1)
+            shifts, scales = np.where(boolean, 0.0, tv_means), np.where(boolean, 1.0, tv_std_devs)
+        standardized = (shifts != 0) | (scales != 1)
+
+        if self.problem_class == "classification":
+            # The train-validation mode is the most frequent class of the other folds
+            table, classes = self.table, self.classes
+            modes = (table.sum(axis=0) - table).argmax(axis=1)
+            test_scores = table[np.arange(k_folds), modes] / fold_counts
+            betas = [(classes[mode] - shifts[i]) / scales[i] if standardized[i] else classes[mode]
+                     for i, mode in enumerate(modes)]
+        else:
+            # The mean of the standardized train-validation labels, scored against the standardized test labels
+            with np.errstate(divide="ignore", invalid="ignore"):
+                betas = (tv_means - shifts) / scales
+                test_sums = (fold_counts * self.center + fold_sums - fold_counts * shifts) / scales
+                test_scores = (fold_counts * betas - test_sums) ** 2 / fold_counts
+        return test_scores, betas
+
+    def to_dict(self) -> dict:
+        """
+        Convert the statistics to JSON-serializable builtins.
+        :return: Dictionary that from_dict restores exactly
+        """
+        return {"problem_class": self.problem_class, "k_folds": self.k_folds, "center": self.center,
+                "counts": self.counts.tolist(), "missing": self.missing.tolist(), "sums": self.sums.tolist(),
+                "sumsqs": self.sumsqs.tolist(), "mins": self.mins.tolist(), "maxs": self.maxs.tolist(),
+                "classes": None if self.classes is None else self.classes.tolist(), "table": self.table.tolist()}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "FoldLabelStats":
+        """
+        Restore statistics saved with to_dict.
+        :param state: Dictionary from to_dict
+        :return: FoldLabelStats object
+        """
+        stats = cls(state["problem_class"], state["k_folds"], state["center"])
+        stats.counts = np.array(state["counts"], dtype=np.int64)
+        stats.missing = np.array(state["missing"], dtype=np.int64)
+        stats.sums, stats.sumsqs = np.array(state["sums"], dtype=float), np.array(state["sumsqs"], dtype=float)
+        stats.mins, stats.maxs = np.array(state["mins"], dtype=float), np.array(state["maxs"], dtype=float)
+        stats.classes = None if state["classes"] is None else np.array(state["classes"])
+        stats.table = np.array(state["table"], dtype=np.int64).reshape(stats.k_folds, -1)
+        return stats
+
+
+def score_majority_cv(labels: np.ndarray, folds: np.ndarray, problem_class: str, k_folds: int,
+                      standardize_label: bool = False, label_params: tuple = None) -> pd.DataFrame:
+    """
+    Train on each fold's train-validation set and score on its test set, for every fold and repeat at once.
+    :param labels: Label values in row order
+    :param folds: 1-indexed fold of each observation, or an array of shape (n_repeats, n) for repeated CV
+    :param problem_class: 'classification' or 'regression'
+    :param k_folds: Number of folds per repeat
+    :param standardize_label: True to standardize the label with each fold's train-validation mean and standard
+        deviation unless it is Boolean there, as run does when the label is a feature
+    :param label_params: Optional tuple of per-fold label shifts and scales, each of shape (n_repeats, k_folds),
+        that replace the ones computed for standardize_label
+    :return: Dataframe of repeat, fold, test score, and beta
+    Scores and betas equal those of MajorityPredictor trained and tuned on each train-validation set: the mode
+    breaks ties by the smallest class, classification is scored on accuracy, and regression on the squared sum of
+    residuals over the number of test observations, as MajorityPredictor.score does. Classification results are
+    identical. Regression results agree to floating-point rounding, because sums are accumulated per fold rather than
+    per split: test scores within a relative 1e-12 and betas within an absolute 1e-12. The beta of a standardized
+    label is its train-validation mean shifted by that same mean, so it comes out as exactly 0.0 where summing the
+    standardized values leaves a residue of about 1e-16.
+    """
+    if problem_class not in ["classification", "regression"]:
+        raise ValueError("Problem class must be either 'classification' or 'regression'.")
+    labels = np.asarray(labels)
+    folds = np.atleast_2d(folds)
+    center = labels.astype(np.float64).mean()
+
+    results = []
+    for repeat, repeat_folds in enumerate(folds):
+        stats = FoldLabelStats(problem_class, k_folds, center).update(labels, repeat_folds)
+        params = None if label_params is None else (label_params[0][repeat], label_params[1][repeat])
+        test_scores, betas = stats.score(standardize_label, params)
+        for fold in range(k_folds):
+            results.append([repeat, fold + 1, test_scores[fold], betas[fold]])
+    return pd.DataFrame(results, columns=["repeat", "fold", "test_score", "beta"])
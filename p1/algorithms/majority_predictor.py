@@ -4,10 +4,16 @@
 This module provides the Preprocessor class.
 
 """
+# Standard library imports
+import typing as t
+
 # Third party libraries
 import numpy as np
 import pandas as pd
 
+# Local imports
+from p1.preprocessing.streaming import RunningStats
+
 
 class MajorityPredictor:
     """
@@ -24,7 +30,10 @@ class MajorityPredictor:
         self.beta: float = None
         self.pred: pd.Series = None
         self.score_: float = None
-        self.X_tr: pd.DataFrame = None
+        self.class_counts: t.Union[pd.Series, None] = None
+        self.label_stats: t.Union[RunningStats, None] = None
+        self.label_sum: t.Union[np.floating, None] = None
+        self.label_count: int = 0
 
         if self.problem_class not in ["classification", "regression"]:
             raise ValueError("Problem class must be either 'classification' or 'regression'.")
@@ -35,16 +44,45 @@ class MajorityPredictor:
         :param X_train: Training feature values
         :param y_train: Training label values
         """
-        self.X_train = X_train
-        self.y_train = y_train
+        self.class_counts, self.label_stats, self.label_sum, self.label_count = None, None, None, 0
+        return self.partial_fit(X_train, y_train)
+
+    def partial_fit(self, X: pd.DataFrame, y: pd.Series) -> float:
+        """
+        Fold a batch of observations into the model without revisiting earlier batches.
+        :param X: Feature values of the batch
+        :param y: Label values of the batch
+        :return: Updated beta
+        Only sufficient statistics are kept: the count of each class for classification, and for regression the sum
+        and count of the label, plus the running mean and sum of squared deviations behind variance. Beta is the sum
+        over the count in the dtype Series.mean divides in: that of a float label, float64 otherwise. A single batch
+        therefore gives exactly y.mean(), infinite values included, and batches differ from the mean of their
+        concatenation only by the order of the float additions, within a relative 1e-15 in float64.
+        """
         if self.problem_class == "classification":
-            self.beta = self.y_train.mode().loc[0]
+            counts = y.value_counts()
+            self.class_counts = counts if self.class_counts is None else self.class_counts.add(counts, fill_value=0)
         else:
-            try:
-                self.beta = self.y_train.mean().loc[0]
-            except AttributeError:
-                self.beta = self.y_train.mean()
-        return self.beta
+            self._add_label_sum(y.sum() if pd.api.types.is_float_dtype(y) else np.float64(y.sum()), y.count())
+            self.label_stats = (self.label_stats or RunningStats()).update(y.to_frame(self.label_col))
+        return self._update_beta()
+
+    def merge(self, other: "MajorityPredictor") -> "MajorityPredictor":
+        """
+        Combine the statistics of a model trained on another shard of data into this one.
+        :param other: Model of the same problem class
+        :return: Combined model
+        """
+        if other.problem_class != self.problem_class:
+            raise ValueError("Only models of the same problem class can be merged.")
+        if self.problem_class == "classification" and other.class_counts is not None:
+            counts = other.class_counts
+            self.class_counts = counts if self.class_counts is None else self.class_counts.add(counts, fill_value=0)
+        elif other.label_stats is not None:
+            self._add_label_sum(other.label_sum, other.label_count)
+            self.label_stats = (self.label_stats or RunningStats()).merge(other.label_stats)
+        self._update_beta()
+        return self
 
     def tune(self, X_train, X_tune, y_train, y_tune):
         """
@@ -53,10 +91,19 @@ class MajorityPredictor:
         :param X_tune: Tuning feature values
         :param y_train: Training label values
         :param y_tune: Tuning label values
+        The model is assumed to have been trained on the training data, so only the tuning batch is added; an
+        untrained model is trained on the training data first.
+        """
+        if self.beta is None:
+            self.partial_fit(X_train, y_train)
+        self.partial_fit(X_tune, y_tune)
+
+    @property
+    def variance(self) -> float:
         """
-        X = pd.concat([X_train, X_tune])
-        y = pd.concat([y_train, y_tune])
-        self.train(X, y)
+        Sample variance of the label of a regression model.
+        """
+        return self.label_stats.std_devs.iloc[0] ** 2
 
     def predict(self, X: pd.DataFrame) -> pd.Series:
         """
@@ -64,7 +111,32 @@ class MajorityPredictor:
         :param X: Dataframe of feature values
         :return Predicted label values
         """
-        return pd.Series([self.beta for x in range(len(X))], index=X.index, name="pred")
+        return pd.Series(self.predict_values(len(X)), index=X.index, name="pred")
+
+    def predict_values(self, n_rows: int) -> np.ndarray:
+        """
+        Predict n_rows observations as a bare array, without building an index.
+        :param n_rows: Number of observations
+        :return: Array of predicted label values
+        """
+        return np.full(n_rows, self.beta)
+
+    def _update_beta(self) -> float:
+        """
+        Set beta from the sufficient statistics: the mode, with ties broken by the smallest class, or the mean.
+        """
+        if self.problem_class == "classification":
+            counts = self.class_counts
+            self.beta = counts[counts == counts.max()].index.min()
+        else:
+            with np.errstate(invalid="ignore"):
+                self.beta = self.label_sum / self.label_sum.dtype.type(self.label_count)
+        return self.beta
+
+    def _add_label_sum(self, label_sum: np.floating, label_count: int):
+        with np.errstate(invalid="ignore"):
+            self.label_sum = label_sum if self.label_sum is None else self.label_sum + label_sum
+        self.label_count += label_count
 
     def score(self, y_pred: pd.Series, y_truth: pd.Series) -> float:
         """
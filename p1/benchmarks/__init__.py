@@ -0,0 +1,9 @@
+"""Peter Rasmussen, Programming Assignment 1, benchmarks/__init__.py
+
+Benchmarks of each pipeline stage on synthetic datasets shaped like the catalog entries.
+
+"""
+from p1.benchmarks.bench import (
+    StageTimer, benchmark_dataset, compare_benchmarks, read_benchmarks, run_benchmarks, write_benchmarks
+)
+from p1.benchmarks.synthetic import make_synthetic_dataset, write_synthetic_catalog
@@ -0,0 +1,65 @@
+"""Peter Rasmussen, Programming Assignment 1, benchmarks/__main__.py
+
+Benchmark each pipeline stage on synthetic datasets of increasing size and append the results to a JSON lines file.
+
+Example:
+    python -m p1.benchmarks -i data -o /tmp/bench --sizes 1000 10000 100000
+    python -m p1.benchmarks -i data -o /tmp/bench --compare baseline.jsonl
+
+"""
+
+# standard library imports
+import argparse
+from pathlib import Path
+
+# local imports
+from p1.benchmarks import compare_benchmarks, read_benchmarks, run_benchmarks, write_benchmarks
+
+
+# Parse arguments
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--src_dir", "-i", type=Path, help="Input directory"
+)
+parser.add_argument(
+    "--dst_dir", "-o", type=Path, help="Output directory for synthetic datasets and results"
+)
+parser.add_argument(
+    "--sizes", "-n", nargs="+", type=int, default=[10 ** 3, 10 ** 4, 10 ** 5], help="Rows per synthetic dataset"
+)
+parser.add_argument(
+    "--datasets", "-d", nargs="+", help="Datasets to benchmark (default: every catalog dataset)"
+)
+parser.add_argument(
+    "--repeat", default=3, type=int, help="Timing passes per stage; the fastest is kept"
+)
+parser.add_argument(
+    "--no_memory", "--no-memory", action="store_true", help="Skip the memory-tracing pass"
+)
+parser.add_argument(
+    "--full_run_max_rows", "--full-run-max-rows", default=10 ** 5, type=int,
+    help="Largest size at which a full run is also benchmarked"
+)
+parser.add_argument(
+    "--output", type=Path, help="JSON lines file to append results to (default: <dst_dir>/benchmarks.jsonl)"
+)
+parser.add_argument(
+    "--compare", type=Path, help="Baseline JSON lines file to compare the new results against"
+)
+args = parser.parse_args()
+output = args.output or args.dst_dir / "benchmarks.jsonl"
+
+results = run_benchmarks(
+    args.src_dir,
+    args.dst_dir,
+    args.sizes,
+    dataset_names=args.datasets,
+    repeat=args.repeat,
+    trace_memory=not args.no_memory,
+    full_run_max_rows=args.full_run_max_rows,
+)
+write_benchmarks(results, output)
+print(results.to_string(index=False))
+
+if args.compare is not None:
+    print(compare_benchmarks(read_benchmarks(args.compare), results).to_string())
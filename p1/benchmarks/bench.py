@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Peter Rasmussen, Programming Assignment 1, bench.py
+
+This module times each pipeline stage, and a full run, on synthetic datasets of increasing size.
+
+Every measurement is one JSON line with the commit, dataset, number of rows, stage, wall time, and peak memory, so
+that files from different commits can be concatenated and compared with compare_benchmarks.
+
+"""
+# Standard library imports
+from contextlib import contextmanager
+import copy
+import datetime
+import json
+from pathlib import Path
+import subprocess
+import time
+import tracemalloc
+
+# Third party libraries
+import pandas as pd
+
+# Local imports
+from p1.algorithms import MajorityPredictor
+from p1.benchmarks.synthetic import write_synthetic_catalog
+from p1.preprocessing import Preprocessor
+from p1.preprocessing.standardization import get_standardization_cols, get_standardization_params, standardize
+from p1.run import run
+
+
+class StageTimer:
+    """
+    Record the wall time and, optionally, the peak traced memory of named stages.
+    Peak memory is the tracemalloc peak above the memory allocated when the stage starts; NumPy and pandas buffers
+    are traced. Tracing slows code down, so time and memory are best measured in separate passes.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        """
+        Instantiate the StageTimer object.
+        :param trace_memory: True to trace the peak memory of each stage
+        """
+        self.trace_memory = trace_memory
+        self.records: list[dict] = []
+
+    def __repr__(self):
+        return f"StageTimer({len(self.records)} stages, trace_memory={self.trace_memory})"
+
+    @contextmanager
+    def __call__(self, stage: str):
+        """
+        Measure the stage run inside the with block.
+        :param stage: Stage name
+        """
+        if self.trace_memory:
+            tracemalloc.start()
+            tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record = {"stage": stage, "wall_time": time.perf_counter() - start, "peak_bytes": None}
+            if self.trace_memory:
+                record["peak_bytes"] = tracemalloc.get_traced_memory()[1] - start_bytes
+                tracemalloc.stop()
+            self.records.append(record)
+
+
+def benchmark_dataset(
+        dataset_name: str,
+        dataset_meta: dict,
+        src_dir: Path,
+        discretize_dict: dict,
+        k_folds: int = 5,
+        random_state: int = 777,
+        trace_memory: bool = False,
+) -> list:
+    """
+    Run every preprocessing and model stage of one dataset once, measuring each stage.
+    :param dataset_name: Name of the dataset in the data catalog
+    :param dataset_meta: Data catalog entry of the dataset
+    :param src_dir: Input directory that provides the dataset
+    :param discretize_dict: Discretization parameters of the dataset
+    :param k_folds: Number of folds to partition the data into
+    :param random_state: Random number seed
+    :param trace_memory: True to trace peak memory instead of timing only
+    :return: List of stage records
+    Fold 1 is the test set of the standardize, train, predict, and score stages.
+    """
+    timer = StageTimer(trace_memory)
+    problem_class = dataset_meta["problem_class"]
+    preprocessor = Preprocessor(dataset_name, dataset_meta, src_dir)
+    with timer("load"):
+        preprocessor.load()
+    preprocessor.identify_features_label_id()
+    fused = copy.copy(preprocessor)
+    fused.data = preprocessor.data.copy()
+    with timer("transform_columns"):
+        fused.transform_columns()
+    del fused
+    with timer("replace"):
+        preprocessor.replace()
+    preprocessor.log_transform()
+    with timer("impute"):
+        preprocessor.impute()
+    with timer("dummy"):
+        preprocessor.dummy()
+    with timer("discretize"):
+        preprocessor.discretize(discretize_dict)
+
+    # Datasets without non-ordinal numeric columns have no natural breaks to compute
+    ordinal_cols = preprocessor.names_meta[preprocessor.names_meta.data_class == "ordinal"].index
+    if [x for x in preprocessor.get_numeric_columns() if x not in ordinal_cols]:
+        with timer("compute_natural_breaks"):
+            preprocessor.compute_natural_breaks()
+
+    preprocessor.shuffle(random_state=random_state)
+    with timer("make_splits"):
+        preprocessor.make_folds(k_folds)
+
+    data = preprocessor.data
+    feature_cols, label_col = preprocessor.features, preprocessor.label
+    if problem_class == "classification":
+        data[label_col] = data[label_col].astype(int)
+    test, train_val = data[data["fold"] == 1], data[data["fold"] != 1]
+    with timer("standardize"):
+        cols = get_standardization_cols(train_val, feature_cols)
+        means, std_devs = get_standardization_params(train_val[cols])
+        test = test.copy()
+        train_val = train_val.copy()
+        test[cols] = standardize(test[cols], means, std_devs)
+        train_val[cols] = standardize(train_val[cols], means, std_devs)
+
+    predictor = MajorityPredictor(problem_class, label_col, feature_cols)
+    with timer("train"):
+        predictor.train(train_val[feature_cols], train_val[label_col])
+    with timer("predict"):
+        y_pred = predictor.predict(test[feature_cols])
+    with timer("score"):
+        predictor.score(y_pred, test[label_col])
+    return [{"dataset_name": dataset_name, **record} for record in timer.records]
+
+
+def benchmark_run(src_dir: Path, dst_dir: Path, k_folds: int = 5, val_frac: float = 0.1, random_state: int = 777,
+                  trace_memory: bool = False) -> dict:
+    """
+    Measure one full run over a catalog.
+    :param src_dir: Input directory that provides each dataset and params files
+    :param dst_dir: Output directory of the run
+    :param k_folds: Number of folds to partition the data into
+    :param val_frac: Validation fraction of train-validation set
+    :param random_state: Random number seed
+    :param trace_memory: True to trace peak memory instead of timing only
+    :return: Stage record of the run
+    """
+    timer = StageTimer(trace_memory)
+    Path(dst_dir).mkdir(parents=True, exist_ok=True)
+    with timer("run"):
+        run(Path(src_dir), Path(dst_dir), k_folds, val_frac, random_state)
+    return {"dataset_name": None, **timer.records[0]}
+
+
+def run_benchmarks(
+        src_dir: Path,
+        dst_dir: Path,
+        sizes: list,
+        dataset_names: list = None,
+        repeat: int = 3,
+        trace_memory: bool = True,
+        full_run_max_rows: int = 10 ** 5,
+        k_folds: int = 5,
+        val_frac: float = 0.1,
+        random_state: int = 777,
+) -> pd.DataFrame:
+    """
+    Benchmark every stage of each dataset at each size.
+    :param src_dir: Input directory that provides each dataset and params files
+    :param dst_dir: Directory for synthetic datasets and run outputs
+    :param sizes: Numbers of rows to generate per dataset
+    :param dataset_names: Datasets to benchmark; None for the whole catalog
+    :param repeat: Number of timing passes; the fastest wall time of each stage is kept
+    :param trace_memory: True to add one memory-tracing pass that records peak memory per stage
+    :param full_run_max_rows: Largest size at which a full run is also measured
+    :param k_folds: Number of folds to partition the data into
+    :param val_frac: Validation fraction of train-validation set
+    :param random_state: Random number seed
+    :return: Dataframe with one row per size, dataset, and stage
+    """
+    with open(Path(src_dir) / "discretize.json") as file:
+        discretize_dicts = json.load(file)
+    context = {"commit": _get_commit(), "timestamp": datetime.datetime.now().isoformat(timespec="seconds")}
+
+    records = []
+    for n_rows in sizes:
+        synthetic_dir = Path(dst_dir) / "synthetic" / str(n_rows)
+        data_catalog = write_synthetic_catalog(src_dir, synthetic_dir, n_rows, dataset_names, random_state)
+        passes = [False] * repeat + ([True] if trace_memory else [])
+        size_records = []
+        for dataset_name, dataset_meta in data_catalog.items():
+            for trace in passes:
+                size_records += benchmark_dataset(dataset_name, dataset_meta, synthetic_dir,
+                                                  discretize_dicts.get(dataset_name, {}), k_folds, random_state, trace)
+        if n_rows <= full_run_max_rows:
+            for trace in passes:
+                size_records.append(benchmark_run(synthetic_dir, synthetic_dir / "output", k_folds, val_frac,
+                                                  random_state, trace))
+        records += [{**context, "n_rows": n_rows, **record} for record in size_records]
+
+    # Keep the fastest timing pass and the traced peak memory of each stage
+    results = pd.DataFrame(records)
+    keys = ["commit", "timestamp", "n_rows", "dataset_name", "stage"]
+    timed = results[results["peak_bytes"].isna()].groupby(keys, dropna=False, sort=False)["wall_time"].min()
+    traced = results[results["peak_bytes"].notna()].groupby(keys, dropna=False, sort=False)["peak_bytes"].max()
+    return timed.to_frame().join(traced).reset_index()
+
+
+def write_benchmarks(results: pd.DataFrame, dst: Path):
+    """
+    Append benchmark results to a JSON lines file.
+    :param results: Output of run_benchmarks
+    :param dst: JSON lines file
+    """
+    with open(dst, "a") as file:
+        for record in results.to_dict(orient="records"):
+            file.write(json.dumps({k: (None if pd.isna(v) else v) for k, v in record.items()}) + "\n")
+
+
+def compare_benchmarks(baseline: pd.DataFrame, current: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare the stage wall times of two sets of benchmark results.
+    :param baseline: Results of the baseline commit, e.g. read with read_benchmarks
+    :param current: Results of the commit under test
+    :return: Dataframe of baseline and current wall times and their ratio, largest slowdowns first
+    """
+    keys = ["n_rows", "dataset_name", "stage"]
+    times = [x.fillna({"dataset_name": "all"}).groupby(keys)["wall_time"].median() for x in (baseline, current)]
+    comparison = pd.concat(times, axis=1, keys=["baseline", "current"])
+    comparison["ratio"] = comparison["current"] / comparison["baseline"]
+    return comparison.dropna().sort_values("ratio", ascending=False)
+
+
+def read_benchmarks(src: Path) -> pd.DataFrame:
+    """
+    Read benchmark results written by write_benchmarks.
+    :param src: JSON lines file
+    :return: Dataframe of results
+    """
+    return pd.read_json(src, lines=True)
+
+
+def _get_commit() -> str:
+    """
+    Get the git commit of the working tree, or None outside a git repository.
+    """
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
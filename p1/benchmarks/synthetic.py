@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Peter Rasmussen, Programming Assignment 1, synthetic.py
+
+This module generates synthetic, arbitrarily large copies of the catalog datasets for benchmarking.
+
+Each column is resampled with replacement from the raw text of the real dataset, so the synthetic files keep the
+catalog's column names, header, data types, missing-value tokens, and categorical levels. Float columns are jittered
+so that their number of distinct values grows with the number of rows, as it would for real data.
+
+"""
+# Standard library imports
+import json
+from pathlib import Path
+import shutil
+
+# Third party libraries
+import numpy as np
+import pandas as pd
+
+
+def make_synthetic_dataset(dataset_meta: dict, src_dir: Path, n_rows: int, random_state: int = 777) -> pd.DataFrame:
+    """
+    Resample the raw text of one catalog dataset into n_rows rows.
+    :param dataset_meta: Data catalog entry of the dataset
+    :param src_dir: Directory that provides the real dataset
+    :param n_rows: Number of rows to generate
+    :param random_state: Random number seed
+    :return: Dataframe of strings, ready to be written with write_synthetic_dataset
+    """
+    names_meta = pd.DataFrame(dataset_meta["names_meta"]).set_index("name")
+    header = 0 if dataset_meta["header"] else None
+    raw = pd.read_csv(Path(src_dir) / dataset_meta["data_filename"], header=header, names=names_meta.index,
+                      dtype=str, keep_default_na=False)
+    rng = np.random.default_rng(random_state)
+    columns = {}
+    for col in raw:
+        values = raw[col].to_numpy()[rng.integers(0, len(raw), n_rows)]
+        if names_meta.loc[col, "data_type"] == "float":
+            numbers = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy()
+            jittered = np.round(numbers * rng.normal(1.0, 0.01, n_rows), 4)
+            values = np.where(np.isnan(numbers), values, jittered.astype(str))
+        columns[col] = values
+    return pd.DataFrame(columns)
+
+
+def write_synthetic_dataset(data: pd.DataFrame, dataset_meta: dict, dst_dir: Path) -> Path:
+    """
+    Write a synthetic dataset in the same layout as its catalog file.
+    :param data: Synthetic dataset from make_synthetic_dataset
+    :param dataset_meta: Data catalog entry of the dataset
+    :param dst_dir: Output directory
+    :return: Path of the written file
+    """
+    dst = Path(dst_dir) / dataset_meta["data_filename"]
+    header = False
+    if dataset_meta["header"]:
+        header = [x["orig_name"] or x["name"] for x in dataset_meta["names_meta"]]
+    data.to_csv(dst, header=header, index=False)
+    return dst
+
+
+def write_synthetic_catalog(src_dir: Path, dst_dir: Path, n_rows: int, dataset_names: list = None,
+                            random_state: int = 777) -> dict:
+    """
+    Write synthetic versions of catalog datasets plus the catalog and discretization files that describe them.
+    :param src_dir: Input directory that provides each dataset and params files
+    :param dst_dir: Output directory, usable as the src_dir of run
+    :param n_rows: Number of rows per dataset
+    :param dataset_names: Datasets to generate; None for the whole catalog
+    :param random_state: Random number seed
+    :return: Data catalog of the generated datasets
+    """
+    src_dir, dst_dir = Path(src_dir), Path(dst_dir)
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    with open(src_dir / "data_catalog.json") as file:
+        data_catalog = json.load(file)
+    if dataset_names is not None:
+        data_catalog = {name: data_catalog[name] for name in dataset_names}
+    for dataset_meta in data_catalog.values():
+        data = make_synthetic_dataset(dataset_meta, src_dir, n_rows, random_state)
+        write_synthetic_dataset(data, dataset_meta, dst_dir)
+    with open(dst_dir / "data_catalog.json", "w") as file:
+        json.dump(data_catalog, file)
+    shutil.copy(src_dir / "discretize.json", dst_dir / "discretize.json")
+    return data_catalog
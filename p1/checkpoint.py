@@ -0,0 +1,150 @@
+"""Peter Rasmussen, Programming Assignment 1, checkpoint.py
+
+This module provides the RunCheckpoint class, which appends the output rows of a run to disk as each unit of work
+finishes so that an interrupted run can resume where it stopped.
+
+A unit is one fold of one dataset for a run, or one dataset and parameter combination for a sweep. Its rows are
+appended as one JSON line to a results file named after a hash of the run's configuration and inputs, and flushed to
+disk before the next unit starts. A manifest in the same directory maps each configuration hash to its configuration,
+results file, and status.
+
+"""
+# Standard library imports
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+import typing as t
+
+# Third party imports
+import numpy as np
+
+# Local imports
+from p1.preprocessing import ColumnStore
+
+
+class RunCheckpoint:
+    """
+    Append finished units of a run to a results file and read them back on resume.
+    """
+
+    def __init__(self, checkpoint_dir: Path, config: dict, resume: bool = False):
+        """
+        Instantiate the RunCheckpoint object.
+        :param checkpoint_dir: Directory that holds the manifest and results files
+        :param config: JSON-serializable configuration of the run, as made by make_config
+        :param resume: True to keep the units already written for this configuration; False to start over
+        """
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        self.config = config
+        self.key = self.make_key(config)
+        self.results_path = self.checkpoint_dir / f"{self.key}.jsonl"
+        self.manifest_path = self.checkpoint_dir / "manifest.json"
+        if not resume:
+            self.results_path.unlink(missing_ok=True)
+        self.units = self._read()
+        self._update_manifest("running")
+        logging.debug(f"Checkpoint {self.key[:12]}: {len(self.units)} units done.")
+
+    def __repr__(self):
+        return f"RunCheckpoint({self.checkpoint_dir}, key={self.key[:12]}, units={len(self.units)})"
+
+    @staticmethod
+    def make_config(src_dir: Path, data_catalog: dict, discretize_dicts: dict, **params) -> dict:
+        """
+        Describe everything the output of a run depends on.
+        :param src_dir: Input directory that provides each dataset
+        :param data_catalog: Data catalog keyed by dataset name
+        :param discretize_dicts: Discretization parameters keyed by dataset name
+        :param params: Run parameters, e.g. k_folds, val_frac, random_state, and batched
+        :return: Configuration dict; source files are identified by size and modification time
+        """
+        sources = {dataset_name: ColumnStore.fingerprint(Path(src_dir) / dataset_meta["data_filename"], dataset_meta)
+                   for dataset_name, dataset_meta in data_catalog.items()}
+        return {"params": params, "sources": sources,
+                "discretize": {dataset_name: discretize_dicts[dataset_name] for dataset_name in data_catalog}}
+
+    @staticmethod
+    def make_key(config: dict) -> str:
+        """
+        Hash a configuration into a checkpoint key.
+        :param config: JSON-serializable configuration
+        :return: Hex digest key
+        """
+        return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+    def done(self, unit: tuple) -> bool:
+        """
+        Check whether a unit has been written.
+        :param unit: Unit key, e.g. (dataset_name, fold)
+        :return: True if the unit's rows are on disk
+        """
+        return tuple(unit) in self.units
+
+    def append(self, units: t.Dict[tuple, list]):
+        """
+        Write the rows of finished units and flush them to disk.
+        :param units: Output rows keyed by unit key
+        """
+        with open(self.results_path, "a") as file:
+            for unit, rows in units.items():
+                file.write(json.dumps({"unit": list(unit), "rows": rows}, default=_to_builtin) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        for unit, rows in units.items():
+            self.units[tuple(unit)] = json.loads(json.dumps(rows, default=_to_builtin))
+
+    def rows(self, units: t.Iterable[tuple]) -> list:
+        """
+        Gather the rows of units in the given order.
+        :param units: Unit keys; units that are not done are skipped
+        :return: List of output rows
+        """
+        return [row for unit in units if self.done(unit) for row in self.units[tuple(unit)]]
+
+    def complete(self):
+        """
+        Mark the run as complete in the manifest.
+        """
+        self._update_manifest("complete")
+
+    def _read(self) -> dict:
+        # Read the units written so far, dropping a last line cut off by a crash so that appends start on a new line
+        units = {}
+        if not self.results_path.exists():
+            return units
+        with open(self.results_path, "rb+") as file:
+            offset = 0
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                units[tuple(record["unit"])] = record["rows"]
+                offset += len(line)
+            file.truncate(offset)
+        return units
+
+    def _update_manifest(self, status: str):
+        manifest = {}
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as file:
+                manifest = json.load(file)
+        manifest[self.key] = {"config": self.config, "results": self.results_path.name, "status": status,
+                              "units": len(self.units)}
+
+        # Write to a temporary file and rename so that the manifest is never partially written
+        with tempfile.NamedTemporaryFile("w", dir=self.checkpoint_dir, suffix=".json", delete=False) as file:
+            json.dump(manifest, file, indent=2, default=str)
+        os.replace(file.name, self.manifest_path)
+
+
+def _to_builtin(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -1 +1,7 @@
-from p1.exploration.visualization import plot_histograms
\ No newline at end of file
+from p1.exploration.histograms import compute_histograms, count_bins, stream_histograms
+from p1.exploration.profiling import profile_dataset, summarize_numeric, write_profiles
+
+try:
+    from p1.exploration.visualization import plot_histograms, write_histograms
+except ImportError:  # Plotly is only needed for plotting
+    pass
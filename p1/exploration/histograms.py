@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Peter Rasmussen, Programming Assignment 1, histograms.py
+
+This module bins numeric columns with NumPy so that plots only carry bar heights and edges, not raw values.
+
+Equal-width bins come from each column's minimum and maximum and are counted with np.bincount, in memory or over a
+stream of chunks. Any other edges, e.g. the retbins of Preprocessor.discretize or Jenks breaks, can be passed in.
+
+"""
+# Standard library imports
+import typing as t
+
+# Third party libraries
+import numpy as np
+import pandas as pd
+
+
+def compute_histograms(data: pd.DataFrame, numeric_cols: list, n_bins: int = 50, edges: dict = None) -> dict:
+    """
+    Count the values of each numeric column per bin.
+    :param data: Dataframe holding the columns
+    :param numeric_cols: List of numeric columns to bin
+    :param n_bins: Number of equal-width bins of columns without edges
+    :param edges: Optional bin edges keyed by column, including the first and last edge
+    :return: Dictionary keyed by column of (counts, edges) tuples; missing and infinite values are not counted
+    """
+    edges = dict(edges or {})
+    for col in numeric_cols:
+        if col not in edges:
+            edges[col] = _equal_width_edges(*_value_range(_finite(data[col])), n_bins)
+    return {col: (count_bins(_finite(data[col]), edges[col]), np.asarray(edges[col], dtype=float))
+            for col in numeric_cols}
+
+
+def stream_histograms(make_chunks: t.Callable[[], t.Iterator[pd.DataFrame]], numeric_cols: list,
+                      n_bins: int = 50) -> dict:
+    """
+    Count the values of each numeric column per equal-width bin in two passes over chunks of a dataset.
+    :param make_chunks: Function that returns a fresh iterator of chunks, e.g. Preprocessor.load_chunks
+    :param numeric_cols: List of numeric columns to bin
+    :param n_bins: Number of equal-width bins
+    :return: Dictionary keyed by column of (counts, edges) tuples
+    The first pass finds each column's minimum and maximum, the second adds up bincounts, so memory is bounded by the
+    chunk size.
+    """
+    mins = {col: np.inf for col in numeric_cols}
+    maxs = {col: -np.inf for col in numeric_cols}
+    for chunk in make_chunks():
+        for col in numeric_cols:
+            min_, max_ = _value_range(_finite(chunk[col]))
+            mins[col], maxs[col] = min(mins[col], min_), max(maxs[col], max_)
+    edges = {col: _equal_width_edges(mins[col], maxs[col], n_bins) for col in numeric_cols}
+    counts = {col: np.zeros(len(edges[col]) - 1, dtype=np.int64) for col in numeric_cols}
+    for chunk in make_chunks():
+        for col in numeric_cols:
+            counts[col] += count_bins(_finite(chunk[col]), edges[col])
+    return {col: (counts[col], edges[col]) for col in numeric_cols}
+
+
+def count_bins(values: np.ndarray, edges: t.Union[list, np.ndarray]) -> np.ndarray:
+    """
+    Count values per bin.
+    :param values: Finite values
+    :param edges: Bin edges, including the first and last edge
+    :return: Counts of the len(edges) - 1 bins
+    Bins are closed on the left except the last, which is closed on both sides, like np.histogram; values outside
+    the edges are not counted.
+    """
+    edges = np.asarray(edges, dtype=float)
+    n_bins = len(edges) - 1
+    values = values[(values >= edges[0]) & (values <= edges[-1])]
+    codes = np.searchsorted(edges, values, side="right") - 1
+    return np.bincount(np.minimum(codes, n_bins - 1), minlength=n_bins)
+
+
+def _equal_width_edges(min_: float, max_: float, n_bins: int) -> np.ndarray:
+    if not np.isfinite(min_):
+        min_ = max_ = 0.0
+    if min_ == max_:
+        min_, max_ = min_ - 0.5, max_ + 0.5
+    return np.linspace(min_, max_, n_bins + 1)
+
+
+def _finite(series: pd.Series) -> np.ndarray:
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    return values[np.isfinite(values)]
+
+
+def _value_range(values: np.ndarray) -> tuple:
+    return (values.min(), values.max()) if len(values) else (np.inf, -np.inf)
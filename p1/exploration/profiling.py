@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Peter Rasmussen, Programming Assignment 1, profiling.py
+
+This module profiles the columns of the catalog datasets to help choose discretize.json and log_transform settings.
+
+Missing and infinite counts, minima, maxima, means, standard deviations, and skewness of all numeric columns are
+computed in one vectorized pass over a 2-D array. Cardinality, top-k values, and the two-class Jenks break and its
+goodness of variance fit (GCVF) are computed per column, in a thread pool for wide tables.
+
+"""
+# Standard library imports
+from concurrent.futures import ThreadPoolExecutor
+import json
+from pathlib import Path
+import warnings
+
+# Third party libraries
+import numpy as np
+import pandas as pd
+
+# Local imports
+from p1.preprocessing import Preprocessor
+from p1.preprocessing.jenks import compute_two_break_jenks
+
+PROFILE_COLUMNS = [
+    "dataset_name", "column", "dtype", "data_class", "role", "n_rows", "n_missing", "n_inf", "min", "max", "mean",
+    "std", "skew", "cardinality", "top_values", "jenks_break", "jenks_gcvf",
+]
+
+
+def profile_dataset(preprocessor: Preprocessor, top_k: int = 5, n_jobs: int = 1) -> pd.DataFrame:
+    """
+    Profile every column of a loaded dataset.
+    :param preprocessor: Preprocessor whose data is loaded
+    :param top_k: Number of most frequent values to report per column
+    :param n_jobs: Number of threads that profile columns at once
+    :return: Dataframe with one row per column
+    """
+    data = preprocessor.data
+    names_meta = preprocessor.names_meta
+    numeric_cols = [x for x in data
+                    if pd.api.types.is_numeric_dtype(data[x]) and not pd.api.types.is_bool_dtype(data[x])]
+
+    # One pass over every numeric column at once
+    moments = summarize_numeric(data[numeric_cols]) if numeric_cols else pd.DataFrame()
+
+    # Per-column statistics that need hashing or sorting
+    with ThreadPoolExecutor(max(n_jobs, 1)) as executor:
+        per_column = list(executor.map(lambda col: _profile_column(data[col], col in numeric_cols, top_k), data))
+
+    rows = []
+    for col, stats in zip(data, per_column):
+        meta = names_meta.loc[col] if col in names_meta.index else None
+        row = {"dataset_name": preprocessor.dataset_name, "column": col, "dtype": str(data[col].dtype),
+               "data_class": None if meta is None else meta["data_class"], "role": _role(meta), "n_rows": len(data)}
+        if col in moments.index:
+            row.update(moments.loc[col].to_dict())
+        else:
+            row["n_missing"] = int(data[col].isna().sum())
+        rows.append({**row, **stats})
+    profile = pd.DataFrame(rows, columns=PROFILE_COLUMNS)
+    return profile.astype({"n_missing": "Int64", "n_inf": "Int64", "cardinality": "Int64"})
+
+
+def summarize_numeric(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute missing and infinite counts and moments of the finite values of numeric columns in one pass.
+    :param data: Dataframe of numeric columns
+    :return: Dataframe indexed by column of n_missing, n_inf, min, max, mean, std (ddof=1), and skew
+    """
+    values = data.to_numpy(dtype=float, na_value=np.nan)
+    missing, infinite = np.isnan(values), np.isinf(values)
+    finite = np.where(missing | infinite, np.nan, values)
+    with warnings.catch_warnings(), np.errstate(invalid="ignore", divide="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        count = (~np.isnan(finite)).sum(axis=0)
+        mean = np.nanmean(finite, axis=0)
+        deviations = finite - mean
+        m2, m3 = np.nansum(deviations ** 2, axis=0), np.nansum(deviations ** 3, axis=0)
+        std = np.sqrt(m2 / (count - 1))
+        skew = (m3 / count) / (m2 / count) ** 1.5
+        summary = {"n_missing": missing.sum(axis=0), "n_inf": infinite.sum(axis=0),
+                   "min": np.nanmin(finite, axis=0), "max": np.nanmax(finite, axis=0), "mean": mean, "std": std,
+                   "skew": skew}
+    return pd.DataFrame(summary, index=data.columns)
+
+
+def write_profiles(src_dir: Path, dst_dir: Path, top_k: int = 5, n_jobs: int = 1) -> pd.DataFrame:
+    """
+    Profile every catalog dataset and write profile.json and profile.csv to the output directory.
+    :param src_dir: Input directory that provides each dataset and params files
+    :param dst_dir: Output directory
+    :param top_k: Number of most frequent values to report per column
+    :param n_jobs: Number of threads that profile columns at once
+    :return: Dataframe with one row per dataset and column
+    Datasets are profiled as loaded, before replacement, log transformation, and imputation.
+    """
+    with open(src_dir / "data_catalog.json", "r") as file:
+        data_catalog = json.load(file)
+    profiles = []
+    for dataset_name, dataset_meta in data_catalog.items():
+        preprocessor = Preprocessor(dataset_name, dataset_meta, src_dir)
+        preprocessor.load()
+        profiles.append(profile_dataset(preprocessor, top_k, n_jobs))
+    profile = pd.concat(profiles, ignore_index=True)
+
+    # Save the report as JSON records and as CSV with the top values as JSON strings
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    profile.to_json(dst_dir / "profile.json", orient="records", indent=2)
+    profile.assign(top_values=profile["top_values"].map(json.dumps)).to_csv(dst_dir / "profile.csv", index=False)
+    return profile
+
+
+def _profile_column(series: pd.Series, numeric: bool, top_k: int) -> dict:
+    # Cardinality, top-k values, and for numeric columns the two-class Jenks break of the finite values
+    counts = series.value_counts(dropna=True)
+    top_values = [[_to_builtin(value), int(count)] for value, count in counts.head(top_k).items()]
+    stats = {"cardinality": len(counts), "top_values": top_values, "jenks_break": None, "jenks_gcvf": None}
+    if numeric:
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        values = values[np.isfinite(values)]
+        if len(values) >= 3 and values.min() < values.max():
+            jenks = compute_two_break_jenks(values)
+            stats.update({"jenks_break": jenks["break_value"], "jenks_gcvf": float(jenks["gcvf"])})
+    return stats
+
+
+def _role(meta: pd.Series) -> str:
+    if meta is None:
+        return None
+    if meta["label"]:
+        return "label"
+    return "id" if meta["id"] else "feature"
+
+
+def _to_builtin(value):
+    return value.item() if isinstance(value, np.generic) else value
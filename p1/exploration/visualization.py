@@ -3,33 +3,75 @@
 
 This module provides various visualiation functions.
 
+Histograms are binned with NumPy before plotting, so figures hold one bar per bin rather than every value.
+
 """
+# Standard library imports
+from pathlib import Path
+
 # Third party libraries
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
 # Local imports
+from p1.exploration.histograms import compute_histograms
 from p1.preprocessing import Preprocessor
 
 
-def plot_histograms(preprocessor: Preprocessor, numeric_cols: list):
+def plot_histograms(preprocessor: Preprocessor, numeric_cols: list, n_bins: int = 50, edges: dict = None):
     """
     Plot histograms of numeric columns.
     :param preprocessor: Preprocessor object
     :param numeric_cols: List of numeric columns to plot
+    :param n_bins: Number of equal-width bins of columns without edges
+    :param edges: Optional bin edges keyed by column, e.g. the retbins of preprocessor.bins
     """
     if not numeric_cols:
         print("No numeric columns to plot.")
         return
 
-    # Instantiate figure object
+    # Bin every column, then add one bar trace per column to the figure
+    histograms = compute_histograms(preprocessor.data, numeric_cols, n_bins, edges)
     fig = make_subplots(rows=len(numeric_cols), cols=1)
-
-    # Loop over each numeric column and add its trace to the figure
     for index, numeric_col in enumerate(numeric_cols, start=1):
-        values = preprocessor.data[numeric_col].tolist()
-        fig.append_trace(go.Histogram(x=values, name=numeric_col), row=index, col=1)
+        fig.append_trace(_bar(numeric_col, *histograms[numeric_col]), row=index, col=1)
 
     # Update the layout and display the plot
     fig.update_layout(height=200 * len(numeric_cols), width=1000, title_text=preprocessor.dataset_name)
     fig.show()
+
+
+def write_histograms(preprocessor: Preprocessor, numeric_cols: list, dst_dir: Path, formats: tuple = ("html",),
+                     n_bins: int = 50, edges: dict = None) -> list:
+    """
+    Write one histogram file per numeric column and format.
+    :param preprocessor: Preprocessor object
+    :param numeric_cols: List of numeric columns to plot
+    :param dst_dir: Output directory
+    :param formats: File formats: 'html', and 'png' or other static image formats, which require kaleido
+    :param n_bins: Number of equal-width bins of columns without edges
+    :param edges: Optional bin edges keyed by column, e.g. the retbins of preprocessor.bins
+    :return: List of written paths
+    HTML files share one copy of plotly.js written to dst_dir.
+    """
+    dst_dir = Path(dst_dir)
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    histograms = compute_histograms(preprocessor.data, numeric_cols, n_bins, edges)
+    paths = []
+    for numeric_col in numeric_cols:
+        fig = go.Figure(_bar(numeric_col, *histograms[numeric_col]))
+        fig.update_layout(height=400, width=1000, title_text=f"{preprocessor.dataset_name}: {numeric_col}")
+        for file_format in formats:
+            dst = dst_dir / f"{preprocessor.dataset_name}_{numeric_col}.{file_format}"
+            if file_format == "html":
+                fig.write_html(dst, include_plotlyjs="directory")
+            else:
+                fig.write_image(dst)
+            paths.append(dst)
+    return paths
+
+
+def _bar(name: str, counts: np.ndarray, edges: np.ndarray) -> go.Bar:
+    # One bar per bin, centered on the bin and as wide as it
+    return go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), name=name)
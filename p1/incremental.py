@@ -0,0 +1,184 @@
+"""Peter Rasmussen, Programming Assignment 1, incremental.py
+
+This module updates the fold scores of a dataset whose source file has grown without reprocessing its earlier rows.
+
+A majority predictor's fold scores depend only on the label's per-fold sufficient statistics, and with hash-based
+fold assignment an appended row never moves an earlier row to another fold. So a small state file per dataset keeps
+the number of rows and bytes parsed so far, a SHA-256 checksum of those bytes, the label's FoldLabelStats, and the
+RunningStats of the numeric columns, whose merged label mean imputes missing labels. When the file still starts with
+the checksummed bytes, only the rows after them are parsed, hashed into folds, and added to the statistics; otherwise
+the state is rebuilt from the whole file.
+
+Imputation, discretization, and standardization of the features do not change a majority predictor's scores, and
+neither does the train-validation split, since the tuned beta is that of the whole train-validation set as in
+run.score_folds_batched. A discretized label would need bins fitted on every row, so it is rejected.
+
+"""
+# Standard library imports
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+import typing as t
+
+# Third party imports
+import numpy as np
+import pandas as pd
+
+# Local imports
+from p1.algorithms import FoldLabelStats
+from p1.preprocessing import Preprocessor, RunningStats, assign_hash_splits
+
+# Bump whenever the state layout or the way rows are parsed changes so that stale states are rebuilt
+STATE_VERSION = 1
+
+
+def update_dataset(state_dir: Path, dataset_name: str, dataset_meta: dict, src_dir: Path, k_folds: int,
+                   random_state: int, discretize_dict: dict = None) -> list:
+    """
+    Score a majority predictor on every fold of a dataset, parsing only the rows appended since the last update.
+    :param state_dir: Directory of the per-dataset state files
+    :param dataset_name: Name of the dataset in the data catalog
+    :param dataset_meta: Data catalog entry of the dataset
+    :param src_dir: Input directory that provides the dataset
+    :param k_folds: Number of folds to partition the data into
+    :param random_state: Random number seed of the hash-based folds
+    :param discretize_dict: Discretization parameters of the dataset; only feature columns may be discretized
+    :return: Output rows of dataset name, problem class, fold, test score, and beta, as score_folds_batched returns
+        them for folds assigned with fold_assignment='hash'
+    Scores match a full recompute to floating-point rounding.
+    """
+    preprocessor = Preprocessor(dataset_name, dataset_meta, src_dir)
+    problem_class = dataset_meta["problem_class"]
+    names_meta = preprocessor.names_meta
+    label_col = names_meta.index[names_meta["label"]][0]
+    if label_col in (discretize_dict or {}):
+        raise ValueError(f"Dataset {dataset_name}: incremental runs cannot discretize the label.")
+    state_path = Path(state_dir) / f"{dataset_name}.json"
+    key = make_key(dataset_meta, k_folds, random_state)
+
+    # Find the appended tail: the bytes after those checksummed by the last update
+    state = load_state(state_path, key)
+    offset, digest = 0, hashlib.sha256()
+    if state is not None:
+        offset, digest = find_tail(preprocessor.dataset_src, state)
+        if offset is None:
+            logging.debug(f"Dataset {dataset_name} changed before its appended rows; rebuild its state.")
+            state, offset, digest = None, 0, hashlib.sha256()
+
+    # Parse, hash, and transform the new rows only, up to the end of the file as of now
+    end = os.stat(preprocessor.dataset_src).st_size
+    tail = preprocessor.load_tail(offset, end)
+    preprocessor.data = tail
+    hashes = preprocessor.hash_rows()
+    tail = preprocessor.transform_rows(tail.copy())
+    labels = tail[label_col].to_numpy()
+    if problem_class == "classification":
+        labels = labels.astype(int)
+    folds = assign_hash_splits(hashes, labels, problem_class, random_state, k_folds=k_folds)
+
+    # Add the new rows to the label's per-fold statistics and the numeric columns' imputation statistics
+    if state is None:
+        values = labels.astype(np.float64)
+        center = values[np.isfinite(values)].mean() if np.isfinite(values).any() else 0.0
+        label_stats, running_stats, n_rows = FoldLabelStats(problem_class, k_folds, center), RunningStats(), 0
+    else:
+        label_stats = FoldLabelStats.from_dict(state["label_stats"])
+        running_stats = RunningStats.from_dict(state["running_stats"])
+        n_rows = state["n_rows"]
+    label_stats.update(labels, folds)
+    numeric_cols = [x for x in tail.select_dtypes(np.number) if x not in names_meta.index[names_meta["id"]]]
+    if len(tail):
+        running_stats.update(tail[numeric_cols])
+    logging.debug(f"Dataset {dataset_name}: {len(tail)} rows parsed from byte {offset}, {n_rows} rows reused.")
+
+    # Score every fold, imputing missing labels with the merged label mean; the label is a feature, so it is
+    # standardized unless it is Boolean
+    fill = running_stats.means.get(label_col) if running_stats.count is not None else None
+    test_scores, betas = label_stats.score(standardize_label=True, fill=None if pd.isna(fill) else fill)
+    rows = [[dataset_name, problem_class, fold + 1, test_scores[fold], betas[fold]] for fold in range(k_folds)]
+    for row in rows:
+        logging.info(f"Dataset {dataset_name}: fold: {row[2]}, score: {row[3]}.")
+
+    # Checksum the parsed bytes and save the new state
+    ends_with_newline = True if state is None else state["ends_with_newline"]
+    with open(preprocessor.dataset_src, "rb") as file:
+        file.seek(offset)
+        remaining = end - offset
+        while remaining:
+            block = file.read(min(remaining, 2 ** 20))
+            digest.update(block)
+            remaining -= len(block)
+            ends_with_newline = block.endswith(b"\n")
+    save_state(state_path, {
+        "version": STATE_VERSION, "key": key, "n_rows": n_rows + len(tail), "offset": end,
+        "checksum": digest.hexdigest(), "ends_with_newline": ends_with_newline,
+        "label_stats": label_stats.to_dict(), "running_stats": running_stats.to_dict(),
+    })
+    return rows
+
+
+def find_tail(dataset_src: Path, state: dict) -> tuple:
+    """
+    Check that a dataset's source still starts with the bytes of the last update.
+    :param dataset_src: Path to the raw dataset file
+    :param state: State saved by update_dataset
+    :return: Tuple of the offset of the appended bytes, or None if the earlier bytes changed, and a running SHA-256
+        digest of the bytes before it
+    A file that did not end with a newline can only be rebuilt, since appending would extend its last row.
+    """
+    digest, offset = hashlib.sha256(), state["offset"]
+    if os.stat(dataset_src).st_size < offset:
+        return None, digest
+    with open(dataset_src, "rb") as file:
+        remaining = offset
+        while remaining:
+            block = file.read(min(remaining, 2 ** 20))
+            digest.update(block)
+            remaining -= len(block)
+        appended = bool(file.read(1))
+    if digest.hexdigest() != state["checksum"] or (appended and not state["ends_with_newline"]):
+        return None, digest
+    return offset, digest
+
+
+def load_state(state_path: Path, key: str) -> t.Union[dict, None]:
+    """
+    Load the state of a dataset.
+    :param state_path: Path of the state file
+    :param key: Key of the current configuration from make_key
+    :return: State dict, or None if there is no state for this configuration
+    """
+    if not state_path.exists():
+        return None
+    with open(state_path) as file:
+        state = json.load(file)
+    return state if state.get("key") == key else None
+
+
+def make_key(dataset_meta: dict, k_folds: int, random_state: int) -> str:
+    """
+    Hash everything the state of a dataset depends on besides its rows.
+    :param dataset_meta: Data catalog entry of the dataset
+    :param k_folds: Number of folds
+    :param random_state: Random number seed
+    :return: Hex digest key
+    """
+    params = {"version": STATE_VERSION, "dataset_meta": dataset_meta, "k_folds": k_folds, "random_state": random_state}
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def save_state(state_path: Path, state: dict):
+    """
+    Save the state of a dataset.
+    :param state_path: Path of the state file
+    :param state: JSON-serializable state
+    """
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Write to a temporary file and rename so that a crash never leaves a partial state
+    with tempfile.NamedTemporaryFile("w", dir=state_path.parent, suffix=".json", delete=False) as file:
+        json.dump(state, file, default=lambda x: x.item())
+    os.replace(file.name, state_path)
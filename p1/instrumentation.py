@@ -0,0 +1,183 @@
+"""Peter Rasmussen, Programming Assignment 1, instrumentation.py
+
+This module measures the wall time, CPU time, rows in and out, and peak memory of pipeline stages.
+
+Each measurement is logged as a JSON line by the p1.instrumentation logger, with the measurement itself attached to
+the log record, so measurements taken in worker processes reach the parent process through its log queue. A
+TimingCollector handler gathers them for timings.csv.
+
+The operating system only reports the peak resident set size of a process over its whole lifetime, so each stage
+records how much that peak rose while it ran: 0 for a stage that stayed below an earlier stage's peak. While
+tracemalloc traces allocations, as in runs with --trace-memory, each stage also records its traced peak above the memory
+allocated when it started, as the benchmarks' StageTimer does. tracemalloc keeps a single peak, so open stages take
+in the peak before any stage resets it; nested and concurrent stages each get their own peak.
+
+"""
+# Standard library imports
+import cProfile
+from contextlib import contextmanager
+import functools
+import json
+import logging
+from pathlib import Path
+import sys
+import threading
+import time
+import tracemalloc
+import typing as t
+
+# Third party imports
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = logging.getLogger("p1.instrumentation")
+
+# Traced peaks of the stages being measured, guarded by a lock because stages run in several threads
+_open_peaks: set = set()
+_peaks_lock = threading.Lock()
+
+
+@contextmanager
+def measure(stage: str, rows_in: int = None, **context) -> t.Iterator[dict]:
+    """
+    Measure the stage run inside the with block and log the measurement.
+    :param stage: Stage name
+    :param rows_in: Number of rows the stage starts with
+    :param context: Other fields of the measurement, e.g. dataset_name and fold
+    :return: Measurement dict; set its rows_out field inside the with block
+    """
+    record = {"stage": stage, **context, "rows_in": rows_in, "rows_out": None}
+    start_peak = get_peak_rss()
+    traced = _start_traced_peak()
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        record["wall_time"] = time.perf_counter() - start_wall
+        record["cpu_time"] = time.process_time() - start_cpu
+        peak = get_peak_rss()
+        record["peak_rss_growth"] = None if peak is None else peak - start_peak
+        record["peak_traced"] = _stop_traced_peak(traced)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps(record, default=str), extra={"timing": record})
+
+
+def instrument(stage: str = None) -> t.Callable:
+    """
+    Decorate a Preprocessor method so that every call is measured.
+    :param stage: Stage name; defaults to the method name
+    :return: Decorator
+    Rows in and out are the number of rows of the preprocessor's data before and after the call.
+    """
+    def decorator(method: t.Callable) -> t.Callable:
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with measure(stage or method.__name__, _count_rows(self), dataset_name=self.dataset_name) as record:
+                result = method(self, *args, **kwargs)
+                record["rows_out"] = _count_rows(self)
+            return result
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profile(dst: t.Union[Path, None]):
+    """
+    Profile the with block with cProfile and dump the statistics, or do nothing if dst is None.
+    :param dst: Path of the .prof file, readable with pstats or snakeviz
+    """
+    if dst is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        Path(dst).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(dst)
+
+
+def get_peak_rss() -> t.Union[int, None]:
+    """
+    Get the peak resident set size of this process so far.
+    :return: Number of bytes, or None where the resource module is unavailable
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class TimingCollector(logging.Handler):
+    """
+    Logging handler that keeps the measurements of measure and instrument.
+    """
+
+    def __init__(self):
+        """
+        Instantiate the TimingCollector object.
+        """
+        super().__init__(logging.DEBUG)
+        self.records: list[dict] = []
+
+    def __repr__(self):
+        return f"TimingCollector({len(self.records)} records)"
+
+    def emit(self, record: logging.LogRecord):
+        timing = getattr(record, "timing", None)
+        if timing is not None:
+            self.records.append(timing)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Gather the measurements into a dataframe.
+        :return: Dataframe with one row per measurement
+        """
+        columns = ["stage", "dataset_name", "fold", "rows_in", "rows_out", "wall_time", "cpu_time", "peak_rss_growth",
+                   "peak_traced"]
+        timings = pd.DataFrame(self.records, columns=columns)
+        return timings.astype({"fold": "Int64", "rows_in": "Int64", "rows_out": "Int64", "peak_rss_growth": "Int64",
+                               "peak_traced": "Int64"})
+
+
+class _TracedPeak:
+    __slots__ = ("start", "peak")
+
+    def __init__(self, start: int):
+        self.start = start
+        self.peak = start
+
+
+def _start_traced_peak() -> t.Union[_TracedPeak, None]:
+    # Hand the peak so far to the open stages, then reset it for the new one
+    if not tracemalloc.is_tracing():
+        return None
+    with _peaks_lock:
+        current, peak = tracemalloc.get_traced_memory()
+        for traced in _open_peaks:
+            traced.peak = max(traced.peak, peak)
+        tracemalloc.reset_peak()
+        traced = _TracedPeak(current)
+        _open_peaks.add(traced)
+    return traced
+
+
+def _stop_traced_peak(traced: t.Union[_TracedPeak, None]) -> t.Union[int, None]:
+    if traced is None:
+        return None
+    with _peaks_lock:
+        _open_peaks.discard(traced)
+        if not tracemalloc.is_tracing():
+            return None
+        return max(traced.peak, tracemalloc.get_traced_memory()[1]) - traced.start
+
+
+def _count_rows(preprocessor) -> t.Union[int, None]:
+    data = getattr(preprocessor, "data", None)
+    return None if data is None else len(data)
@@ -0,0 +1,45 @@
+"""Peter Rasmussen, Programming Assignment 1, prefetch.py
+
+This module overlaps the I/O of upcoming datasets with the compute of the current one.
+
+The prefetch generator runs a loading function on the next items of a sequence in a thread pool while the consumer
+works on the current result. Parsing CSVs and reading .npy files release the GIL, so threads are enough to overlap
+them with training and scoring. At most depth items are in flight, which bounds the number of datasets in memory.
+
+"""
+# Standard library imports
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import typing as t
+
+
+def prefetch(func: t.Callable, items: t.Iterable[tuple], depth: int = 2) -> t.Iterator[tuple]:
+    """
+    Call a function on each item ahead of the consumer.
+    :param func: Function called with the elements of an item as positional arguments
+    :param items: Argument tuples
+    :param depth: Number of items loaded ahead of the one the consumer holds; 0 to call func inline
+    :return: Iterator of (item, result) tuples in the order of items
+    An exception raised by func is raised when the consumer reaches its item.
+    """
+    if depth < 1:
+        for item in items:
+            yield item, func(*item)
+        return
+
+    items = iter(items)
+    with ThreadPoolExecutor(depth, thread_name_prefix="prefetch") as executor:
+        in_flight: t.Deque[t.Tuple[tuple, Future]] = deque()
+
+        def submit_next():
+            item = next(items, None)
+            if item is not None:
+                in_flight.append((item, executor.submit(func, *item)))
+
+        for _ in range(depth):
+            submit_next()
+        while in_flight:
+            item, future = in_flight.popleft()
+            result = future.result()
+            submit_next()
+            yield item, result
@@ -1,3 +1,10 @@
 from p1.preprocessing.preprocessor import Preprocessor
+from p1.preprocessing.cache import PreprocessingCache
+from p1.preprocessing.store import ColumnStore
+from p1.preprocessing.encoding import CategoricalCodes
+from p1.preprocessing.folds import FoldMatrix
+from p1.preprocessing.pipeline import PreprocessingPipeline
 from p1.preprocessing.standardization import get_standardization_cols, get_standardization_params, standardize
-from p1.preprocessing.split import split_train_val
\ No newline at end of file
+from p1.preprocessing.split import (FOLD_ASSIGNMENTS, assign_hash_splits, hash_rows, split_train_val,
+                                   split_train_val_hashed, split_train_val_indices)
+from p1.preprocessing.streaming import RunningStats
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Peter Rasmussen, Programming Assignment 1, cache.py
+
+This module provides the PreprocessingCache class, a content-addressed on-disk cache of fully preprocessed datasets.
+
+Each entry is an uncompressed .npz archive holding one .npy array per column plus the index, and a JSON sidecar with
+column order, dtypes, and run metadata. String and category columns are stored as integer codes, -1 where missing,
+with their levels in the sidecar. Entries are keyed by a hash of everything the preprocessing depends on, including
+the source of the preprocessing code, and are evicted least-recently-used first once the cache exceeds its size bound.
+
+"""
+# Standard library imports
+import functools
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+
+# Third party libraries
+import numpy as np
+import pandas as pd
+
+# Bump whenever the entry format changes; changes to the preprocessing code are caught by the source hash of make_key
+CACHE_VERSION = 3
+
+# Modules whose source the preprocessed datasets depend on
+SOURCE_FILES = (*sorted(Path(__file__).parent.glob("*.py")), Path(__file__).parents[1] / "run.py")
+
+
+class PreprocessingCache:
+    """
+    Store and retrieve preprocessed dataframes keyed by source data and preprocessing parameters.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = 2 ** 30):
+        """
+        Instantiate the PreprocessingCache object.
+        :param cache_dir: Directory that holds cache entries
+        :param max_bytes: Total size above which least-recently-used entries are evicted
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self):
+        return f"PreprocessingCache({self.cache_dir}, max_bytes={self.max_bytes})"
+
+    @staticmethod
+    def make_key(dataset_src: Path, dataset_meta: dict, discretize_dict: dict, random_state: int,
+                 k_folds: int, **options) -> str:
+        """
+        Hash everything a preprocessed dataset depends on into a cache key.
+        :param dataset_src: Path to the raw dataset file
+        :param dataset_meta: Data catalog entry of the dataset, including its names_meta
+        :param discretize_dict: Discretization parameters of the dataset
+        :param random_state: Random number seed used to shuffle the data
+        :param k_folds: Number of folds
+        :param options: Any other JSON-serializable preprocessing options
+        :return: Hex digest key
+        The key also hashes the source of the preprocessing modules, so that editing them invalidates old entries.
+        """
+        digest = hashlib.sha256()
+        with open(dataset_src, "rb") as file:
+            for block in iter(lambda: file.read(2 ** 20), b""):
+                digest.update(block)
+        params = {
+            "version": CACHE_VERSION,
+            "source": _source_digest(),
+            "dataset_meta": dataset_meta,
+            "discretize_dict": discretize_dict,
+            "random_state": random_state,
+            "k_folds": k_folds,
+            "options": options,
+        }
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def load(self, key: str) -> tuple:
+        """
+        Load a cached dataframe and its metadata.
+        :param key: Cache key from make_key
+        :return: Tuple of dataframe and metadata dict, or (None, None) on a cache miss
+        """
+        data_path, meta_path = self._paths(key)
+        if not (data_path.exists() and meta_path.exists()):
+            return None, None
+        with open(meta_path) as file:
+            meta = json.load(file)
+        with np.load(data_path, allow_pickle=False) as arrays:
+            columns = {}
+            for i, (col, dtype, levels) in enumerate(zip(meta["columns"], meta["dtypes"], meta["levels"])):
+                values = arrays[f"col{i}"]
+                if levels is None:
+                    columns[col] = values
+                elif dtype == "category":
+                    columns[col] = pd.Categorical.from_codes(values, levels)
+                else:
+                    # Missing values have code -1, which takes the trailing NaN
+                    columns[col] = np.array([*levels, np.nan], dtype=object)[values]
+            index = pd.Index(arrays["index"], name=meta["index_name"])
+        data = pd.DataFrame(columns, index=index)
+        for col, dtype in zip(meta["columns"], meta["dtypes"]):
+            if str(data[col].dtype) != dtype:
+                data[col] = data[col].astype(dtype)
+
+        # Mark the entry as recently used
+        os.utime(data_path)
+        logging.debug(f"Cache hit {key[:12]}.")
+        return data, meta["meta"]
+
+    def save(self, key: str, data: pd.DataFrame, meta: dict = None):
+        """
+        Save a dataframe and its metadata, then evict old entries if the cache is over its size bound.
+        :param key: Cache key from make_key
+        :param data: Preprocessed dataframe
+        :param meta: JSON-serializable metadata stored alongside the data
+        """
+        data_path, meta_path = self._paths(key)
+        arrays = {"index": data.index.to_numpy()}
+        dtypes, all_levels = [], []
+        for i, col in enumerate(data.columns):
+            series = data[col]
+            levels = None
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values, levels = series.cat.codes.to_numpy(), series.cat.categories.tolist()
+            elif series.dtype == object or pd.api.types.is_string_dtype(series):
+                codes, levels = pd.factorize(series, use_na_sentinel=True)
+                values = codes.astype(np.promote_types(np.min_scalar_type(len(levels)), np.int8))
+                levels = levels.tolist()
+            else:
+                values = series.to_numpy()
+            dtypes.append(str(series.dtype))
+            all_levels.append(levels)
+            arrays[f"col{i}"] = values
+        sidecar = {"columns": data.columns.tolist(), "dtypes": dtypes, "levels": all_levels,
+                   "index_name": data.index.name, "meta": meta or {}}
+
+        # Write to temporary files and rename so concurrent readers never see partial entries
+        with tempfile.NamedTemporaryFile(dir=self.cache_dir, suffix=".npz", delete=False) as file:
+            np.savez(file, **arrays)
+        os.replace(file.name, data_path)
+        with tempfile.NamedTemporaryFile("w", dir=self.cache_dir, suffix=".json", delete=False) as file:
+            json.dump(sidecar, file)
+        os.replace(file.name, meta_path)
+        logging.debug(f"Cache save {key[:12]}.")
+        self.evict()
+
+    def evict(self):
+        """
+        Delete least-recently-used entries until the cache is within its size bound.
+        """
+        entries = []
+        for path in self.cache_dir.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # Evicted by another process
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        while entries and total > self.max_bytes:
+            _, size, path = entries.pop(0)
+            total -= size
+            path.unlink(missing_ok=True)
+            path.with_suffix(".json").unlink(missing_ok=True)
+            logging.debug(f"Cache evict {path.stem[:12]}.")
+
+    def _paths(self, key: str) -> tuple:
+        return self.cache_dir / f"{key}.npz", self.cache_dir / f"{key}.json"
+
+
+@functools.lru_cache(maxsize=None)
+def _source_digest() -> str:
+    digest = hashlib.sha256()
+    for path in SOURCE_FILES:
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Peter Rasmussen, Programming Assignment 1, discretization.py
+
+This module provides functions to learn the bin edges of several columns at once and to apply them to any batch.
+
+Columns that share a binning strategy, number of bins, and dtype are fit together on one 2-D array: equal-width edges
+from the column minima and maxima, and equal-frequency edges by selecting the values at each bin end with
+np.partition, which is O(n) rather than a sort. Jenks edges come from compute_jenks_breaks. Applying edges is a
+np.searchsorted per column, O(n log b), so fitted edges can be reused on new data.
+
+"""
+# Standard library imports
+from collections import defaultdict
+
+# Third party libraries
+import numpy as np
+import pandas as pd
+
+# Local imports
+from p1.preprocessing.jenks import compute_jenks_breaks
+
+# Side passed to np.searchsorted: equal-width and equal-frequency bins are closed on the right, like pd.cut, and
+# equal-frequency edges are the last value of each bin; Jenks edges are the first value of the bin to their right
+BIN_SIDES = {"equal_width": "left", "equal_frequency": "left", "jenks": "right"}
+
+
+def fit_bins(data: pd.DataFrame, discretize_dict: dict) -> dict:
+    """
+    Learn the bin edges of each indicated column.
+    :param data: Dataframe holding the columns
+    :param discretize_dict: Dictionary keyed by column of n_bins and binning ('equal_width', 'equal_frequency', or
+        'jenks')
+    :return: Dictionary keyed by column of inner edges, searchsorted side, and retbins (the edges with the column
+        minimum and maximum)
+    Equal-frequency edges are the values that end each bin of a positional split of the sorted values, so tied values
+    always share a bin: a run of ties that straddles a bin boundary falls into the bin where the run starts.
+    """
+    # Group columns whose edges can be computed in one pass
+    groups = defaultdict(list)
+    for col, bin_dict in discretize_dict.items():
+        if bin_dict["binning"] not in BIN_SIDES:
+            raise ValueError(f"{bin_dict['binning']} binning is not supported / unknown to this implementation.")
+        groups[(bin_dict["binning"], bin_dict["n_bins"], data[col].dtype)].append(col)
+
+    bins = {}
+    for (binning, n_bins, _), cols in groups.items():
+        values = _to_block(data[cols])
+        mins, maxs = np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+        if binning == "equal_width":
+            increments = (maxs - mins) / n_bins
+            steps = np.arange(n_bins + 1).astype(increments.dtype)
+            retbins = mins + steps[:, None] * increments
+            inner = retbins[1:-1]
+        elif binning == "equal_frequency":
+            n = len(values)
+            ends = np.clip(np.ceil(np.arange(1, n_bins) * (n / n_bins)).astype(int) - 1, 0, max(n - 1, 0))
+            inner = np.partition(values, ends, axis=0)[ends]
+            retbins = np.vstack([mins, inner, maxs])
+        else:
+            inner = np.array([compute_jenks_breaks(values[:, j], n_bins)["break_value"] for j in range(len(cols))]).T
+            retbins = np.vstack([mins, inner, maxs])
+        for j, col in enumerate(cols):
+            bins[col] = {"edges": inner[:, j], "side": BIN_SIDES[binning], "retbins": retbins[:, j]}
+
+    # Keep the order of discretize_dict
+    return {col: bins[col] for col in discretize_dict}
+
+
+def apply_bins(data: pd.DataFrame, bins: dict) -> pd.DataFrame:
+    """
+    Assign the values of each binned column to bins.
+    :param data: Dataframe holding the columns
+    :param bins: Dictionary keyed by column of edges and side, as returned by fit_bins
+    :return: Dataframe of integer bin codes, one column per binned column
+    Values below the first edge or above the last fall into the first or last bin.
+    """
+    codes = {}
+    for col, col_bins in bins.items():
+        edges = np.asarray(col_bins["edges"], dtype=float)
+        dtype = np.int8 if len(edges) < np.iinfo(np.int8).max else np.int32
+        codes[col] = np.searchsorted(edges, data[col].to_numpy(dtype=float), side=col_bins["side"]).astype(dtype)
+    return pd.DataFrame(codes, index=data.index, columns=list(bins))
+
+
+def _to_block(data: pd.DataFrame) -> np.ndarray:
+    # One 2-D array in the columns' own NumPy dtype, so that edges are computed in that precision
+    dtype = data.dtypes.iloc[0]
+    if isinstance(dtype, np.dtype) and dtype.kind in "iuf":
+        return data.to_numpy(dtype=dtype)
+    return data.to_numpy(dtype=float, na_value=np.nan)
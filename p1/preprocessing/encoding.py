@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Peter Rasmussen, Programming Assignment 1, encoding.py
+
+This module provides the CategoricalCodes class, a one-hot encoding kept as one integer code column per categorical
+column plus a dictionary of each column's levels.
+
+Its memory scales with rows times categorical columns rather than rows times levels. Indicator columns are only
+materialized on request, as the same Boolean columns pd.get_dummies makes or as a SciPy sparse CSR matrix.
+
+"""
+# Third party libraries
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy import sparse
+except ImportError:  # SciPy is only needed for CSR output
+    sparse = None
+
+
+class CategoricalCodes:
+    """
+    Hold categorical columns as integer codes, -1 where missing, and the levels each code stands for.
+    """
+
+    def __init__(self, codes: pd.DataFrame, levels: dict):
+        """
+        Instantiate the CategoricalCodes object.
+        :param codes: Dataframe of integer codes, one column per categorical column
+        :param levels: Levels of each categorical column, in code order
+        """
+        self.codes = codes
+        self.levels = levels
+
+    def __repr__(self):
+        return f"CategoricalCodes({len(self.codes)} rows, {len(self.levels)} columns, {self.n_indicators} indicators)"
+
+    @classmethod
+    def from_frame(cls, data: pd.DataFrame, columns: list) -> "CategoricalCodes":
+        """
+        Encode categorical columns of a dataframe.
+        :param data: Dataframe that holds the columns
+        :param columns: Categorical columns to encode
+        :return: CategoricalCodes whose levels follow the column order pd.get_dummies would give
+        """
+        codes, levels = {}, {}
+        for col in columns:
+            categorical = pd.Categorical(data[col])
+            codes[col] = categorical.codes
+            levels[col] = categorical.categories.tolist()
+        return cls(pd.DataFrame(codes, index=data.index, columns=list(columns)), levels)
+
+    @property
+    def indicator_names(self) -> list:
+        """
+        Names of the indicator columns, as pd.get_dummies names them.
+        :return: List of column names
+        """
+        return [f"{col}_{level}" for col, levels in self.levels.items() for level in levels]
+
+    @property
+    def n_indicators(self) -> int:
+        """
+        Number of indicator columns.
+        :return: Total number of levels
+        """
+        return sum(len(levels) for levels in self.levels.values())
+
+    def take(self, rows: np.ndarray) -> "CategoricalCodes":
+        """
+        Gather rows by position.
+        :param rows: Row positions
+        :return: CategoricalCodes of the rows, sharing the same levels
+        """
+        return CategoricalCodes(self.codes.iloc[rows], self.levels)
+
+    def to_dense(self) -> pd.DataFrame:
+        """
+        Materialize the indicator columns.
+        :return: Boolean dataframe equal to the indicator columns pd.get_dummies makes
+        """
+        rows, cols = self._nonzero()
+        values = np.zeros((len(self.codes), self.n_indicators), dtype=bool)
+        values[rows, cols] = True
+        return pd.DataFrame(values, index=self.codes.index, columns=self.indicator_names)
+
+    def to_csr(self, dtype: type = np.float32):
+        """
+        Materialize the indicator columns as a sparse matrix.
+        :param dtype: Data type of the stored ones
+        :return: SciPy CSR matrix with one row per observation and one column per indicator
+        """
+        if sparse is None:
+            raise ImportError("SciPy is required for sparse indicator matrices; use to_dense instead.")
+        rows, cols = self._nonzero()
+        values = np.ones(len(rows), dtype=dtype)
+        return sparse.csr_matrix((values, (rows, cols)), shape=(len(self.codes), self.n_indicators))
+
+    def _nonzero(self) -> tuple:
+        # Row and indicator column positions of every one, column by column
+        offsets = np.cumsum([0] + [len(levels) for levels in self.levels.values()])[:-1]
+        codes = self.codes.to_numpy(dtype=np.int64) + offsets
+        present = self.codes.to_numpy() >= 0
+        rows = np.broadcast_to(np.arange(len(codes))[:, None], codes.shape)
+        return rows[present], codes[present]
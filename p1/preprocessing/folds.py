@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Peter Rasmussen, Programming Assignment 1, folds.py
+
+This module provides the FoldMatrix class, which executes K-fold splits on integer index arrays into a single
+contiguous feature matrix rather than on copies of the full dataframe. Category features are kept as integer codes and
+only expanded to indicator columns for the rows of a split.
+
+"""
+# Third party libraries
+import numpy as np
+import pandas as pd
+
+# Local imports
+from p1.preprocessing.encoding import CategoricalCodes
+
+
+class FoldMatrix:
+    """
+    Hold the features of a preprocessed dataset as one contiguous matrix and its folds as index arrays.
+    """
+
+    def __init__(self, data: pd.DataFrame, feature_cols: list, label_col: str, k_folds: int, fold_col: str = "fold",
+                 problem_class: str = None, fold_assignment: str = "shuffle"):
+        """
+        Instantiate the FoldMatrix object.
+        :param data: Preprocessed dataframe that includes a fold column
+        :param feature_cols: List of feature columns; category columns, as Preprocessor.dummy(encoding='codes') leaves
+            them, are held as codes and become indicator columns named as pd.get_dummies names them
+        :param label_col: Label column
+        :param k_folds: Number of folds the data is partitioned into
+        :param fold_col: Column holding the 1-indexed fold of each observation
+        :param problem_class: 'classification' or 'regression'
+        :param fold_assignment: How folds were assigned: 'shuffle', or 'hash' or 'hash_stratified', in which case data
+            also includes the row_hash column of Preprocessor.make_hash_folds and train-validation sets are split by
+            hash too
+        """
+        self.problem_class = problem_class
+        self.label_col = label_col
+        self.k_folds = k_folds
+        self.index = data.index
+        self.fold_assignment = fold_assignment
+        self.hashes = data["row_hash"].to_numpy() if fold_assignment != "shuffle" else None
+
+        # One contiguous float32 copy of the other features, followed by the indicators of the category features;
+        # every fold gathers rows from it
+        categorical = [x for x in feature_cols if isinstance(data[x].dtype, pd.CategoricalDtype)]
+        self.codes = CategoricalCodes.from_frame(data, categorical) if categorical else None
+        self.numeric_cols = [x for x in feature_cols if x not in categorical]
+        self.feature_cols = self.numeric_cols + (self.codes.indicator_names if categorical else [])
+        self.X = np.ascontiguousarray(data[self.numeric_cols].to_numpy(dtype=np.float32))
+        self.y = data[label_col].to_numpy()
+        self.label_pos = self.feature_cols.index(label_col) if label_col in self.feature_cols else None
+
+        # Compute fold membership once
+        self.folds = folds = data[fold_col].to_numpy()
+        self.test_indices = [np.flatnonzero(folds == fold) for fold in range(1, k_folds + 1)]
+        self.train_val_indices = [np.flatnonzero(folds != fold) for fold in range(1, k_folds + 1)]
+
+        # Per-fold sufficient statistics in one pass over the rows: column minima and maxima, counts, and sums and
+        # sums of squares of deviations from the overall column means, which keeps the subtraction below accurate.
+        # A train-validation set's statistics are then those of the whole dataset less those of its test fold. The
+        # label's statistics come from its own values rather than their float32 copy.
+        self.center = self.X.mean(axis=0, dtype=np.float64)
+        if self.label_pos is not None:
+            self.center[self.label_pos] = self.y.mean(dtype=np.float64)
+        n_features = len(self.numeric_cols)
+        self.fold_counts = np.array([len(rows) for rows in self.test_indices])
+        self.fold_mins = np.empty((k_folds, n_features), dtype=self.X.dtype)
+        self.fold_maxs = np.empty((k_folds, n_features), dtype=self.X.dtype)
+        self.fold_sums = np.zeros((k_folds, n_features))
+        self.fold_sumsqs = np.zeros((k_folds, n_features))
+        for i, rows in enumerate(self.test_indices):
+            if not len(rows):
+                self.fold_mins[i], self.fold_maxs[i] = np.inf, -np.inf
+                continue
+            block = self.X[rows]
+            self.fold_mins[i], self.fold_maxs[i] = block.min(axis=0), block.max(axis=0)
+            deviations = block - self.center
+            if self.label_pos is not None:
+                deviations[:, self.label_pos] = self.y[rows] - self.center[self.label_pos]
+            self.fold_sums[i] = deviations.sum(axis=0)
+            self.fold_sumsqs[i] = np.einsum("ij,ij->j", deviations, deviations)
+
+        # Standardization parameters of each fold, computed on first use
+        self.standardization_params: dict = {}
+
+    def __repr__(self):
+        return f"FoldMatrix({self.X.shape[0]} rows, {len(self.feature_cols)} features, {self.k_folds} folds)"
+
+    def split(self, fold: int) -> tuple:
+        """
+        Get the test and train-validation row positions of a fold.
+        :param fold: 1-indexed fold
+        :return: Tuple of test positions and train-validation positions
+        """
+        return self.test_indices[fold - 1], self.train_val_indices[fold - 1]
+
+    def get_standardization_params(self, fold: int) -> tuple:
+        """
+        Get per-column shifts and scales that standardize every non-Boolean feature of a fold.
+        :param fold: 1-indexed fold; Boolean columns, means, and standard deviations come from its train-validation set
+        :return: Tuple of float64 shift and scale arrays; Boolean columns get a shift of 0 and a scale of 1
+        Means and sample standard deviations are derived from the per-fold sums in O(k_folds * n_features), so the
+        test fold never leaks into its own standardization. Indicators of category features are Boolean by
+        construction and skipped without a scan.
+        """
+        if fold not in self.standardization_params:
+            i = fold - 1
+            other = np.arange(self.k_folds) != i
+
+            # Exclude Boolean columns from standardization
+            boolean = (self.fold_mins[other].min(axis=0) == 0) & (self.fold_maxs[other].max(axis=0) == 1)
+
+            # Train-validation moments by subtraction of the test fold
+            count = self.fold_counts.sum() - self.fold_counts[i]
+            sums = self.fold_sums.sum(axis=0) - self.fold_sums[i]
+            sumsqs = self.fold_sumsqs.sum(axis=0) - self.fold_sumsqs[i]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                means = self.center + sums / count
+                std_devs = np.sqrt(np.maximum(sumsqs - sums ** 2 / count, 0) / (count - 1))
+
+            n_indicators = len(self.feature_cols) - len(self.numeric_cols)
+            shifts = np.concatenate([np.where(boolean, 0.0, means), np.zeros(n_indicators)])
+            scales = np.concatenate([np.where(boolean, 1.0, std_devs), np.ones(n_indicators)])
+            self.standardization_params[fold] = shifts, scales
+        return self.standardization_params[fold]
+
+    def features(self, rows: np.ndarray, shifts: np.ndarray, scales: np.ndarray) -> pd.DataFrame:
+        """
+        Gather and standardize the feature rows of a split.
+        :param rows: Row positions to gather
+        :param shifts: Per-column shifts from get_standardization_params
+        :param scales: Per-column scales from get_standardization_params
+        :return: Dataframe view over the standardized feature matrix of the split, followed by the Boolean indicator
+            columns of any category features
+        """
+        n_numeric = len(self.numeric_cols)
+        values = self.X.take(rows, axis=0)
+        values -= shifts[:n_numeric].astype(values.dtype)
+
+        # A constant column divides by a zero scale, which pandas standardization does silently too
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values /= scales[:n_numeric].astype(values.dtype)
+        features = pd.DataFrame(values, index=self.index[rows], columns=self.numeric_cols, copy=False)
+        if self.codes is not None:
+            features = pd.concat([features, self.codes.take(rows).to_dense()], axis=1)
+        return features
+
+    def labels(self, rows: np.ndarray, shifts: np.ndarray, scales: np.ndarray) -> pd.Series:
+        """
+        Gather the label values of a split, standardized if the label is a standardized feature.
+        :param rows: Row positions to gather
+        :param shifts: Per-column shifts from get_standardization_params
+        :param scales: Per-column scales from get_standardization_params
+        :return: Label series of the split
+        """
+        pos = self.label_pos
+        if pos is not None and (shifts[pos] != 0 or scales[pos] != 1):
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values = (self.y.take(rows) - shifts[pos]) / scales[pos]
+        else:
+            values = self.y.take(rows)
+        return pd.Series(values, index=self.index[rows], name=self.label_col)
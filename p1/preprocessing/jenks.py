@@ -3,12 +3,17 @@
 
 This module provides functions to split data using Jenks natural breaks method.
 
+Both the two-class and the k-class implementations work on sorted prefix sums of the (mean-centered) values so that
+the sum of squared deviations of any contiguous class is an O(1) lookup. The two-class break is then a single
+vectorized O(n) scan after sorting, and the k-class break is Fisher's dynamic program, with each DP layer solved by
+a divide-and-conquer optimization that is vectorized one recursion level at a time.
+
 """
 # Standard library imports
 import typing as t
 
 # Third party libraries
-import pandas as pd
+import numpy as np
 
 
 def compute_gcvf(sdam: float, scdm: float) -> float:
@@ -24,7 +29,7 @@ def compute_gcvf(sdam: float, scdm: float) -> float:
     return (sdam - scdm) / sdam
 
 
-def compute_sdam(values: list, mean: t.Union[int, float] = None):
+def compute_sdam(values: t.Union[list, np.ndarray], mean: t.Union[int, float] = None) -> float:
     """
     Compute the sum of squared deviations for array mean.
     :param values: List of values
@@ -33,41 +38,164 @@ def compute_sdam(values: list, mean: t.Union[int, float] = None):
         https://arxiv.org/abs/2005.01653
         https://medium.com/analytics-vidhya/jenks-natural-breaks-best-range-finder-algorithm-8d1907192051
     """
+    values = np.asarray(values, dtype=float)
+
     # Compute mean if not provided
     if mean is None:
-        mean = sum(values) / len(values)
-    return sum([(x - mean) ** 2 for x in values])
+        mean = values.mean()
+    return float(np.sum((values - mean) ** 2))
 
 
-def compute_two_break_jenks(values: list[int, float]) -> dict:
+def compute_two_break_jenks(values: t.Union[list, np.ndarray]) -> dict:
     """
     Compute two-class Jenks break for a vector of numeric values.
     :param values: List of numeric values
     :return: Dictionary keyed by break value and goodness of variance fit (GCVF)
+    The break value is the first (smallest) value of the upper class.
     Sources:
         https://arxiv.org/abs/2005.01653
         https://medium.com/analytics-vidhya/jenks-natural-breaks-best-range-finder-algorithm-8d1907192051
     """
     # Make sure values are sorted
-    values = sorted(values)
+    values = np.sort(np.asarray(values))
+    n = len(values)
+    if n < 3:
+        raise ValueError("At least three values are required to compute a two-class Jenks break.")
+
+    # Prefix sums of the centered values and of their squares
+    sums, squares = _prefix_sums(values)
 
     # Compute sum of squared deviations for dataset mean (SDAM)
-    sdam = compute_sdam(values)
-    scdm_li = []
-    for index in range(1, len(values) - 1):
-        # Compute sum of squared deviations for class means (SCDM)
-        left_cut = values[:index]
-        right_cut = values[index:]
-        scdm = compute_sdam(left_cut) + compute_sdam(right_cut)
-        scdm_li.append([index, scdm])
+    sdam = squares[-1] - sums[-1] ** 2 / n
+
+    # Compute sum of squared deviations for class means (SCDM) of every candidate cut at once
+    index = np.arange(1, n - 1)
+    left_scdm = squares[index] - sums[index] ** 2 / index
+    right_scdm = (squares[-1] - squares[index]) - (sums[-1] - sums[index]) ** 2 / (n - index)
+    scdm = left_scdm + right_scdm
 
     # Select index and scdm corresponding to minimum scdm
-    cols = ["index", "scdm"]
-    selected = pd.DataFrame(scdm_li, columns=cols).set_index("index").sort_values(by="scdm").iloc[0, :]
-    selected_index, selected_scdm = selected.name, selected["scdm"]
-    break_value = values[selected_index]
+    selected = int(np.argmin(scdm))
+    break_value = values[index[selected]].item()
 
     # Compute goodness of class variance fit (GCVF)
-    gcvf = compute_gcvf(sdam, selected_scdm)
+    gcvf = compute_gcvf(sdam, scdm[selected])
+
+    return {"break_value": break_value, "gcvf": gcvf}
+
+
+def compute_jenks_breaks(values: t.Union[list, np.ndarray], n_classes: int) -> dict:
+    """
+    Compute k-class Jenks natural breaks for a vector of numeric values using Fisher's dynamic program.
+    :param values: List of numeric values
+    :param n_classes: Number of classes to split the values into
+    :return: Dictionary keyed by break values (list of length n_classes - 1) and goodness of variance fit (GCVF)
+    Classes are formed over the distinct values, weighted by their counts, so tied values are never split across
+    classes. Each break value is the first (smallest) value of the class to its right.
+    Sources:
+        https://arxiv.org/abs/2005.01653
+        Fisher, W. D. (1958). On grouping for maximum homogeneity. JASA, 53(284), 789-798.
+    """
+    if not isinstance(n_classes, (int, np.integer)) or n_classes < 2:
+        raise ValueError("n_classes must be an integer greater than 1.")
+
+    # Collapse the values into sorted distinct values and their counts
+    uniques, counts = np.unique(np.asarray(values), return_counts=True)
+    n_uniques = len(uniques)
+    if n_uniques < n_classes:
+        raise ValueError(f"Cannot split {n_uniques} distinct values into {n_classes} classes.")
+
+    # Weighted prefix sums so that the SSD of distinct values [m, i) is an O(1) lookup
+    weights = np.concatenate([[0], np.cumsum(counts)]).astype(float)
+    sums, squares = _prefix_sums(uniques, counts)
+
+    def cost(m: np.ndarray, i: np.ndarray) -> np.ndarray:
+        return (squares[i] - squares[m]) - (sums[i] - sums[m]) ** 2 / (weights[i] - weights[m])
+
+    # Layer 1: a single class covering the first i distinct values
+    ends = np.arange(n_uniques + 1)
+    ssd = np.full(n_uniques + 1, np.inf)
+    ssd[1:] = cost(np.zeros(n_uniques, dtype=int), ends[1:])
+    starts = [np.zeros(n_uniques + 1, dtype=int)]
+
+    # Layers 2..k: add one class at a time
+    for n_class in range(2, n_classes + 1):
+        ssd, start = _solve_jenks_layer(ssd, cost, n_uniques, n_class)
+        starts.append(start)
+
+    # Backtrack the class starts, which are the breaks
+    breaks = []
+    end = n_uniques
+    for start in reversed(starts[1:]):
+        end = start[end]
+        breaks.append(end)
+    break_values = uniques[np.array(breaks[::-1])].tolist()
+
+    # Compute goodness of class variance fit (GCVF)
+    sdam = cost(np.array([0]), np.array([n_uniques]))[0]
+    gcvf = compute_gcvf(sdam, ssd[n_uniques])
+
+    return {"break_value": break_values, "gcvf": gcvf}
+
+
+def _prefix_sums(values: np.ndarray, counts: np.ndarray = None) -> tuple:
+    """
+    Compute zero-padded prefix sums of centered values and of their squares.
+    :param values: Sorted values
+    :param counts: Optional weight of each value
+    :return: Tuple of sums and squared sums, each of length len(values) + 1
+    Centering on the (weighted) mean keeps the sum-of-squares identity numerically stable.
+    """
+    values = np.asarray(values, dtype=float)
+    counts = np.ones(len(values)) if counts is None else np.asarray(counts, dtype=float)
+    centered = values - np.sum(values * counts) / np.sum(counts)
+    sums = np.concatenate([[0.0], np.cumsum(centered * counts)])
+    squares = np.concatenate([[0.0], np.cumsum(centered ** 2 * counts)])
+    return sums, squares
+
+
+def _solve_jenks_layer(prev: np.ndarray, cost: t.Callable, n: int, n_class: int) -> tuple:
+    """
+    Solve one layer of Fisher's dynamic program: best SSD of the first i values split into n_class classes.
+    :param prev: Best SSD of the first i values split into n_class - 1 classes
+    :param cost: Function returning the SSD of values [m, i) for arrays m and i
+    :param n: Number of values
+    :param n_class: Number of classes of this layer
+    :return: Tuple of best SSD and start index of the last class, each of length n + 1
+    The optimal start of the last class is monotone in i, so the layer is solved by divide and conquer. All
+    sub-problems of one recursion level are evaluated together, giving O(n log n) work in O(log n) vectorized steps.
+    """
+    best = np.full(n + 1, np.inf)
+    start = np.zeros(n + 1, dtype=int)
+
+    # Each sub-problem: solve ends in [lo, hi] given the optimal start lies in [opt_lo, opt_hi]
+    lo, hi = np.array([n_class]), np.array([n])
+    opt_lo, opt_hi = np.array([n_class - 1]), np.array([n - 1])
+    while len(lo):
+        mid = (lo + hi) // 2
+        cand_hi = np.minimum(mid - 1, opt_hi)
+        lengths = cand_hi - opt_lo + 1
+
+        # Flatten every candidate start of every sub-problem into one vector
+        offsets = np.cumsum(lengths) - lengths
+        segment = np.repeat(np.arange(len(mid)), lengths)
+        m = np.repeat(opt_lo - offsets, lengths) + np.arange(lengths.sum())
+        values = prev[m] + cost(m, mid[segment])
+
+        # Minimum of each sub-problem and the first candidate that attains it
+        minima = np.minimum.reduceat(values, offsets)
+        hits = np.flatnonzero(values == minima[segment])
+        _, first = np.unique(segment[hits], return_index=True)
+        argmin = m[hits[first]]
+        best[mid], start[mid] = minima, argmin
+
+        # Split each sub-problem around its midpoint
+        left, right = lo <= mid - 1, mid + 1 <= hi
+        lo, hi, opt_lo, opt_hi = (
+            np.concatenate([lo[left], (mid + 1)[right]]),
+            np.concatenate([(mid - 1)[left], hi[right]]),
+            np.concatenate([opt_lo[left], argmin[right]]),
+            np.concatenate([argmin[left], opt_hi[right]]),
+        )
 
-    return {"break_value": break_value, "gcvf": gcvf}
\ No newline at end of file
+    return best, start
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""Peter Rasmussen, Programming Assignment 1, pipeline.py
+
+This module provides the PreprocessingPipeline class, which fits the Preprocessor steps once on training data, keeps
+their learned parameters, and applies them to new batches or single records.
+
+"""
+# Standard library imports
+import json
+from pathlib import Path
+import typing as t
+
+# Third party libraries
+import numpy as np
+import pandas as pd
+
+# Local imports
+from p1.preprocessing.discretization import apply_bins, fit_bins
+from p1.preprocessing.preprocessor import Preprocessor
+from p1.preprocessing.standardization import get_standardization_cols, get_standardization_params, standardize
+
+
+class PreprocessingPipeline:
+    """
+    Fit and apply replace, log transform, impute, dummy, discretize, and standardize steps of a catalog dataset.
+    """
+
+    def __init__(self, dataset_meta: dict, discretize_dict: dict = None, standardize: bool = True):
+        """
+        Instantiate the PreprocessingPipeline object.
+        :param dataset_meta: Data catalog entry of the dataset
+        :param discretize_dict: Discretization parameters of the dataset, as in discretize.json
+        :param standardize: True to standardize non-Boolean feature columns
+        """
+        self.dataset_meta = dataset_meta
+        self.discretize_dict = discretize_dict or {}
+        self.standardize = standardize
+        self.names_meta = pd.DataFrame(dataset_meta["names_meta"]).set_index("name")
+        self.params: t.Union[dict, None] = None
+
+    def __repr__(self):
+        status = "fitted" if self.params is not None else "unfitted"
+        return f"PreprocessingPipeline({status}, {len(self.names_meta)} columns)"
+
+    def fit(self, data: pd.DataFrame) -> "PreprocessingPipeline":
+        """
+        Learn every preprocessing parameter from training data.
+        :param data: Raw training data, as returned by Preprocessor.load
+        :return: Fitted pipeline
+        """
+        names_meta = self.names_meta
+        mask = names_meta["log_transform"]
+        params = {
+            "dtypes": Preprocessor.make_dtypes(names_meta["data_type"].to_dict()),
+            "replace": names_meta["replace"].dropna().to_dict(),
+            "log_transform": names_meta["log_transform"][mask].index.tolist(),
+            "label": names_meta[names_meta["label"]].index.values[0],
+        }
+        data = self._coerce(data.copy(), params["dtypes"])
+
+        # Replace values and log transform indicated columns
+        data = Preprocessor._log_transform(Preprocessor._replace(data, params["replace"]), params["log_transform"])
+
+        # Impute missing values with the training means, including columns that replacement made numeric
+        data = data.infer_objects()
+        params["impute"] = {}
+        for col in data.select_dtypes(np.number):
+            finite = data[col].replace([np.inf, -np.inf], np.nan)
+            params["impute"][col] = float(finite.mean())
+            data[col] = Preprocessor._impute(data[col], strategy="mean", mean=params["impute"][col])
+
+        # Dummy categorical columns, remembering the levels seen in training
+        categorical = names_meta[names_meta["data_class"] == "categorical"].index.tolist()
+        params["dummy"] = {col: sorted(data[col].dropna().astype(str).unique().tolist()) for col in categorical}
+        data = self._dummy(data, params["dummy"])
+
+        # Discretize indicated columns, remembering the bin edges
+        bins = fit_bins(data, self.discretize_dict)
+        params["discretize"] = {col: {"edges": np.asarray(col_bins["edges"], dtype=float).tolist(),
+                                      "side": col_bins["side"]} for col, col_bins in bins.items()}
+        data = self._discretize(data, params["discretize"])
+
+        # Standardize non-Boolean feature columns with the training means and standard deviations
+        id_cols = names_meta[names_meta["id"]].index.tolist()
+        feature_cols = [x for x in data if x not in id_cols and x != params["label"]]
+        params["features"] = feature_cols
+        params["standardize"] = {"means": {}, "std_devs": {}}
+        if self.standardize:
+            cols = get_standardization_cols(data[feature_cols], feature_cols)
+            means, std_devs = get_standardization_params(data[cols].astype(float))
+            params["standardize"] = {"means": means.to_dict(), "std_devs": std_devs.to_dict()}
+
+        self.params = params
+        return self
+
+    def fit_transform(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Fit the pipeline on training data and transform it.
+        :param data: Raw training data
+        :return: Transformed training data
+        """
+        return self.fit(data).transform(data)
+
+    def transform(self, data: t.Union[pd.DataFrame, dict]) -> pd.DataFrame:
+        """
+        Apply the fitted preprocessing to a batch of records without recomputing any statistics.
+        :param data: Raw records: a dataframe, or a dict for a single record
+        :return: Transformed records with the fitted feature columns, plus the label if present
+        Columns missing from the records are treated as missing values: numeric columns take the fitted means and
+        categorical columns encode as all False. The label is not standardized, unlike in run.py, where it is
+        standardized with the features only to score every fold on one scale; here it stays in the units in which
+        predictions are made.
+        """
+        if self.params is None:
+            raise ValueError("Pipeline must be fit before it can transform data.")
+        params = self.params
+        data = pd.DataFrame([data]) if isinstance(data, dict) else data.copy()
+        columns = [col for col in self.names_meta.index if col != params["label"] or col in data]
+        data = self._coerce(data.reindex(columns=columns), params["dtypes"])
+
+        # Replace, log transform, and impute with the fitted means
+        data = Preprocessor._log_transform(Preprocessor._replace(data, self._present(params["replace"], data)),
+                                           self._present(params["log_transform"], data))
+        for col, mean in self._present(params["impute"], data).items():
+            data[col] = Preprocessor._impute(data[col], strategy="mean", mean=mean)
+
+        # Dummy with the fitted levels, then discretize with the fitted edges
+        data = self._dummy(data, self._present(params["dummy"], data))
+        data = self._discretize(data, self._present(params["discretize"], data))
+
+        # Standardize with the fitted means and standard deviations
+        cols = list(params["standardize"]["means"])
+        if cols:
+            means, std_devs = pd.Series(params["standardize"]["means"]), pd.Series(params["standardize"]["std_devs"])
+            data[cols] = standardize(data[cols].astype(float), means, std_devs)
+
+        columns = params["features"] + ([params["label"]] if params["label"] in data else [])
+        return data[columns]
+
+    def save(self, path: Path):
+        """
+        Save the fitted pipeline to a JSON file.
+        :param path: Destination path
+        """
+        state = {
+            "dataset_meta": self.dataset_meta,
+            "discretize_dict": self.discretize_dict,
+            "standardize": self.standardize,
+            "params": self.params,
+        }
+        with open(path, "w") as file:
+            json.dump(state, file, default=_to_builtin)
+
+    @classmethod
+    def load(cls, path: Path) -> "PreprocessingPipeline":
+        """
+        Load a fitted pipeline from a JSON file.
+        :param path: Path written by save
+        :return: Fitted pipeline
+        """
+        with open(path) as file:
+            state = json.load(file)
+        pipeline = cls(state["dataset_meta"], state["discretize_dict"], state["standardize"])
+        pipeline.params = state["params"]
+        return pipeline
+
+    def _coerce(self, data: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+        """
+        Mark missing values and cast the columns of raw records to their catalog data types.
+        """
+        missing = self.dataset_meta["missing"]
+        if missing is not None:
+            data = data.replace(missing, np.nan)
+        for col in data:
+            if dtypes.get(col) == "float":
+                data[col] = pd.to_numeric(data[col], errors="coerce")
+            elif dtypes.get(col) == "str":
+                data[col] = data[col].where(data[col].isna(), data[col].astype(str))
+        return data
+
+    @staticmethod
+    def _discretize(data: pd.DataFrame, discretize_params: dict) -> pd.DataFrame:
+        """
+        Assign the values of each discretized column to bins using fitted edges.
+        """
+        if discretize_params:
+            data[list(discretize_params)] = apply_bins(data, discretize_params)
+        return data
+
+    @staticmethod
+    def _dummy(data: pd.DataFrame, levels: dict) -> pd.DataFrame:
+        """
+        One-hot encode categorical columns into exactly the fitted levels; unseen levels encode as all False.
+        """
+        dummies = {}
+        for col, col_levels in levels.items():
+            values = data.pop(col).astype(str).to_numpy()
+            for level in col_levels:
+                dummies[f"{col}_{level}"] = values == level
+        return pd.concat([data, pd.DataFrame(dummies, index=data.index)], axis=1) if dummies else data
+
+    @staticmethod
+    def _present(params: t.Union[dict, list], data: pd.DataFrame) -> t.Union[dict, list]:
+        """
+        Restrict column-keyed parameters to the columns present in a batch.
+        """
+        if isinstance(params, dict):
+            return {col: value for col, value in params.items() if col in data}
+        return [col for col in params if col in data]
+
+
+def _to_builtin(value):
+    """
+    Convert NumPy scalars to built-in types for JSON serialization.
+    """
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
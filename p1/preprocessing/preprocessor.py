@@ -5,6 +5,8 @@ This module provides the Preprocessor class.
 
 """
 # Standard library imports
+import io
+import logging
 from pathlib import Path
 from collections import defaultdict
 import typing as t
@@ -14,38 +16,47 @@ import numpy as np
 import pandas as pd
 
 # Local imports
-from p1.preprocessing.jenks import compute_two_break_jenks
-from p1.preprocessing.split import make_splits
+from p1.instrumentation import instrument
+from p1.preprocessing.discretization import apply_bins, fit_bins
+from p1.preprocessing.jenks import compute_jenks_breaks, compute_two_break_jenks
+from p1.preprocessing.split import assign_hash_splits, hash_rows, make_splits
+from p1.preprocessing.standardization import standardize
+from p1.preprocessing.store import ColumnStore
+from p1.preprocessing.streaming import RunningStats
 
 
 class Preprocessor:
-    def __init__(self, dataset_name: str, dataset_meta: dict, data_dir: Path):
+    def __init__(self, dataset_name: str, dataset_meta: dict, data_dir: Path, store_dir: Path = None):
         self.dataset_name = dataset_name
         self.dataset_meta = dataset_meta
         self.data_dir = Path(data_dir)
         self.dataset_src: Path = self.data_dir / dataset_meta["data_filename"]
+        self.store_dir: t.Union[Path, None] = None if store_dir is None else Path(store_dir)
         self.names_meta = pd.DataFrame(self.dataset_meta["names_meta"]).set_index("name")
         self.names = list(self.names_meta.index.values)
         self.imputed_data: t.Union[pd.DataFrame, None] = None
         self.numeric_columns: list = None
         self.jenks_breaks: dict = {}
         self.discretize_dict: defaultdict(lambda: {})
+        self.bins: dict = {}
+        self.running_stats: t.Union[RunningStats, None] = None
+        self.memory_report: list[dict] = []
+        self.row_hashes: t.Union[np.ndarray, None] = None
 
     def __repr__(self):
         return f"{self.dataset_name} Loader"
 
+    @instrument()
     def compute_natural_breaks(self, numeric_cols: list = None, n_breaks=2, exclude_ordinal=True) -> pd.DataFrame:
         """
-        Compute two-class natural Jenks breaks for each numeric column.
+        Compute natural Jenks breaks for each numeric column.
         :param numeric_cols: List of numeric columns to compute breaks for
-        :param n_breaks: Number of breaks to split list into
+        :param n_breaks: Number of classes to split list into
         :param exclude_ordinal: True to exclude ordinal columns
         :return: Dataframe of indexed break assignments
+        For two classes the break_value column holds one value per column; otherwise it holds a list of
+        n_breaks - 1 values.
         """
-        if n_breaks != 2:
-            msg = "Jenks breaks are only available for two classes / breaks."
-            raise NotImplementedError(msg)
-
         # Select all numeric columns if none are provided
         numeric_cols = self.get_numeric_columns() if numeric_cols is None else numeric_cols
 
@@ -54,14 +65,20 @@ class Preprocessor:
             ordinal_cols = self.names_meta[self.names_meta.data_class == "ordinal"].index
             numeric_cols = [x for x in numeric_cols if x not in ordinal_cols]
 
+        jenks_breaks = {}
         for numeric_col in numeric_cols:
-            values = self.data[numeric_col].tolist()
-            self.jenks_breaks[numeric_col] = compute_two_break_jenks(values)
-
-        self.jenks_breaks = pd.DataFrame.from_dict(self.jenks_breaks).transpose()
+            values = self.data[numeric_col].to_numpy()
+            if n_breaks == 2:
+                jenks_breaks[numeric_col] = compute_two_break_jenks(values)
+            else:
+                jenks_breaks[numeric_col] = compute_jenks_breaks(values, n_breaks)
+
+        self.jenks_breaks = pd.DataFrame.from_dict(jenks_breaks, orient="index")
+        self.jenks_breaks["gcvf"] = self.jenks_breaks["gcvf"].astype(float)
         self.jenks_breaks.sort_values(by="gcvf", ascending=False, inplace=True)
         return self.jenks_breaks
 
+    @instrument()
     def discretize(self, discretize_dict: dict) -> pd.DataFrame:
         """
         Discretize indicated columns using provided discretize_dict.
@@ -72,23 +89,32 @@ class Preprocessor:
              "normal_nucleoli": {"n_bins": 2, "binning": "equal_width"}}
         """
         self.discretize_dict = defaultdict(lambda: {}, discretize_dict)
-        for col, bin_dict in self.discretize_dict.items():
-            frame, retbins = self._discretize(self.data[col], bin_dict["n_bins"], bin_dict["binning"])
-            self.data.drop(axis=1, labels=col, inplace=True)
-            self.data = self.data.join(frame)
-            self.discretize_dict[col]["retbins"] = retbins
+        self.bins = fit_bins(self.data, discretize_dict)
+        codes = apply_bins(self.data, self.bins)
+
+        # Discretized columns move to the end of the dataframe
+        self.data = pd.concat([self.data.drop(columns=codes.columns), codes], axis=1)
+        for col, col_bins in self.bins.items():
+            self.discretize_dict[col]["retbins"] = col_bins["retbins"]
         return self.data[list(discretize_dict.keys())]
 
-    def dummy(self, columns: t.Union[list[str], str, None] = "default") -> pd.DataFrame:
+    @instrument()
+    def dummy(self, columns: t.Union[list[str], str, None] = "default", encoding: str = "dense") -> pd.DataFrame:
         """
         Dummy categorical columns.
         :param columns: 'default' for defaults, list to specify them, False / None to do nothing
+        :param encoding: 'dense' to replace them with Boolean indicator columns; 'codes' to keep them as category
+            columns, integer codes plus levels, which FoldMatrix and CategoricalCodes expand to the same indicators
         :return: Data
         """
+        if encoding not in ["dense", "codes"]:
+            raise ValueError(f"{encoding} encoding is not supported / unknown to this implementation.")
         if columns == "default":
             mask = self.names_meta["data_class"] == "categorical"
             columns = self.names_meta[mask].index.values.tolist()
-        if columns:
+        if columns and encoding == "codes":
+            self.data = self.data.astype({col: "category" for col in columns})
+        elif columns:
             self.data = pd.get_dummies(self.data, columns=columns)
 
         # Update features list
@@ -108,6 +134,21 @@ class Preprocessor:
         self.numeric_columns = self.names_meta[mask].index.tolist()
         return self.numeric_columns
 
+    @instrument()
+    def hash_rows(self, columns: t.Union[list[str], str] = "default") -> np.ndarray:
+        """
+        Hash each row of the data as loaded, for make_hash_folds.
+        :param columns: 'default' for the id columns of names_meta, or every column if there are none; list to
+            specify them
+        :return: uint64 hashes in row order, also kept in row_hashes
+        Call this before replacing, imputing, or discretizing, whose results depend on the other rows.
+        """
+        if columns == "default":
+            columns = self.names_meta[self.names_meta["id"]].index.tolist() or self.data.columns.tolist()
+        self.row_hashes = hash_rows(self.data[columns])
+        return self.row_hashes
+
+    @instrument()
     def identify_features_label_id(self) -> pd.DataFrame:
         """
         Parse features, label, and ID columns from metadata.
@@ -128,6 +169,7 @@ class Preprocessor:
 
         return self.data
 
+    @instrument()
     def impute(self, numeric_cols: t.Union[list[str], str] = "default", strategy: str = "mean"):
         """
         Impute missing values of numeric columns.
@@ -142,22 +184,88 @@ class Preprocessor:
             self.data[col] = self._impute(data[col], strategy=strategy)
         return self.data
 
-    def load(self) -> pd.DataFrame:
+    @instrument()
+    def compact(self) -> dict:
+        """
+        Convert the data to the smallest safe dtypes: float32 floats, small (nullable if needed) integers, and category
+        columns for categorical strings.
+        :return: Memory report dict of bytes before and after compaction
+        Extension dtypes without missing values are converted back to NumPy dtypes so the result feeds directly into a
+        float32 model matrix.
+        """
+        before = self.memory_usage()
+        categorical = self.names_meta.index[self.names_meta["data_class"] == "categorical"]
+        for col in self.data:
+            series = self.data[col].infer_objects() if self.data[col].dtype == object else self.data[col]
+            if col in categorical and (series.dtype == object or pd.api.types.is_string_dtype(series)):
+                self.data[col] = series.astype("category")
+            elif pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+                self.data[col] = series
+            elif pd.api.types.is_float_dtype(series):
+                self.data[col] = series.astype("float32" if not series.hasnans else "Float32")
+            else:
+                self.data[col] = self._downcast_integer(series)
+        after = self.memory_usage()
+        self.memory_report.append({"stage": "compact", "before": before, "after": after})
+        return self.memory_report[-1]
+
+    @instrument()
+    def load(self, compact: bool = False, columns: list = None) -> pd.DataFrame:
         """
         Load CSV of dataset for Projects 1 to 4 into a dataframe.
+        :param compact: True to read with the compact dtypes of plan_dtypes instead of make_dtypes
+        :param columns: Columns to read; None to read every column
         :return: Loaded dataset
+        The dataset is read from the column store if one was given and it holds an up-to-date copy of the source.
         """
-        # Set column names, replace missing values with NaNs, and set data types
-        na_values = self.dataset_meta["missing"]
-        dtypes = self.make_dtypes(self.names_meta.data_type.to_dict())
-        kwargs = {"names": self.names,
-                  "na_values": na_values,
-                  "dtype": dtypes}
-        if self.dataset_meta["header"]:
-            kwargs.update({"header": 0})
-        self.data = pd.read_csv(self.dataset_src, **kwargs)
+        kwargs = self._read_csv_kwargs()
+        if compact:
+            kwargs["dtype"] = self.plan_dtypes()
+        self.data = self._read_store(columns)
+        if self.data is None:
+            self.data = pd.read_csv(self.dataset_src, usecols=columns, **kwargs)
+        elif compact:
+            self.data = self.data.astype({col: kwargs["dtype"][col] for col in self.data})
+        if compact:
+            for col in self.data.select_dtypes("integer"):
+                self.data[col] = self._downcast_integer(self.data[col])
+
+            # Deep memory usage scans every string, so it is only reported alongside compaction
+            self.memory_report = [{"stage": "load", "before": None, "after": self.memory_usage()}]
         return self.data
 
+    def load_chunks(self, chunksize: int) -> t.Iterator[pd.DataFrame]:
+        """
+        Load the CSV of the dataset lazily, one chunk of rows at a time.
+        :param chunksize: Number of rows per chunk
+        :return: Iterator of chunks with the same column names and data types as load
+        Chunks are indexed by row number, like identify_features_label_id indexes the in-memory dataset.
+        """
+        with pd.read_csv(self.dataset_src, chunksize=chunksize, **self._read_csv_kwargs()) as reader:
+            offset = 0
+            for chunk in reader:
+                chunk.index = pd.RangeIndex(offset, offset + len(chunk), name="index")
+                offset += len(chunk)
+                yield chunk
+
+    def load_tail(self, offset: int, end: int = None) -> pd.DataFrame:
+        """
+        Parse the rows of the dataset's CSV that start at a byte offset, e.g. the rows appended since an earlier load.
+        :param offset: Byte offset of the first row to parse, at the start of a line; 0 parses the whole file
+        :param end: Byte offset to stop at; None to parse to the end of the file
+        :return: Dataframe with the same column names and data types as load, indexed by row number from 0
+        """
+        kwargs = self._read_csv_kwargs()
+        if offset:
+            kwargs.pop("header", None)
+        with open(self.dataset_src, "rb") as file:
+            file.seek(offset)
+            tail = file.read(-1 if end is None else end - offset)
+        if not tail.strip():
+            return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in kwargs["dtype"].items()})
+        return pd.read_csv(io.BytesIO(tail), **kwargs)
+
+    @instrument()
     def log_transform(self, log_transforms: t.Union[list[str], str, bool] = "default") -> pd.DataFrame:
         """
         Log transform indicated columns.
@@ -166,26 +274,89 @@ class Preprocessor:
         """
         # If "default", use default log transformations from data catalog
         if log_transforms == "default":
-            mask = self.names_meta["log_transform"]
-            log_transforms = self.names_meta["log_transform"][mask].index.tolist()
+            log_transforms = self._default_log_transforms()
 
         # Perform log transformations
-        if log_transforms:
-            for col in log_transforms:
-                self.data[col] = np.log(self.data[col])
+        self.data = self._log_transform(self.data, log_transforms)
         return self.data
 
-    def make_folds(self, k_folds: int):
+    @instrument()
+    def make_hash_folds(self, k_folds: int, random_state: int = 777, stratify: bool = False,
+                        n_strata: int = None) -> pd.DataFrame:
+        """
+        Make folds from seeded row hashes and add them, and the hashes, to the dataset without reordering it.
+        :param k_folds: Number of folds to create
+        :param random_state: Random number seed mixed into the row hashes
+        :param stratify: True to balance the folds of each class (or regression label stratum) exactly
+        :param n_strata: Number of label quantile strata to stratify regression folds by; None for no stratification
+        :return: Folds dataframe
+        """
+        if self.row_hashes is None or len(self.row_hashes) != len(self.data):
+            raise ValueError("Call hash_rows on the loaded data before make_hash_folds.")
+        problem_class = self.dataset_meta["problem_class"]
+        codes = assign_hash_splits(self.row_hashes, self.data[self.label].to_numpy(), problem_class, random_state,
+                                   k_folds=k_folds, n_strata=n_strata, stratify=stratify)
+        folds = pd.DataFrame({"fold": codes, "row_hash": self.row_hashes}, index=self.data.index)
+        self.data = folds.join(self.data)
+        return folds
+
+    def make_folds(self, k_folds: int, n_strata: int = None):
         """
         Make folds and add them to dataset.
         :param k_folds: Number of folds to create
+        :param n_strata: Number of label quantile strata to stratify regression folds by; None for no stratification
         :return: Folds dataframe
         """
         problem_class = self.dataset_meta["problem_class"]
-        folds: pd.DataFrame = make_splits(self.data, problem_class, self.label, k_folds)
+        folds: pd.DataFrame = make_splits(self.data, problem_class, self.label, k_folds, n_strata=n_strata)
         self.data = folds.join(self.data)
         return folds
 
+    def memory_usage(self) -> int:
+        """
+        Get the memory used by the data, including the contents of string columns.
+        :return: Number of bytes
+        """
+        return int(self.data.memory_usage(deep=True).sum())
+
+    def plan_dtypes(self) -> dict:
+        """
+        Plan the smallest safe read dtype of each column from the names metadata.
+        :return: Dtype mapping for pd.read_csv
+        Integers use the smallest type that holds the catalog's listed values (int64 otherwise, downcast after
+        loading) and are nullable if the column can be missing. Floats are read as float32. Categorical strings are
+        read as category unless they have replacements, which are applied to plain strings first.
+        """
+        dtypes = {}
+        dataset_missing = self.dataset_meta["missing"] is not None
+        for col, meta in self.names_meta.iterrows():
+            if meta["data_type"] == "int":
+                values = meta["values"] if isinstance(meta["values"], list) else [np.iinfo(np.int64).max]
+                dtype = next(np.dtype(x) for x in [np.int8, np.int16, np.int32, np.int64]
+                             if np.iinfo(x).min <= min(values) and max(values) <= np.iinfo(x).max)
+                nullable = dataset_missing and pd.notna(meta["missing"])
+                dtypes[col] = dtype.name.capitalize() if nullable else dtype.name
+            elif meta["data_type"] == "float":
+                dtypes[col] = "float32"
+            elif meta["data_class"] == "categorical" and not isinstance(meta["replace"], dict):
+                dtypes[col] = "category"
+            else:
+                dtypes[col] = meta["data_type"]
+        return dtypes
+
+    def plan_transforms(self, replace_di: t.Union[dict, str, None] = "default",
+                        log_transforms: t.Union[list[str], str, bool] = "default") -> dict:
+        """
+        Compile the replacements and log transformations of the names metadata into one plan per column.
+        :param replace_di: 'default' for defaults, dict for custom, None to do nothing
+        :param log_transforms: 'default' for defaults, list to specify them, False to do nothing
+        :return: Keyword arguments of _transform_column keyed by column, in column order
+        """
+        replace_di = (self._default_replacements() if replace_di == "default" else replace_di) or {}
+        log_transforms = (self._default_log_transforms() if log_transforms == "default" else log_transforms) or []
+        return {col: {"replacements": replace_di.get(col), "log": col in log_transforms} for col in self.data}
+
+    @instrument()
     def replace(self, replace_di: t.Union[dict, str, None] = "default") -> pd.DataFrame:
         """
         Replace dataframe values for indicated columns.
@@ -195,14 +366,21 @@ class Preprocessor:
         """
         # If "default", use default replacements from data catalog
         if replace_di == "default":
-            replace_di = self.names_meta["replace"].dropna().to_dict()
+            replace_di = self._default_replacements()
 
         # If True or dict, replace values for indicated columns
-        if replace_di:
-            for col, di in replace_di.items():
-                self.data[col] = self.data[col].replace(di)
+        self.data = self._replace(self.data, replace_di)
         return self.data
 
+    @instrument()
+    def transform_rows(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply the default transforms that depend on each row alone: value replacement and log transformation.
+        :param data: Dataframe as loaded, either the full dataset or one chunk of it
+        :return: Transformed dataframe; missing values are left for imputation
+        """
+        return self._log_transform(self._replace(data, self._default_replacements()), self._default_log_transforms())
+
     def shuffle(self, random_state: int = 777) -> pd.DataFrame:
         """
         Shuffle the data by random seed.
@@ -210,6 +388,69 @@ class Preprocessor:
         self.data = self.data.sample(frac=1, random_state=random_state)
         return self.data
 
+    def stream(self, chunksize: int, replace_di: t.Union[dict, str, None] = "default",
+               log_transforms: t.Union[list[str], str, bool] = "default",
+               standardize_cols: list[str] = None) -> t.Iterator[pd.DataFrame]:
+        """
+        Load, replace, log transform, impute, and optionally standardize the dataset in two passes over its chunks.
+        :param chunksize: Number of rows per chunk
+        :param replace_di: 'default' for defaults, dict for custom, None to do nothing
+        :param log_transforms: 'default' for defaults, list to specify them, False to do nothing
+        :param standardize_cols: Numeric columns to standardize with the streamed means and standard deviations
+        :return: Iterator of transformed chunks
+        The first pass accumulates RunningStats of the numeric columns, which are kept in self.running_stats, and the
+        dtype each column takes once imputed, which is the same for every chunk and the one impute gives the whole
+        column; the second pass re-reads the file and applies the transforms. Peak memory is bounded by the chunk size
+        rather than the file size. Streaming is a library API for datasets larger than memory: the command line loads
+        whole datasets.
+        """
+        replace_di = self._default_replacements() if replace_di == "default" else replace_di
+        log_transforms = self._default_log_transforms() if log_transforms == "default" else log_transforms
+
+        # First pass: accumulate imputation and standardization statistics, and the common dtype of each imputed
+        # column, which is float64 if any chunk's values do not all fit in float32
+        self.running_stats = RunningStats()
+        numeric_cols, dtypes = None, {}
+        for chunk in self.load_chunks(chunksize):
+            chunk = self._log_transform(self._replace(chunk, replace_di), log_transforms)
+            numeric_cols = list(chunk.select_dtypes(np.number)) if numeric_cols is None else numeric_cols
+            self.running_stats.update(chunk[numeric_cols])
+            for col in numeric_cols:
+                dtype = self._impute(chunk[col], strategy="mean", mean=0.0).dtype
+                dtypes[col] = np.promote_types(dtypes.get(col, dtype), dtype)
+        means, std_devs = self.running_stats.means, self.running_stats.std_devs
+
+        # Second pass: transform each chunk with the accumulated statistics
+        for chunk in self.load_chunks(chunksize):
+            chunk = self._log_transform(self._replace(chunk, replace_di), log_transforms)
+            for col in numeric_cols:
+                chunk[col] = self._impute(chunk[col], strategy="mean", mean=means[col]).astype(dtypes[col])
+            if standardize_cols:
+                chunk[standardize_cols] = standardize(chunk[standardize_cols], means[standardize_cols],
+                                                      std_devs[standardize_cols])
+            yield chunk
+
+    @instrument()
+    def transform_columns(self, replace_di: t.Union[dict, str, None] = "default",
+                          log_transforms: t.Union[list[str], str, bool] = "default",
+                          strategy: str = "mean") -> pd.DataFrame:
+        """
+        Replace values, log transform, and impute missing values in one pass over each column.
+        :param replace_di: 'default' for defaults, dict for custom, None to do nothing
+        :param log_transforms: 'default' for defaults, list to specify them, False to do nothing
+        :param strategy: Currently only mean is implemented
+        :return: Transformed dataframe
+        The result equals that of replace, log_transform, and impute called one after another, without their
+        whole-frame copies.
+        """
+        if strategy != "mean":
+            raise NotImplementedError(f"Strategy {strategy} is not implemented.")
+        for col, plan in self.plan_transforms(replace_di, log_transforms).items():
+            transformed = self._transform_column(self.data[col], **plan)
+            if transformed is not self.data[col]:
+                self.data[col] = transformed
+        return self.data
+
     @staticmethod
     def _discretize(series: pd.Series, n_bins: int, binning: str = "equal_frequency") -> tuple:
         """
@@ -217,46 +458,42 @@ class Preprocessor:
         :param series: Numeric series to discretize
         :param n_bins: Number of bins resulting from discretization
         :param binning: Binning strategy used for discretization
-        :param retbins: True to return bin definitions
         :return: Tuple of two elements: Discretized dataframe and bin definitions
-        For the 'equal_frequency' binning strategy, retbins is None
-        """
-        # Sort by values - necessary for equal_frequency method
-        series = series.copy().sort_values()
-        name = series.name
-
-        # Make bins based on binning strategy and cut the data
-        if binning == "equal_width":
-            min_, max_ = series.min(), series.max()
-            range_ = max_ - min_
-            increment = range_ / n_bins
-            bins = [min_ + x * increment for x in range(n_bins + 1)]
-            cuts, retbins = pd.cut(series, bins=bins, include_lowest=True, retbins=True)
-            cuts = cuts.cat.codes
-        elif binning == "equal_frequency":
-            bin_size = len(series) / n_bins
-            cuts = pd.Series([int(x // bin_size) for x in range(len(series))], index=series.index)
-            retbins = None
-        else:
-            raise ValueError(f"{binning} binning is not supported / unknown to this implementation.")
-
-        # Reset series name
-        cuts.name = name
+        Binning strategies are 'equal_width', 'equal_frequency', and 'jenks' (natural breaks).
+        Bin definitions are the edges including the series minimum and maximum; see fit_bins.
+        """
+        bins = fit_bins(series.to_frame(), {series.name: {"n_bins": n_bins, "binning": binning}})
+        return apply_bins(series.to_frame(), bins), bins[series.name]["retbins"]
 
-        return cuts.to_frame(), retbins
+    @staticmethod
+    def _downcast_integer(series: pd.Series) -> pd.Series:
+        """
+        Downcast an integer series to the smallest integer dtype, keeping it nullable only if it has missing values.
+        :param series: Integer series
+        :return: Downcast series
+        """
+        if series.hasnans:
+            dtype = pd.to_numeric(series.dropna().astype("int64"), downcast="integer").dtype
+            return series.astype(dtype.name.capitalize())
+        return pd.to_numeric(series.astype("int64"), downcast="integer")
 
     @staticmethod
-    def _impute(feature: pd.Series, strategy: str) -> pd.Series:
+    def _impute(feature: pd.Series, strategy: str, mean: float = None) -> pd.Series:
         """
         Impute missing feature values using the selected strategy.
         :param feature: Feature values
         :param strategy: Imputation strategy
+        :param mean: Precomputed fill value, e.g. a streamed mean; computed from the feature if None
         :return: Imputed feature series
         The only strategy currently implemented is "mean".
         """
         if not isinstance(feature, pd.Series):
             raise TypeError("Feature must be a Pandas series.")
 
+        # Nullable integers cannot hold a fractional mean, so impute them as floats
+        if pd.api.types.is_extension_array_dtype(feature) and pd.api.types.is_integer_dtype(feature):
+            feature = feature.astype("float64")
+
         # Convert infinitely large or small values to NaNs
         mask = feature.copy().isin([float("inf"), -float("inf"), np.inf, -np.inf])
         feature.loc[mask] = np.nan
@@ -264,12 +501,116 @@ class Preprocessor:
         # Impute missing values with the feature's mean
         if strategy == "mean":
             feature = pd.to_numeric(feature, errors="coerce", downcast="float")
-            feature = feature.fillna(feature.mean())
+            feature = feature.fillna(feature.mean() if mean is None else mean)
         else:
             raise NotImplementedError(f"Strategy {strategy} is not implemented.")
 
         return feature
 
+    @staticmethod
+    def _log_transform(data: pd.DataFrame, log_transforms: t.Union[list[str], bool]) -> pd.DataFrame:
+        """
+        Log transform columns of a dataframe.
+        :param data: Dataframe, either the full dataset or one chunk of it
+        :param log_transforms: List of columns to log transform, False / None to do nothing
+        :return: Transformed dataframe
+        """
+        if log_transforms:
+            for col in log_transforms:
+                data[col] = np.log(data[col])
+        return data
+
+    @staticmethod
+    def _replace(data: pd.DataFrame, replace_di: t.Union[dict, None]) -> pd.DataFrame:
+        """
+        Replace values of columns of a dataframe.
+        :param data: Dataframe, either the full dataset or one chunk of it
+        :param replace_di: Replacement dicts keyed by column, None to do nothing
+        :return: Transformed dataframe
+        """
+        if replace_di:
+            for col, di in replace_di.items():
+                data[col] = Preprocessor._replace_values(data[col], di)
+        return data
+
+    @staticmethod
+    def _replace_values(series: pd.Series, replacements: dict) -> pd.Series:
+        """
+        Replace values of a series by looking up each distinct value once.
+        :param series: Series to replace values of
+        :param replacements: Mapping of old values to new values
+        :return: Series equal to series.replace(replacements)
+        Only the distinct values go through Series.replace, so the result has the dtype Series.replace would give;
+        the rows are then gathered from them by their factorized codes.
+        """
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        if (codes < 0).any():
+            codes = np.where(codes < 0, len(uniques), codes)
+            uniques = pd.Series(uniques).reindex(range(len(uniques) + 1))
+        replaced = pd.Series(uniques, dtype=series.dtype).replace(replacements)
+        return pd.Series(replaced.array.take(codes), index=series.index, name=series.name)
+
+    @staticmethod
+    def _transform_column(series: pd.Series, replacements: dict = None, log: bool = False, impute: bool = True,
+                          mean: float = None) -> pd.Series:
+        """
+        Replace values, log transform, and mean impute one column.
+        :param series: Column to transform
+        :param replacements: Mapping of old values to new values, None to not replace
+        :param log: True to log transform
+        :param impute: True to mean impute the column if it is numeric after the replacements
+        :param mean: Precomputed fill value, e.g. a streamed mean; computed from the column if None
+        :return: Transformed column, or series itself if nothing applies to it
+        """
+        if replacements:
+            series = Preprocessor._replace_values(series, replacements)
+        if log:
+            series = np.log(series)
+        if not impute or not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            return series
+        if pd.api.types.is_extension_array_dtype(series):
+            return Preprocessor._impute(series, strategy="mean", mean=mean)
+
+        # Convert infinite values to NaNs, downcast as _impute does, and fill in place
+        values = series.to_numpy()
+        if values.dtype.kind == "f":
+            values = np.where(np.isinf(values), np.nan, values)
+        else:
+            values = values.astype(np.float64)
+        values = pd.to_numeric(values, downcast="float")
+        feature = pd.Series(values, index=series.index, name=series.name, copy=False)
+        missing = np.isnan(values)
+        if missing.any():
+            np.putmask(values, missing, feature.mean() if mean is None else mean)
+        return feature
+
+    def _default_log_transforms(self) -> list[str]:
+        mask = self.names_meta["log_transform"]
+        return self.names_meta["log_transform"][mask].index.tolist()
+
+    def _default_replacements(self) -> dict:
+        return self.names_meta["replace"].dropna().to_dict()
+
+    def _read_store(self, columns: list = None) -> t.Union[pd.DataFrame, None]:
+        if self.store_dir is None:
+            return None
+        store = ColumnStore(self.store_dir)
+        data = store.read(self.dataset_name, store.fingerprint(self.dataset_src, self.dataset_meta), columns)
+        if data is None:
+            logging.debug(f"No up-to-date {self.dataset_name} in {store}; parse {self.dataset_src.name}.")
+        return data
+
+    def _read_csv_kwargs(self) -> dict:
+        # Set column names, replace missing values with NaNs, and set data types
+        na_values = self.dataset_meta["missing"]
+        dtypes = self.make_dtypes(self.names_meta.data_type.to_dict())
+        kwargs = {"names": self.names,
+                  "na_values": na_values,
+                  "dtype": dtypes}
+        if self.dataset_meta["header"]:
+            kwargs.update({"header": 0})
+        return kwargs
+
     @staticmethod
     def make_dtypes(dtypes_di: dict[str]) -> dict[str]:
         """
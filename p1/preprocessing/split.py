@@ -4,74 +4,185 @@
 This module provides functions to split data into K folds and split training-validation into separate training and
 validation sets.
 
+Folds are assigned by position after a seeded shuffle, or from seeded hashes of each row's id columns or content.
+Hash-based folds need no permutation of the data, can be assigned chunk by chunk, and keep every existing row in its
+fold when rows are appended; their stratified variant ranks each stratum's rows by hash to balance folds exactly, at
+the cost of that stability.
+
 """
 # Third party libraries
+import numpy as np
 import pandas as pd
 
+# Fold assignment modes: shuffle then split by position, or split by seeded row hash with or without stratification
+FOLD_ASSIGNMENTS = ["shuffle", "hash", "hash_stratified"]
 
-def make_splits(data: pd.DataFrame, problem_class: str, label_col: str, k_folds: int,
-                val_frac: float = None) -> pd.DataFrame:
+
+def assign_splits(labels: np.ndarray, problem_class: str, k_folds: int = None, val_frac: float = None,
+                  n_strata: int = None) -> tuple:
     """
-    Assign each observation to a fold or split a train-validation set into train & validation sets.
-    :param data: Dataframe to split
+    Assign every observation to a fold or to the train / validation set in one vectorized pass.
+    :param labels: Label values in row order
     :param problem_class: 'classification' or 'regression'; if 'classification', data stratified by class weight
-    :param label_col: Label column used for stratified splitting
     :param k_folds: Number of folds for k_folds splitting
     :param val_frac: Validation fraction for train-validation splitting
-    :return: DataFrame of splits
-    K folds and train-validation splitting are mutually exclusive operations; one or the other
-    must be specified or else the function will raise a ValueError.
+    :param n_strata: Number of label quantile strata to stratify regression labels by; None for no stratification
+    :return: Tuple of row positions grouped by stratum and the split code of each grouped position
+    Strata are ordered by first appearance and positions keep their row order within a stratum. Each stratum's
+    i-th observation (0-indexed) falls in fold ceil(i / (n // k_folds)), clipped to [1, k_folds], or in the
+    validation set (code 0) if i <= int(n * val_frac) and the train set (code 1) otherwise.
     """
     validate_split_inputs(problem_class, k_folds, val_frac)
+    labels = np.asarray(labels)
+    n_rows = len(labels)
 
-    # If the problem class is classification, extract the labels into a list
-    if problem_class == "classification":
-        labels = data[label_col].unique().tolist()
+    # Map each observation to a stratum: its class, its label quantile bin, or one stratum for all
+    strata = _make_strata(labels, problem_class, n_strata)
+
+    # Rank strata by first appearance and order positions by stratum, keeping row order within each stratum
+    _, first, inverse = np.unique(strata, return_index=True, return_inverse=True)
+    group = np.argsort(np.argsort(first))[inverse.ravel()]
+    order = np.argsort(group, kind="stable")
+    counts = np.bincount(group)
+    group_sizes = counts[group[order]]
+    temp_id = np.arange(n_rows) - (np.cumsum(counts) - counts)[group[order]]
+
+    # If splitting into k folds, split each stratum into k equal sized parts; folds are 1-indexed
+    if k_folds:
+        fold_size = np.maximum(group_sizes // k_folds, 1)
+        codes = np.clip((temp_id - 1) // fold_size, 0, k_folds - 1) + 1
 
-    # Else if the problem class is regression, create a dummy label of length 1
+    # If splitting train and validation, split each stratum based on val_frac
     else:
-        labels = ["foo"]
+        codes = (temp_id > (group_sizes * val_frac).astype(int)).astype(int)
 
-    # Iterate over each label and perform splits stratified by class weight
-    folds_li = []
-    for label in labels:
-        frame = data.copy()
+    return order, codes.astype(_code_dtype(k_folds))
 
-        # For classification problem, we want to split the data by class
-        if problem_class == "classification":
-            mask = frame[label_col] == label
-            frame = frame[mask]
 
-        # Create a temp_id for binning
-        frame["temp_id"] = list(range(len(frame)))
+def assign_hash_splits(hashes: np.ndarray, labels: np.ndarray, problem_class: str, random_state: int,
+                       k_folds: int = None, val_frac: float = None, n_strata: int = None,
+                       stratify: bool = False) -> np.ndarray:
+    """
+    Assign every observation to a fold or to the train / validation set from its seeded row hash.
+    :param hashes: Row hashes from hash_rows, in row order
+    :param labels: Label values in row order; only used if stratify
+    :param problem_class: 'classification' or 'regression'
+    :param random_state: Random number seed mixed into the hashes
+    :param k_folds: Number of folds for k_folds splitting
+    :param val_frac: Validation fraction for train-validation splitting
+    :param n_strata: Number of label quantile strata to stratify regression labels by; None for no stratification
+    :param stratify: True to split each stratum (each class, for classification) by the rank of its rows' hashes
+    :return: Split codes in row order: 1-indexed folds, or 0 for validation and 1 for train
+    The high 32 bits of the seeded hash pick the fold and the low 32 bits the train-validation split, so the two are
+    independent. Without stratify, each row's code depends only on its own hash, so chunks can be split separately and
+    fold sizes are balanced in expectation. With stratify, the i-th of a stratum's n rows by hash falls in fold
+    i * k_folds // n + 1, or in the validation set if i <= int(n * val_frac), as assign_splits counts them.
+    """
+    validate_split_inputs(problem_class, k_folds, val_frac)
+    seeded = seed_hashes(hashes, random_state)
+    bits = seeded >> np.uint64(32) if k_folds else seeded & np.uint64(0xFFFFFFFF)
+    uniform = bits.astype(float) / 2 ** 32
+    if not stratify:
+        codes = (uniform * k_folds).astype(int) + 1 if k_folds else (uniform >= val_frac).astype(int)
+        return codes.astype(_code_dtype(k_folds))
 
-        # If splitting into k folds, split the data into k equal sized parts
-        if k_folds:
-            fold_label_size = len(frame) // k_folds
-            bins = [x * fold_label_size for x in range(k_folds + 1)]
-            bins[-1] = frame["temp_id"].max()
-            name = "fold"
+    # Rank each row by hash within its stratum
+    strata = _make_strata(np.asarray(labels), problem_class, n_strata)
+    _, inverse, counts = np.unique(strata, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    order = np.lexsort((uniform, inverse))
+    sizes = counts[inverse[order]]
+    ranks = np.arange(len(order)) - (np.cumsum(counts) - counts)[inverse[order]]
+    codes = np.empty(len(order), dtype=_code_dtype(k_folds))
+    if k_folds:
+        codes[order] = ranks * k_folds // sizes + 1
+    else:
+        codes[order] = ranks > (sizes * val_frac).astype(int)
+    return codes
 
-        # If splitting train and validation, split data based on val_frac
-        else:
-            val_right_index = int(len(frame) * val_frac)
-            bins = [frame["temp_id"].min(), val_right_index, frame["temp_id"].max()]
-            name = "train"
 
-        # Cut the dataframe into bins
-        frame = pd.cut(frame["temp_id"], bins=bins, include_lowest=True).cat.codes.rename(name).to_frame()
+def hash_rows(data: pd.DataFrame) -> np.ndarray:
+    """
+    Hash the values of each row.
+    :param data: Dataframe of the columns that identify a row, e.g. its id columns or every loaded column
+    :return: Array of uint64 hashes in row order
+    Hashes depend on the values and dtypes of a row only, not on its position or on any other row.
+    """
+    return pd.util.hash_pandas_object(data, index=False).to_numpy()
 
-        # Let folds be 1-indexed and validation / train be 0-indexed
-        if not val_frac:
-            frame = frame + 1
 
-        # Append the dataframe to the list of folds
-        folds_li.append(frame)
+def seed_hashes(hashes: np.ndarray, random_state: int) -> np.ndarray:
+    """
+    Mix a random number seed into row hashes.
+    :param hashes: uint64 row hashes
+    :param random_state: Random number seed
+    :return: uint64 hashes whose bits are uniform and independent across seeds
+    Applies the SplitMix64 finalizer to each hash offset by a multiple of the seed.
+    """
+    offset = np.uint64(random_state * 0x9E3779B97F4A7C15 % 2 ** 64)
+    z = np.asarray(hashes, dtype=np.uint64) + offset
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
 
-    # Concatenate the dataframes into one
-    folds_data: pd.DataFrame = pd.concat(folds_li)
 
-    return folds_data
+def make_splits(data: pd.DataFrame, problem_class: str, label_col: str, k_folds: int,
+                val_frac: float = None, n_strata: int = None) -> pd.DataFrame:
+    """
+    Assign each observation to a fold or split a train-validation set into train & validation sets.
+    :param data: Dataframe to split
+    :param problem_class: 'classification' or 'regression'; if 'classification', data stratified by class weight
+    :param label_col: Label column used for stratified splitting
+    :param k_folds: Number of folds for k_folds splitting
+    :param val_frac: Validation fraction for train-validation splitting
+    :param n_strata: Number of label quantile strata to stratify regression labels by; None for no stratification
+    :return: DataFrame of splits
+    K folds and train-validation splitting are mutually exclusive operations; one or the other
+    must be specified or else the function will raise a ValueError.
+    """
+    order, codes = assign_splits(data[label_col].to_numpy(), problem_class, k_folds, val_frac, n_strata)
+    name = "fold" if k_folds else "train"
+    return pd.DataFrame({name: codes}, index=data.index[order])
+
+
+def make_repeated_folds(labels: np.ndarray, problem_class: str, k_folds: int, n_repeats: int, random_state: int,
+                        n_strata: int = None) -> np.ndarray:
+    """
+    Assign every observation to a fold for each repeat of repeated K-fold cross-validation.
+    :param labels: Label values in row order
+    :param problem_class: 'classification' or 'regression'; if 'classification', data stratified by class weight
+    :param k_folds: Number of folds per repeat
+    :param n_repeats: Number of repeats
+    :param random_state: Random number seed of the first repeat; repeat r is shuffled with random_state + r
+    :param n_strata: Number of label quantile strata to stratify regression labels by; None for no stratification
+    :return: Array of 1-indexed folds of shape (n_repeats, number of observations), in row order
+    Each repeat shuffles the rows as Preprocessor.shuffle does and then assigns folds as make_splits does.
+    """
+    labels = np.asarray(labels)
+    folds = np.empty((n_repeats, len(labels)), dtype=_code_dtype(k_folds))
+    for repeat in range(n_repeats):
+        shuffled = np.random.RandomState(random_state + repeat).permutation(len(labels))
+        order, codes = assign_splits(labels[shuffled], problem_class, k_folds, n_strata=n_strata)
+        folds[repeat, shuffled[order]] = codes
+    return folds
+
+
+def split_train_val_hashed(hashes: np.ndarray, labels: np.ndarray, problem_class: str, val_frac: float,
+                           random_state: int, n_strata: int = None, stratify: bool = False) -> tuple:
+    """
+    Split train-validation positions into separate train and validation positions by seeded row hash.
+    :param hashes: Row hashes of the train-validation set, in row order
+    :param labels: Label values of the train-validation set, in row order
+    :param problem_class: 'classification' or 'regression'
+    :param val_frac: Fraction of train-validation to split into validation set
+    :param random_state: Random number seed mixed into the hashes
+    :param n_strata: Number of label quantile strata to stratify regression labels by; None for no stratification
+    :param stratify: True to split each stratum by the rank of its rows' hashes
+    :return: train, validation tuple of integer positions into labels, in row order
+    """
+    codes = assign_hash_splits(hashes, labels, problem_class, random_state, val_frac=val_frac, n_strata=n_strata,
+                               stratify=stratify)
+    return np.flatnonzero(codes == 1), np.flatnonzero(codes == 0)
 
 
 def split_train_val(data: pd.DataFrame, problem_class: str, label_col: str, val_frac: float,
@@ -92,6 +203,27 @@ def split_train_val(data: pd.DataFrame, problem_class: str, label_col: str, val_
     return train.join(data), val.join(data)
 
 
+def split_train_val_indices(labels: np.ndarray, problem_class: str, val_frac: float, random_state: int,
+                            n_strata: int = None) -> tuple:
+    """
+    Split train-validation positions into separate train and validation positions without copying any data.
+    :param labels: Label values of the train-validation set, in row order
+    :param problem_class: 'classification' or 'regression'
+    :param val_frac: Fraction of train-validation to split into validation set
+    :param random_state: Random state used to shuffle data
+    :param n_strata: Number of label quantile strata to stratify regression labels by; None for no stratification
+    :return: train, validation tuple of integer positions into labels
+    Positions are returned in the same order as the rows of split_train_val, so results computed from them are
+    identical to the DataFrame-based split.
+    """
+    order, codes = assign_splits(labels, problem_class, val_frac=val_frac, n_strata=n_strata)
+
+    # Shuffle the grouped positions the same way DataFrame.sample does
+    permutation = np.random.RandomState(random_state).permutation(len(order))
+    order, train = order[permutation], codes[permutation] == 1
+    return order[train], order[~train]
+
+
 def validate_split_inputs(problem_class: str, k_folds: int, val_frac: float):
     """
     Check if the split inputs are valid.
@@ -111,3 +243,18 @@ def validate_split_inputs(problem_class: str, k_folds: int, val_frac: float):
     if problem_class not in ["classification", "regression"]:
         msg = "problem_class is {problem_class} but must be either 'classification' or 'regression'."
         raise ValueError(msg)
+
+
+def _make_strata(labels: np.ndarray, problem_class: str, n_strata: int = None) -> np.ndarray:
+    # Each observation's stratum: its class, its label quantile bin, or one stratum for all
+    if problem_class == "classification":
+        return labels
+    if n_strata:
+        edges = np.quantile(labels.astype(float), np.linspace(0, 1, n_strata + 1)[1:-1])
+        return np.searchsorted(edges, labels, side="right")
+    return np.zeros(len(labels), dtype=int)
+
+
+def _code_dtype(k_folds: int) -> np.dtype:
+    # Smallest signed integer dtype that holds fold codes 1 to k_folds, or train-validation codes 0 and 1
+    return np.promote_types(np.min_scalar_type(k_folds or 1), np.int8)
@@ -14,11 +14,16 @@ def get_standardization_cols(data: pd.DataFrame, feature_cols: list) -> list:
     :param data: Dataframe to get standardization columns
     :param feature_cols: List of feature columns
     :return: List of columns to be standardized
+    Boolean columns, like those of pd.get_dummies, are skipped without a scan; only the remaining columns are scanned
+    for a minimum of 0 and a maximum of 1.
     """
+    skip = {"fold", "index", "train"}
+    feature_cols = set(feature_cols)
+    candidates = [x for x in data if x in feature_cols and x not in skip and not pd.api.types.is_bool_dtype(data[x])]
+
     # Exclude Boolean columns from standardization
-    mask = (data.min() == 0) & (data.max() == 1)
-    standardization_cols = [x for x in mask[~mask].index if x not in ["fold", "index", "train"] and x in feature_cols]
-    return data[standardization_cols].columns.tolist()
+    mask = (data[candidates].min() == 0) & (data[candidates].max() == 1)
+    return mask[~mask].index.tolist()
 
 
 def get_standardization_params(data: pd.DataFrame) -> tuple:
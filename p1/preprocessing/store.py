@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""Peter Rasmussen, Programming Assignment 1, store.py
+
+This module provides the ColumnStore class, a typed columnar binary copy of the catalog datasets.
+
+Each dataset is ingested once into its own directory: one .npy file per column plus a JSON sidecar with column names,
+dtypes, and the size and modification time of the source file. Numeric columns are stored in the dtypes load parses
+them with; string columns are stored as integer codes, with their levels in the sidecar. Columns are read through
+memory maps, so a load reads only the columns it asks for, and worker processes share the page cache of one copy.
+
+"""
+# Standard library imports
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+import tempfile
+import typing as t
+
+# Third party libraries
+import numpy as np
+import pandas as pd
+
+# Bump whenever the store layout changes so that stale stores are never read
+STORE_VERSION = 1
+
+
+class ColumnStore:
+    """
+    Write and read catalog datasets as one memory-mappable .npy file per column.
+    """
+
+    def __init__(self, store_dir: Path):
+        """
+        Instantiate the ColumnStore object.
+        :param store_dir: Directory that holds one subdirectory per ingested dataset
+        """
+        self.store_dir = Path(store_dir)
+
+    def __repr__(self):
+        return f"ColumnStore({self.store_dir})"
+
+    @staticmethod
+    def fingerprint(dataset_src: Path, dataset_meta: dict) -> str:
+        """
+        Hash the source file's size and modification time and the catalog entry the parsed columns depend on.
+        :param dataset_src: Path to the raw dataset file
+        :param dataset_meta: Data catalog entry of the dataset, including its names_meta
+        :return: Hex digest
+        """
+        stat = os.stat(dataset_src)
+        params = {"version": STORE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                  "dataset_meta": dataset_meta}
+        return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+    def write(self, dataset_name: str, data: pd.DataFrame, fingerprint: str) -> Path:
+        """
+        Write a loaded dataset column by column.
+        :param dataset_name: Name of the dataset in the data catalog
+        :param data: Dataset as returned by Preprocessor.load
+        :param fingerprint: Fingerprint of the source from fingerprint
+        :return: Directory of the dataset's columns
+        """
+        columns = []
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(dir=self.store_dir))
+        for i, col in enumerate(data.columns):
+            series = data[col]
+            entry = {"name": col, "dtype": str(series.dtype), "file": f"col{i}.npy", "levels": None}
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+                values = series.to_numpy()
+            else:
+                codes, levels = pd.factorize(series, use_na_sentinel=True)
+                values = codes.astype(self._code_dtype(len(levels)))
+                entry["levels"] = [str(level) for level in levels]
+            np.save(tmp_dir / entry["file"], np.ascontiguousarray(values), allow_pickle=False)
+            columns.append(entry)
+        with open(tmp_dir / "meta.json", "w") as file:
+            json.dump({"fingerprint": fingerprint, "n_rows": len(data), "columns": columns}, file)
+
+        # Swap the new directory in so that readers never see a partial dataset
+        dst = self.store_dir / dataset_name
+        if dst.exists():
+            shutil.rmtree(dst)
+        os.replace(tmp_dir, dst)
+        logging.debug(f"Store {dataset_name}: {len(data)} rows, {len(columns)} columns.")
+        return dst
+
+    def read(self, dataset_name: str, fingerprint: str = None, columns: list = None) -> t.Union[pd.DataFrame, None]:
+        """
+        Read a dataset, or some of its columns, through memory maps.
+        :param dataset_name: Name of the dataset in the data catalog
+        :param fingerprint: Fingerprint of the current source; None to skip the staleness check
+        :param columns: Columns to read; None to read every column
+        :return: Dataframe with the same columns and dtypes as Preprocessor.load, or None if the dataset is not
+            ingested or its source has changed since
+        """
+        meta = self.read_meta(dataset_name)
+        if meta is None or (fingerprint is not None and meta["fingerprint"] != fingerprint):
+            return None
+        entries = {entry["name"]: entry for entry in meta["columns"]}
+        names = list(entries) if columns is None else list(columns)
+        data = {}
+        for col in names:
+            entry = entries[col]
+            values = np.load(self.store_dir / dataset_name / entry["file"], mmap_mode="r", allow_pickle=False)
+            if entry["levels"] is None:
+                data[col] = pd.Series(values, copy=True)
+            else:
+                data[col] = pd.Categorical.from_codes(values, entry["levels"])
+        data = pd.DataFrame(data, index=pd.RangeIndex(meta["n_rows"]), columns=names)
+        for col in names:
+            if entries[col]["levels"] is not None:
+                data[col] = data[col].astype(entries[col]["dtype"])
+        return data
+
+    def read_meta(self, dataset_name: str) -> t.Union[dict, None]:
+        """
+        Read the sidecar of an ingested dataset.
+        :param dataset_name: Name of the dataset in the data catalog
+        :return: Sidecar dict, or None if the dataset is not ingested
+        """
+        meta_path = self.store_dir / dataset_name / "meta.json"
+        if not meta_path.exists():
+            return None
+        with open(meta_path) as file:
+            return json.load(file)
+
+    @staticmethod
+    def _code_dtype(n_levels: int) -> np.dtype:
+        return next(np.dtype(x) for x in [np.int8, np.int16, np.int32] if n_levels <= np.iinfo(x).max)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Peter Rasmussen, Programming Assignment 1, streaming.py
+
+This module provides the RunningStats class, an online accumulator of per-column counts, means, and variances used
+to impute and standardize datasets that are processed chunk by chunk.
+
+"""
+# Third party libraries
+import numpy as np
+import pandas as pd
+
+
+class RunningStats:
+    """
+    Accumulate per-column count, mean, and sum of squared deviations (M2) over chunks of a dataframe.
+    Infinite and missing values are skipped. Chunks and partial accumulators are combined with Chan et al.'s
+    parallel update, so memory is proportional to the number of columns rather than the number of rows.
+    """
+
+    def __init__(self):
+        """
+        Instantiate the RunningStats object.
+        """
+        self.count: pd.Series = None
+        self.mean: pd.Series = None
+        self.m2: pd.Series = None
+
+    def __repr__(self):
+        n_cols = 0 if self.count is None else len(self.count)
+        return f"RunningStats({n_cols} columns)"
+
+    def update(self, data: pd.DataFrame) -> "RunningStats":
+        """
+        Fold a chunk of numeric columns into the statistics.
+        :param data: Chunk of numeric columns
+        :return: Updated statistics
+        """
+        values = data.astype(float).replace([np.inf, -np.inf], np.nan)
+        chunk = RunningStats()
+        chunk.count = values.count().astype(float)
+        chunk.mean = values.mean().fillna(0.0)
+        chunk.m2 = ((values - chunk.mean) ** 2).sum()
+        return self.merge(chunk)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """
+        Combine another accumulator, e.g. one computed on a different chunk or shard, into this one.
+        :param other: Statistics to combine
+        :return: Combined statistics
+        """
+        if other.count is None:
+            return self
+        if self.count is None:
+            self.count, self.mean, self.m2 = other.count.copy(), other.mean.copy(), other.m2.copy()
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        weight = (other.count / count).fillna(0.0)
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * weight
+        self.count = count
+        return self
+
+    @property
+    def means(self) -> pd.Series:
+        """
+        Per-column means; columns without observed values are NaN.
+        """
+        return self.mean.where(self.count > 0)
+
+    @property
+    def std_devs(self) -> pd.Series:
+        """
+        Per-column sample standard deviations (ddof=1), matching DataFrame.std.
+        """
+        return np.sqrt(self.m2 / (self.count - 1)).where(self.count > 1)
+
+    def to_dict(self) -> dict:
+        """
+        Convert the statistics to JSON-serializable builtins.
+        :return: Dictionary of per-column count, mean, and M2 that from_dict restores exactly
+        """
+        if self.count is None:
+            return {}
+        return {"count": self.count.to_dict(), "mean": self.mean.to_dict(), "m2": self.m2.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state: dict) -> "RunningStats":
+        """
+        Restore statistics saved with to_dict.
+        :param state: Dictionary from to_dict
+        :return: RunningStats object
+        """
+        stats = cls()
+        if state:
+            stats.count, stats.mean, stats.m2 = (pd.Series(state[x], dtype=float) for x in ["count", "mean", "m2"])
+        return stats
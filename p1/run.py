@@ -8,17 +8,29 @@ Outputs are saved to the user-specified directory.
 
 # Standard library imports
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import copy
 import json
 import logging
+import logging.handlers
+import multiprocessing
 import os
 from pathlib import Path
+import tracemalloc
+import typing as t
 
 # Third party imports
+import numpy as np
 import pandas as pd
 
 # Local imports
-from p1.preprocessing import Preprocessor, get_standardization_cols, get_standardization_params, standardize, split_train_val
-from p1.algorithms import MajorityPredictor
+from p1.preprocessing import (FOLD_ASSIGNMENTS, ColumnStore, FoldMatrix, PreprocessingCache, Preprocessor,
+                              split_train_val_hashed, split_train_val_indices)
+from p1.algorithms import MajorityPredictor, score_majority_cv
+from p1.checkpoint import RunCheckpoint
+from p1.incremental import update_dataset
+from p1.instrumentation import TimingCollector, measure, profile
+from p1.prefetch import prefetch
 
 
 def run(
@@ -27,6 +39,19 @@ def run(
         k_folds: int,
         val_frac: float,
         random_state: int,
+        n_jobs: int = 1,
+        cache_dir: Path = None,
+        compact_dtypes: bool = False,
+        timings: bool = False,
+        profile_dir: Path = None,
+        batched: bool = False,
+        store_dir: Path = None,
+        resume: bool = False,
+        prefetch_depth: int = 2,
+        fold_assignment: str = "shuffle",
+        incremental: bool = False,
+        encoding: str = "dense",
+        trace_memory: bool = False,
 ):
     """
     Train and score a majority predictor across six datasets.
@@ -35,6 +60,29 @@ def run(
     :param k_folds: Number of folds to partition the data into
     :param val_frac: Validation fraction of train-validation set
     :param random_state: Random number seed
+    :param n_jobs: Number of worker processes; 1 runs everything in this process, -1 uses every CPU
+    :param cache_dir: Directory of the preprocessed dataset cache; None disables caching
+    :param compact_dtypes: True to load and keep data in the smallest safe dtypes
+    :param timings: True to save the measurements of every preprocessing stage and fold phase to timings.csv
+    :param profile_dir: Directory to save cProfile dumps of each dataset's preprocessing and each fold to; None to
+        not profile
+    :param batched: True to score every fold of a dataset at once with score_majority_cv; datasets are then
+        processed in this process
+    :param store_dir: Column store written by ingest; datasets missing from it or changed since are parsed from text
+    :param resume: True to skip the folds an interrupted run with the same configuration already wrote to
+        <dst_dir>/.checkpoints
+    :param prefetch_depth: Number of datasets that threads load ahead of the one being scored when datasets are
+        processed in this process; 0 to load each dataset when its turn comes
+    :param fold_assignment: 'shuffle' to shuffle each dataset and split it into folds by position; 'hash' or
+        'hash_stratified' to assign folds and train-validation splits from seeded hashes of each row's id columns or
+        content, see split.assign_hash_splits
+    :param incremental: True to update each dataset's fold scores from the rows appended to it since the last
+        incremental run, whose state is kept in <dst_dir>/.incremental; requires fold_assignment='hash' and scores
+        folds as batched does
+    :param encoding: 'dense' to one-hot encode categorical columns with pd.get_dummies; 'codes' to keep them as
+        integer codes that FoldMatrix expands to indicator columns per split
+    :param trace_memory: True to trace allocations with tracemalloc, so that timings.csv also holds the traced peak
+        of every stage; tracing slows the run down
 
     """
     dir_path = Path(os.path.dirname(os.path.realpath(__file__)))
@@ -50,99 +98,503 @@ def run(
 
     with open(src_dir / "data_catalog.json", "r") as file:
         data_catalog = json.load(file)
+    if incremental and (fold_assignment != "hash" or compact_dtypes):
+        raise ValueError("Incremental runs need fold_assignment='hash' and full-precision dtypes.")
+
+    cache = PreprocessingCache(cache_dir) if cache_dir is not None else None
+
+    # Append each finished fold to disk, keyed by a hash of everything the output depends on
+    config = RunCheckpoint.make_config(src_dir, data_catalog, discretize_dicts, k_folds=k_folds, val_frac=val_frac,
+                                       random_state=random_state, batched=batched, compact_dtypes=compact_dtypes,
+                                       fold_assignment=fold_assignment, incremental=incremental)
+    checkpoint = RunCheckpoint(dst_dir / ".checkpoints", config, resume=resume)
+    units = [(dataset_name, fold) for dataset_name in data_catalog for fold in range(1, k_folds + 1)]
+
+    # Gather the measurements logged by every stage, including those of worker processes
+    collector = TimingCollector()
+    if timings:
+        logging.getLogger("p1.instrumentation").setLevel(logging.DEBUG)
+        logging.getLogger().addHandler(collector)
+    tracing = timings and trace_memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+
+    # Train and score every fold of every dataset, one after another or in a process pool
+    n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+    if incremental:
+        # Parse only the rows appended to each dataset and update its fold scores from stored statistics
+        for dataset_name, dataset_meta in data_catalog.items():
+            rows = update_dataset(dst_dir / ".incremental", dataset_name, dataset_meta, src_dir, k_folds,
+                                  random_state, discretize_dicts[dataset_name])
+            checkpoint.append({(dataset_name, row[2]): [row] for row in rows})
+    elif n_jobs > 1 and not batched:
+        run_parallel(data_catalog, discretize_dicts, src_dir, k_folds, val_frac, random_state, n_jobs, cache=cache,
+                     compact_dtypes=compact_dtypes, profile_dir=profile_dir, store_dir=store_dir,
+                     checkpoint=checkpoint, fold_assignment=fold_assignment, encoding=encoding,
+                     trace_memory=tracing)
+    else:
+        # Loop over each dataset and its metadata using the data_catalog, skipping checkpointed folds, while
+        # threads load the next datasets
+        pending = {dataset_name: [fold for fold in range(1, k_folds + 1) if not checkpoint.done((dataset_name, fold))]
+                   for dataset_name in data_catalog}
+        for dataset_name in [x for x in data_catalog if not pending[x]]:
+            logging.debug(f"Skip dataset {dataset_name}: every fold is checkpointed.")
+        items = [(dataset_name, dataset_meta, src_dir, discretize_dicts[dataset_name], k_folds, random_state, cache,
+                  compact_dtypes, store_dir, fold_assignment, encoding)
+                 for dataset_name, dataset_meta in data_catalog.items() if pending[dataset_name]]
+        for args, loaded in prefetch(load_dataset, items, prefetch_depth):
+            dataset_name, folds = args[0], pending[args[0]]
+            fold_matrix = call_profiled(_profile_path(profile_dir, dataset_name), preprocess_dataset, *args, loaded)
+
+            # Score every fold at once, or iterate over each fold
+            if batched:
+                rows = score_folds_batched(fold_matrix, dataset_name)
+                checkpoint.append({(dataset_name, row[2]): [row] for row in rows if row[2] in folds})
+                continue
+            for fold in folds:
+                row = call_profiled(_profile_path(profile_dir, dataset_name, fold), score_fold,
+                                    fold_matrix, dataset_name, fold, val_frac, random_state)
+                checkpoint.append({(dataset_name, fold): [row]})
 
-    # Initialize the list to hold our outputs
-    output = []
+    logging.debug("Process outputs.")
+    # Organize outputs, including the folds of earlier attempts
+    output = checkpoint.rows(units)
+    output_df = pd.DataFrame(output, columns=["dataset_name", "problem_class", "fold", "test_score", "beta"])
 
-    # Loop over each dataset and its metadata using the data_catalog
-    for dataset_name, dataset_meta in data_catalog.items():
-        logging.debug(f"Load and process dataset {dataset_name}.")
+    # Compute mean test score across folds for each dataset
+    summary = output_df.groupby(["problem_class", "dataset_name"])["test_score"].mean().to_frame().round(2)
+
+    # Save outputs, and only then mark the run complete so that an interrupted write is redone on resume
+    logging.debug("Save outputs.")
+    output_dst = dst_dir / "output.csv"
+    summary_dst = dst_dir / "summary.csv"
+    output_df.to_csv(output_dst)
+    summary.to_csv(summary_dst)
+    if tracing:
+        tracemalloc.stop()
+    if timings:
+        logging.getLogger().removeHandler(collector)
+        collector.to_frame().to_csv(dst_dir / "timings.csv", index=False)
+    checkpoint.complete()
 
-        # Load data: Set column names, data types, and replace values
+    logging.debug("Finish.\n")
+
+
+def ingest(src_dir: Path, store_dir: Path, dataset_names: list = None) -> pd.DataFrame:
+    """
+    Parse each catalog dataset once and write it to a column store that load reads through memory maps.
+    :param src_dir: Input directory that provides each dataset and params files
+    :param store_dir: Column store directory
+    :param dataset_names: Datasets to ingest; None to ingest every catalog dataset
+    :return: Dataframe of the rows, columns, and bytes stored for each dataset
+    """
+    with open(src_dir / "data_catalog.json", "r") as file:
+        data_catalog = json.load(file)
+    store = ColumnStore(store_dir)
+    report = []
+    for dataset_name, dataset_meta in data_catalog.items():
+        if dataset_names is not None and dataset_name not in dataset_names:
+            continue
         preprocessor = Preprocessor(dataset_name, dataset_meta, src_dir)
-        preprocessor.load()
+        data = preprocessor.load()
+        dst = store.write(dataset_name, data, store.fingerprint(preprocessor.dataset_src, dataset_meta))
+        n_bytes = sum(path.stat().st_size for path in dst.glob("*.npy"))
+        report.append([dataset_name, len(data), len(data.columns), n_bytes])
+    return pd.DataFrame(report, columns=["dataset_name", "rows", "columns", "bytes"])
+
 
-        # Identify which columns are features, which is the label, and any ID columns
-        preprocessor.identify_features_label_id()
+def preprocess_dataset(
+        dataset_name: str,
+        dataset_meta: dict,
+        src_dir: Path,
+        discretize_dict: dict,
+        k_folds: int,
+        random_state: int,
+        cache: PreprocessingCache = None,
+        compact_dtypes: bool = False,
+        store_dir: Path = None,
+        fold_assignment: str = "shuffle",
+        encoding: str = "dense",
+        loaded: tuple = None,
+) -> FoldMatrix:
+    """
+    Load and preprocess one catalog dataset and assign each observation to a fold.
+    :param dataset_name: Name of the dataset in the data catalog
+    :param dataset_meta: Data catalog entry of the dataset
+    :param src_dir: Input directory that provides the dataset
+    :param discretize_dict: Discretization parameters of the dataset
+    :param k_folds: Number of folds to partition the data into
+    :param random_state: Random number seed
+    :param cache: Optional cache of preprocessed datasets
+    :param compact_dtypes: True to load and keep data in the smallest safe dtypes
+    :param store_dir: Optional column store to load the dataset from
+    :param fold_assignment: 'shuffle', 'hash', or 'hash_stratified'; see run
+    :param encoding: 'dense' or 'codes'; see run
+    :param loaded: Return value of load_dataset called with the same arguments, e.g. by a prefetching thread; None
+        to load the dataset here
+    :return: FoldMatrix of the preprocessed dataset
+    """
+    problem_class = dataset_meta["problem_class"]  # regression or classification
+    if loaded is None:
+        loaded = load_dataset(dataset_name, dataset_meta, src_dir, discretize_dict, k_folds, random_state, cache,
+                              compact_dtypes, store_dir, fold_assignment, encoding)
+    key, loaded = loaded
 
-        # Replace values: Ordinal strings (lower, higher) replace with numeric values
-        preprocessor.replace()
+    # Reuse the preprocessed dataset if nothing it depends on has changed
+    if isinstance(loaded, FoldMatrix):
+        return loaded
 
-        # Log transform indicated columns (default is to take selected columns from dataset_meta)
-        preprocessor.log_transform()
+    logging.debug(f"Process dataset {dataset_name}.")
+    preprocessor = prepare_dataset(dataset_name, dataset_meta, src_dir, discretize_dict, compact_dtypes,
+                                   store_dir, preprocessor=loaded, fold_assignment=fold_assignment,
+                                   encoding=encoding)
+    data = assign_folds(preprocessor, k_folds, random_state, compact_dtypes, fold_assignment)
 
-        # Impute missing values
-        preprocessor.impute()
+    # Define each column as a feature, label, or index
+    feature_cols = preprocessor.features
+    label_col = preprocessor.label
 
-        # Dummy categorical columns
-        preprocessor.dummy()
+    if cache is not None:
+        cache.save(key, data, {"features": feature_cols, "label": label_col})
 
-        # Discretize indicated columns
-        preprocessor.discretize(discretize_dicts[dataset_name])
+    # Gather the features into one matrix and compute fold membership as index arrays
+    return FoldMatrix(data, feature_cols, label_col, k_folds, problem_class=problem_class,
+                      fold_assignment=fold_assignment)
 
-        # Randomize the order of the data
-        preprocessor.shuffle(random_state=random_state)
 
-        # Make K folds and assign each observation to one
+def load_dataset(
+        dataset_name: str,
+        dataset_meta: dict,
+        src_dir: Path,
+        discretize_dict: dict,
+        k_folds: int,
+        random_state: int,
+        cache: PreprocessingCache = None,
+        compact_dtypes: bool = False,
+        store_dir: Path = None,
+        fold_assignment: str = "shuffle",
+        encoding: str = "dense",
+) -> tuple:
+    """
+    Run the I/O of preprocess_dataset: read the preprocessed dataset from the cache, or else load the raw dataset.
+    :param dataset_name: Name of the dataset in the data catalog
+    :param dataset_meta: Data catalog entry of the dataset
+    :param src_dir: Input directory that provides the dataset
+    :param discretize_dict: Discretization parameters of the dataset
+    :param k_folds: Number of folds to partition the data into
+    :param random_state: Random number seed
+    :param cache: Optional cache of preprocessed datasets
+    :param compact_dtypes: True to load and keep data in the smallest safe dtypes
+    :param store_dir: Optional column store to load the dataset from
+    :param fold_assignment: 'shuffle', 'hash', or 'hash_stratified'; see run
+    :param encoding: 'dense' or 'codes'; see run
+    :return: Tuple of the cache key (None without a cache) and either the cached FoldMatrix or a Preprocessor
+        holding the loaded data
+    """
+    key = None
+    if cache is not None:
+        key = cache.make_key(Path(src_dir) / dataset_meta["data_filename"], dataset_meta, discretize_dict,
+                             random_state, k_folds, compact_dtypes=compact_dtypes,
+                             fold_assignment=fold_assignment, encoding=encoding)
+        with measure("cache_load", dataset_name=dataset_name) as record:
+            data, meta = cache.load(key)
+            record["rows_out"] = None if data is None else len(data)
+        if data is not None:
+            logging.debug(f"Load dataset {dataset_name} from cache.")
+            return key, FoldMatrix(data, meta["features"], meta["label"], k_folds,
+                                   problem_class=dataset_meta["problem_class"], fold_assignment=fold_assignment)
+
+    logging.debug(f"Load dataset {dataset_name}.")
+    preprocessor = Preprocessor(dataset_name, dataset_meta, src_dir, store_dir=store_dir)
+    preprocessor.load(compact=compact_dtypes)
+    return key, preprocessor
+
+
+def prepare_dataset(
+        dataset_name: str,
+        dataset_meta: dict,
+        src_dir: Path,
+        discretize_dict: dict,
+        compact_dtypes: bool = False,
+        store_dir: Path = None,
+        preprocessor: Preprocessor = None,
+        fold_assignment: str = "shuffle",
+        encoding: str = "dense",
+) -> Preprocessor:
+    """
+    Run the preprocessing stages of one catalog dataset that do not depend on the seed or the number of folds.
+    :param dataset_name: Name of the dataset in the data catalog
+    :param dataset_meta: Data catalog entry of the dataset
+    :param src_dir: Input directory that provides the dataset
+    :param discretize_dict: Discretization parameters of the dataset
+    :param compact_dtypes: True to load and keep data in the smallest safe dtypes
+    :param store_dir: Optional column store to load the dataset from
+    :param preprocessor: Preprocessor whose data is already loaded with compact=compact_dtypes; None to load it here
+    :param fold_assignment: 'shuffle', 'hash', or 'hash_stratified'; if hash-based, rows are hashed as loaded
+    :param encoding: 'dense' or 'codes'; see run
+    :return: Preprocessor holding the loaded, replaced, log transformed, imputed, dummied, and discretized data
+    """
+    # Load data: Set column names, data types, and replace values
+    if preprocessor is None:
+        preprocessor = Preprocessor(dataset_name, dataset_meta, src_dir, store_dir=store_dir)
+        preprocessor.load(compact=compact_dtypes)
+
+    # Hash the rows before any transformation that depends on other rows, so that hashes stay stable
+    if fold_assignment != "shuffle" and preprocessor.row_hashes is None:
+        preprocessor.hash_rows()
+
+    # Identify which columns are features, which is the label, and any ID columns
+    preprocessor.identify_features_label_id()
+
+    # Replace values (ordinal strings become numeric values), log transform indicated columns, and impute missing
+    # values, all in one pass over each column
+    preprocessor.transform_columns()
+
+    # Dummy categorical columns
+    preprocessor.dummy(encoding=encoding)
+
+    # Discretize indicated columns
+    preprocessor.discretize(discretize_dict)
+
+    # Shrink the model matrix to the smallest safe dtypes
+    if compact_dtypes:
+        report = preprocessor.compact()
+        logging.debug(f"Dataset {dataset_name} memory: load {preprocessor.memory_report[0]['after']} bytes, "
+                      f"before compaction {report['before']} bytes, after compaction {report['after']} bytes.")
+    return preprocessor
+
+
+def assign_folds(preprocessor: Preprocessor, k_folds: int, random_state: int,
+                 compact_dtypes: bool = False, fold_assignment: str = "shuffle") -> pd.DataFrame:
+    """
+    Shuffle a prepared dataset and assign each observation to a fold, leaving the preprocessor itself untouched.
+    :param preprocessor: Preprocessor returned by prepare_dataset
+    :param k_folds: Number of folds to partition the data into
+    :param random_state: Random number seed
+    :param compact_dtypes: True if the data was prepared with compact dtypes
+    :param fold_assignment: 'shuffle', or 'hash' or 'hash_stratified' to assign folds from the seeded row hashes of
+        a preprocessor prepared with the same fold_assignment, without shuffling
+    :return: Shuffled dataframe with a fold column, plus a row_hash column if folds are hash-based
+    """
+    if fold_assignment not in FOLD_ASSIGNMENTS:
+        raise ValueError(f"{fold_assignment} fold assignment is not supported / unknown to this implementation.")
+    preprocessor = copy.copy(preprocessor)
+
+    # Make K folds and assign each observation to one, from row hashes or after randomizing the order of the data
+    if fold_assignment == "shuffle":
+        preprocessor.shuffle(random_state=random_state)
         preprocessor.make_folds(k_folds)
+    else:
+        preprocessor.make_hash_folds(k_folds, random_state, stratify=fold_assignment == "hash_stratified")
 
-        # Extract dataframe from preprocessor object
-        data = preprocessor.data.copy()
-
-        # Define each column as a feature, label, or index
-        feature_cols = preprocessor.features
-        label_col = preprocessor.label
-        problem_class = dataset_meta["problem_class"]  # regression or classification
-        if problem_class == "classification":
-            data[label_col] = data[label_col].astype(int)
-
-        # Iterate over each fold
-        for fold in range(1, k_folds + 1):
-            # Split test and train-validation sets
-            mask = data["fold"] == fold
-            test = data.copy()[mask]
-            train_val = data.copy()[~mask]
-
-            # Get standardization parameters from training-validation set
-            cols = get_standardization_cols(train_val, feature_cols)
-            means, std_devs = get_standardization_params(data.copy()[cols])
-
-            # Standardize data
-            test = test.drop(axis=1, labels=cols).join(standardize(test[cols], means, std_devs))
-            train_val = train_val.drop(axis=1, labels=cols).join(standardize(train_val[cols], means, std_devs))
-
-            # Split train and validation sets
-            train, val = split_train_val(train_val, problem_class, label_col, val_frac, random_state)
-
-            # Instantiate the model object
-            predictor = MajorityPredictor(problem_class, label_col, feature_cols)
-
-            # Train the model
-            predictor.train(train[feature_cols], train[label_col])
-
-            # Predict
-            predictor = MajorityPredictor(problem_class, label_col, feature_cols)
-            predictor.train(train[feature_cols], train[label_col])
-            predictor.tune(train[feature_cols], val[feature_cols], train[label_col], val[label_col])
-            y_test_pred = predictor.predict(test)
-            y_test_truth = test.copy()[label_col]
-            test_score = predictor.score(y_test_pred, y_test_truth)
-            output_li = [dataset_name, problem_class, fold, test_score, predictor.beta]
-            output.append(output_li)
-            logging.info(f"Dataset {dataset_name}: fold: {fold}, score: {test_score}.")
+    # Extract dataframe from preprocessor object
+    data = preprocessor.data
+    if preprocessor.dataset_meta["problem_class"] == "classification":
+        labels = data[preprocessor.label].astype(int)
+        data[preprocessor.label] = pd.to_numeric(labels, downcast="integer") if compact_dtypes else labels
+    return data
 
-    logging.debug("Process outputs.")
-    # Organize outputs
-    output_df = pd.DataFrame(output, columns=["dataset_name", "problem_class", "fold", "test_score", "beta"])
 
-    # Compute mean test score across folds for each dataset
-    summary = output_df.groupby(["problem_class", "dataset_name"])["test_score"].mean().to_frame().round(2)
+def score_fold(fold_matrix: FoldMatrix, dataset_name: str, fold: int, val_frac: float, random_state: int) -> list:
+    """
+    Train, tune, and score a majority predictor on one fold.
+    :param fold_matrix: FoldMatrix of the preprocessed dataset
+    :param dataset_name: Name of the dataset in the data catalog
+    :param fold: 1-indexed fold used as the test set
+    :param val_frac: Validation fraction of train-validation set
+    :param random_state: Random number seed
+    :return: Output row of dataset name, problem class, fold, test score, and beta
+    """
+    problem_class = fold_matrix.problem_class
+    feature_cols, label_col = fold_matrix.feature_cols, fold_matrix.label_col
+    context = {"dataset_name": dataset_name, "fold": fold}
+
+    # Split test and train-validation sets
+    with measure("split", len(fold_matrix.y), **context) as record:
+        test_rows, train_val_rows = fold_matrix.split(fold)
+        record["rows_out"] = len(train_val_rows)
+
+    # Get standardization parameters from training-validation set
+    with measure("standardize_params", len(train_val_rows), **context) as record:
+        shifts, scales = fold_matrix.get_standardization_params(fold)
+        y_train_val = fold_matrix.labels(train_val_rows, shifts, scales)
+        record["rows_out"] = len(y_train_val)
+
+    # Split train and validation sets
+    with measure("split_train_val", len(train_val_rows), **context) as record:
+        if fold_matrix.hashes is None:
+            train_pos, val_pos = split_train_val_indices(y_train_val, problem_class, val_frac, random_state)
+        else:
+            stratify = fold_matrix.fold_assignment == "hash_stratified"
+            train_pos, val_pos = split_train_val_hashed(fold_matrix.hashes[train_val_rows], y_train_val.to_numpy(),
+                                                        problem_class, val_frac, random_state, stratify=stratify)
+        train_rows, val_rows = train_val_rows[train_pos], train_val_rows[val_pos]
+        record["rows_out"] = len(train_rows)
+
+    # Standardize data
+    with measure("standardize", len(test_rows) + len(train_val_rows), **context) as record:
+        test = fold_matrix.features(test_rows, shifts, scales)
+        train = fold_matrix.features(train_rows, shifts, scales)
+        val = fold_matrix.features(val_rows, shifts, scales)
+        y_train, y_val = y_train_val.iloc[train_pos], y_train_val.iloc[val_pos]
+        record["rows_out"] = len(test) + len(train) + len(val)
+
+    # Instantiate the model object
+    predictor = MajorityPredictor(problem_class, label_col, feature_cols)
+
+    # Train and tune the model
+    with measure("train", len(train), **context):
+        predictor.train(train, y_train)
+    with measure("tune", len(train) + len(val), **context):
+        predictor.tune(train, val, y_train, y_val)
+
+    # Predict
+    with measure("predict", len(test), **context) as record:
+        y_test_pred = predictor.predict(test)
+        record["rows_out"] = len(y_test_pred)
+    with measure("score", len(test), **context):
+        y_test_truth = fold_matrix.labels(test_rows, shifts, scales)
+        test_score = predictor.score(y_test_pred, y_test_truth)
+    logging.info(f"Dataset {dataset_name}: fold: {fold}, score: {test_score}.")
+    return [dataset_name, problem_class, fold, test_score, predictor.beta]
+
+
+def score_folds_batched(fold_matrix: FoldMatrix, dataset_name: str) -> list:
+    """
+    Score a majority predictor on every fold of a dataset at once.
+    :param fold_matrix: FoldMatrix of the preprocessed dataset
+    :param dataset_name: Name of the dataset in the data catalog
+    :return: Output rows of dataset name, problem class, fold, test score, and beta, as score_fold returns them
+    The tuned beta of score_fold is the mode or mean of the whole train-validation set, so the train-validation
+    split does not change the result. Regression rows match score_fold to the tolerances of score_majority_cv.
+    """
+    problem_class, pos = fold_matrix.problem_class, fold_matrix.label_pos
+    label_params = None
+    if pos is not None:
+        params = [fold_matrix.get_standardization_params(fold) for fold in range(1, fold_matrix.k_folds + 1)]
+        label_params = (np.array([[x[0][pos] for x in params]]), np.array([[x[1][pos] for x in params]]))
+    with measure("score_batched", len(fold_matrix.y), dataset_name=dataset_name):
+        scores = score_majority_cv(fold_matrix.y, fold_matrix.folds, problem_class, fold_matrix.k_folds,
+                                   label_params=label_params)
+    for row in scores.itertuples():
+        logging.info(f"Dataset {dataset_name}: fold: {row.fold}, score: {row.test_score}.")
+    return [[dataset_name, problem_class, row.fold, row.test_score, row.beta] for row in scores.itertuples()]
+
+
+def run_parallel(
+        data_catalog: dict,
+        discretize_dicts: dict,
+        src_dir: Path,
+        k_folds: int,
+        val_frac: float,
+        random_state: int,
+        n_jobs: int,
+        cache: PreprocessingCache = None,
+        compact_dtypes: bool = False,
+        profile_dir: Path = None,
+        store_dir: Path = None,
+        checkpoint: RunCheckpoint = None,
+        fold_assignment: str = "shuffle",
+        encoding: str = "dense",
+        trace_memory: bool = False,
+) -> list:
+    """
+    Preprocess datasets and score their folds in a process pool.
+    :param data_catalog: Data catalog keyed by dataset name
+    :param discretize_dicts: Discretization parameters keyed by dataset name
+    :param src_dir: Input directory that provides each dataset
+    :param k_folds: Number of folds to partition the data into
+    :param val_frac: Validation fraction of train-validation set
+    :param random_state: Random number seed
+    :param n_jobs: Number of worker processes
+    :param cache: Optional cache of preprocessed datasets
+    :param compact_dtypes: True to load and keep data in the smallest safe dtypes
+    :param profile_dir: Directory to save cProfile dumps to; None to not profile
+    :param store_dir: Optional column store to load datasets from
+    :param checkpoint: Optional checkpoint; its folds are skipped and each new fold is appended as soon as it finishes
+    :param fold_assignment: 'shuffle', 'hash', or 'hash_stratified'; see run
+    :param encoding: 'dense' or 'codes'; see run
+    :param trace_memory: True to trace allocations in the worker processes too
+    :return: Output rows ordered by catalog order, then fold, exactly as the sequential run orders them
+    Each preprocessed dataset fans out into one task per fold as soon as it is ready. Worker log records are sent
+    through a queue to the handlers of this process's root logger.
+    """
+    def done(unit: tuple) -> bool:
+        return checkpoint is not None and checkpoint.done(unit)
+
+    log_queue = multiprocessing.Queue()
+    listener = logging.handlers.QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+    listener.start()
+    try:
+        with ProcessPoolExecutor(n_jobs, initializer=_init_worker_logging,
+                                 initargs=(log_queue, trace_memory)) as executor:
+            # Preprocess every dataset with folds left to score
+            pending = {}
+            for dataset_name, dataset_meta in data_catalog.items():
+                if all(done((dataset_name, fold)) for fold in range(1, k_folds + 1)):
+                    continue
+                args = (dataset_name, dataset_meta, src_dir, discretize_dicts[dataset_name], k_folds, random_state,
+                        cache, compact_dtypes, store_dir, fold_assignment, encoding)
+                dst = _profile_path(profile_dir, dataset_name)
+                pending[executor.submit(call_profiled, dst, preprocess_dataset, *args)] = (dataset_name, None)
+
+            # Score the folds of each dataset as soon as it is preprocessed, and record each fold as it finishes
+            results = {}
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    dataset_name, fold = pending.pop(future)
+                    if fold is not None:
+                        results[(dataset_name, fold)] = future.result()
+                        if checkpoint is not None:
+                            checkpoint.append({(dataset_name, fold): [results[(dataset_name, fold)]]})
+                        continue
+                    fold_matrix = future.result()
+                    for fold in range(1, k_folds + 1):
+                        if done((dataset_name, fold)):
+                            continue
+                        args = (fold_matrix, dataset_name, fold, val_frac, random_state)
+                        dst = _profile_path(profile_dir, dataset_name, fold)
+                        pending[executor.submit(call_profiled, dst, score_fold, *args)] = (dataset_name, fold)
+    finally:
+        listener.stop()
+
+    # Merge results deterministically
+    units = [(dataset_name, fold) for dataset_name in data_catalog for fold in range(1, k_folds + 1)]
+    if checkpoint is not None:
+        return checkpoint.rows(units)
+    return [results[unit] for unit in units]
+
+
+def call_profiled(profile_dst: Path, func: t.Callable, *args):
+    """
+    Call a function, profiling it with cProfile if a dump path is given.
+    :param profile_dst: Path of the cProfile dump; None to not profile
+    :param func: Function to call
+    :param args: Positional arguments of func
+    :return: Return value of func
+    """
+    with profile(profile_dst):
+        return func(*args)
 
-    # Save outputs
-    logging.debug("Save outputs.")
-    output_dst = dst_dir / "output.csv"
-    summary_dst = dst_dir / "summary.csv"
-    output_df.to_csv(output_dst)
-    summary.to_csv(summary_dst)
 
-    logging.debug("Finish.\n")
+def _profile_path(profile_dir: Path, dataset_name: str, fold: int = None) -> t.Union[Path, None]:
+    if profile_dir is None:
+        return None
+    stem = dataset_name if fold is None else f"{dataset_name}_fold{fold}"
+    return Path(profile_dir) / f"{stem}.prof"
+
+
+def _init_worker_logging(log_queue: multiprocessing.Queue, trace_memory: bool = False):
+    """
+    Route the log records of a worker process to the parent process.
+    :param log_queue: Queue read by the parent's QueueListener
+    :param trace_memory: True to trace the worker's allocations, for the traced peaks of its stages
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.DEBUG)
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
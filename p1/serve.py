@@ -0,0 +1,526 @@
+"""Peter Rasmussen, Programming Assignment 1, serve.py
+
+This module serves the predictions of trained majority predictors over a local HTTP endpoint or Unix socket.
+
+A model is trained per catalog dataset on all of its rows, and saved with its fitted PreprocessingPipeline so the
+server starts without reading the data. Handler threads only parse requests and check their columns against the
+pipeline: each request is queued, and one batching thread drains everything queued at that moment, up to max_batch
+records, and predicts every dataset's records with one call to its model. A majority predictor ignores feature values,
+so records are answered from the model alone; the full pipeline transform, which costs about 10 ms per call, is opt-in
+with transform=True. The server counts requests, records, and batches and keeps recent request latencies for
+percentiles; generate_load drives it from a pool of threads with persistent connections.
+
+"""
+# Standard library imports
+from collections import defaultdict, deque
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import logging
+import os
+from pathlib import Path
+import queue
+import socket
+import socketserver
+import threading
+import time
+import typing as t
+
+# Third party imports
+import numpy as np
+import pandas as pd
+
+# Local imports
+from p1.algorithms import MajorityPredictor
+from p1.preprocessing import PreprocessingPipeline, Preprocessor
+
+
+class ServedModel:
+    """
+    A trained majority predictor and the preprocessing pipeline fitted on the same data.
+    """
+
+    def __init__(self, pipeline: PreprocessingPipeline, model: MajorityPredictor):
+        """
+        Instantiate the ServedModel object.
+        :param pipeline: Fitted preprocessing pipeline
+        :param model: Trained model
+        """
+        self.pipeline = pipeline
+        self.model = model
+        self.columns = frozenset(pipeline.names_meta.index)
+
+    def __repr__(self):
+        return f"ServedModel({self.model.problem_class}, beta={self.model.beta})"
+
+    def describe(self) -> dict:
+        """
+        Describe the model for the models endpoint.
+        :return: Dict of problem class, label, features, and beta
+        """
+        model = self.model
+        return {"problem_class": model.problem_class, "label": model.label_col, "features": model.feature_cols,
+                "beta": _to_builtin(model.beta)}
+
+
+class ServingStats:
+    """
+    Count requests, records, batches, and errors, and keep the latencies of recent requests.
+    """
+
+    def __init__(self, window: int = 100_000):
+        """
+        Instantiate the ServingStats object.
+        :param window: Number of most recent request latencies kept for percentiles
+        """
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.requests, self.records, self.batches, self.errors = 0, 0, 0, 0
+        self.latencies: t.Deque[float] = deque(maxlen=window)
+
+    def add_request(self, n_records: int, latency: float):
+        """
+        Record a served request.
+        :param n_records: Number of records predicted
+        :param latency: Seconds from the parsed request to the encoded response
+        """
+        with self.lock:
+            self.requests += 1
+            self.records += n_records
+            self.latencies.append(latency)
+
+    def add_batch(self):
+        """
+        Record a micro-batch.
+        """
+        with self.lock:
+            self.batches += 1
+
+    def add_error(self):
+        """
+        Record a rejected request.
+        """
+        with self.lock:
+            self.errors += 1
+
+    def snapshot(self) -> dict:
+        """
+        Summarize the counters.
+        :return: Dict of counts, mean batch size in requests, request and record throughput per second since the
+            server started, and latency percentiles in milliseconds over the recent window
+        """
+        with self.lock:
+            latencies = np.array(self.latencies) * 1e3
+            counts = {"requests": self.requests, "records": self.records, "batches": self.batches,
+                      "errors": self.errors}
+        seconds = time.perf_counter() - self.started
+        return {**counts, "mean_batch_size": counts["requests"] / max(counts["batches"], 1),
+                "requests_per_s": counts["requests"] / seconds, "records_per_s": counts["records"] / seconds,
+                **_percentiles(latencies)}
+
+
+class MicroBatcher:
+    """
+    Group the requests queued by handler threads into one vectorized prediction per dataset.
+    """
+
+    def __init__(self, models: t.Dict[str, ServedModel], stats: ServingStats, max_batch: int = 4096,
+                 max_wait: float = 0.0, timeout: float = 5.0, transform: bool = False):
+        """
+        Instantiate the MicroBatcher object.
+        :param models: Served models keyed by dataset name
+        :param stats: Counters of the server
+        :param max_batch: Largest number of records predicted in one batch
+        :param max_wait: Seconds to wait for more requests after the first one of a batch; 0 batches only the
+            requests already queued, which adds no latency
+        :param timeout: Seconds a request waits for its batch before predict raises TimeoutError
+        :param transform: Transform records through the fitted pipeline before predicting; otherwise only the number
+            of validated records reaches the model
+        """
+        self.models = models
+        self.stats = stats
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.transform = transform
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+
+    def start(self) -> "MicroBatcher":
+        """
+        Start the batching thread.
+        :return: Started batcher
+        """
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop the batching thread once the requests queued before it are predicted.
+        """
+        self.queue.put(None)
+        self.thread.join()
+
+    def predict(self, dataset_name: str, records: list) -> np.ndarray:
+        """
+        Queue records for the next batch and wait for their predictions.
+        :param dataset_name: Name of a served dataset
+        :param records: Raw record dicts
+        :return: Array of predictions
+        An exception raised while predicting the batch is raised here, in the thread of the request.
+        """
+        pending = _Pending(dataset_name, records)
+        self.queue.put(pending)
+        if not pending.done.wait(self.timeout):
+            raise TimeoutError(f"No prediction for {dataset_name} within {self.timeout} seconds.")
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self.stats.add_batch()
+
+            # One prediction per dataset, split back into the requests' slices
+            by_dataset = defaultdict(list)
+            for pending in batch:
+                by_dataset[pending.dataset_name].append(pending)
+            for dataset_name, pendings in by_dataset.items():
+                try:
+                    served = self.models[dataset_name]
+                    records = [record for pending in pendings for record in pending.records]
+                    if self.transform:
+                        data = served.pipeline.transform(pd.DataFrame.from_records(records))
+                        preds = served.model.predict(data[served.model.feature_cols]).to_numpy()
+                    else:
+                        preds = served.model.predict_values(len(records))
+                    sizes = [len(x.records) for x in pendings]
+                    for pending, result in zip(pendings, np.split(preds, np.cumsum(sizes)[:-1])):
+                        pending.result = result
+                except Exception as exc:
+                    # Fail the requests of this dataset only and keep the batcher running
+                    logging.exception(f"Dataset {dataset_name}: batch of {len(pendings)} requests failed.")
+                    for pending in pendings:
+                        pending.error = exc
+                finally:
+                    for pending in pendings:
+                        pending.done.set()
+
+    def _next_batch(self) -> t.Union[list, None]:
+        # Block for the first request, then take what else is queued, waiting up to max_wait for more
+        pending = self.queue.get()
+        if pending is None:
+            return None
+        batch, n_records = [pending], len(pending.records)
+        deadline = time.perf_counter() + self.max_wait
+        while n_records < self.max_batch:
+            try:
+                timeout = deadline - time.perf_counter()
+                pending = self.queue.get(timeout=timeout) if timeout > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is None:
+                self.queue.put(None)
+                break
+            batch.append(pending)
+            n_records += len(pending.records)
+        return batch
+
+
+class _Pending:
+    __slots__ = ("dataset_name", "records", "done", "result", "error")
+
+    def __init__(self, dataset_name: str, records: list):
+        self.dataset_name = dataset_name
+        self.records = records
+        self.done = threading.Event()
+        self.result: t.Union[np.ndarray, None] = None
+        self.error: t.Union[Exception, None] = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    Route GET /models, GET /stats, and POST /predict/<dataset_name> of a body {"records": [...]} or a single record.
+    """
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == "/models":
+            self._send(200, {name: served.describe() for name, served in self.server.models.items()})
+        elif self.path == "/stats":
+            self._send(200, self.server.stats.snapshot())
+        else:
+            self._error(404, f"Unknown path {self.path}.")
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        start = time.perf_counter()
+        dataset_name = self.path[len("/predict/"):] if self.path.startswith("/predict/") else None
+        served = self.server.models.get(dataset_name)
+        if served is None:
+            return self._error(404, f"Unknown path {self.path}.")
+        try:
+            records = json.loads(body)
+        except json.JSONDecodeError as exc:
+            return self._error(400, f"Invalid JSON: {exc}.")
+        records = records.get("records", [records]) if isinstance(records, dict) else records
+        if not isinstance(records, list) or not all(isinstance(x, dict) for x in records):
+            return self._error(400, "Body must be a record or {\"records\": [record, ...]}.")
+        unknown = {col for record in records for col in record} - served.columns
+        if unknown:
+            return self._error(400, f"Unknown columns for {dataset_name}: {sorted(unknown)}.")
+
+        try:
+            preds = self.server.batcher.predict(dataset_name, records) if records else np.array([])
+        except Exception as exc:
+            return self._error(500, f"Prediction failed: {exc}")
+        payload = json.dumps({"predictions": preds.tolist()}).encode()
+        self.server.stats.add_request(len(records), time.perf_counter() - start)
+        self._send(200, payload)
+
+    def log_message(self, format, *args):
+        # Keep per-request logging off the hot path
+        pass
+
+    def _error(self, status: int, message: str):
+        self.server.stats.add_error()
+        self._send(status, {"error": message})
+
+    def _send(self, status: int, payload: t.Union[dict, bytes]):
+        payload = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class _UnixHandler(_Handler):
+    # TCP_NODELAY does not apply to Unix sockets
+    disable_nagle_algorithm = False
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _UnixHTTPConnection(HTTPConnection):
+
+    def __init__(self, socket_path: str):
+        super().__init__("localhost")
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+def train_models(src_dir: Path, dataset_names: list = None) -> t.Dict[str, ServedModel]:
+    """
+    Fit the preprocessing pipeline and train a majority predictor on every row of each catalog dataset.
+    :param src_dir: Input directory that provides each dataset and params files
+    :param dataset_names: Datasets to train; all catalog datasets if None
+    :return: Served models keyed by dataset name
+    """
+    with open(src_dir / "data_catalog.json", "r") as file:
+        data_catalog = json.load(file)
+    with open(src_dir / "discretize.json") as file:
+        discretize_dicts = json.load(file)
+    models = {}
+    for dataset_name in dataset_names or data_catalog:
+        dataset_meta = data_catalog[dataset_name]
+        data = Preprocessor(dataset_name, dataset_meta, src_dir).load()
+        pipeline = PreprocessingPipeline(dataset_meta, discretize_dicts.get(dataset_name))
+        data = pipeline.fit_transform(data)
+        label, features = pipeline.params["label"], pipeline.params["features"]
+
+        # Cast classification labels to int, as run.assign_folds does, so betas match the output of a run
+        if dataset_meta["problem_class"] == "classification":
+            data[label] = data[label].astype(int)
+        model = MajorityPredictor(dataset_meta["problem_class"], label, features)
+        model.train(data[features], data[label])
+        models[dataset_name] = ServedModel(pipeline, model)
+        logging.debug(f"Dataset {dataset_name}: trained model with beta {model.beta}.")
+    return models
+
+
+def save_models(models: t.Dict[str, ServedModel], model_dir: Path):
+    """
+    Save each model and its pipeline to <model_dir>/<dataset_name>.model.json and .pipeline.json.
+    :param models: Served models keyed by dataset name
+    :param model_dir: Destination directory
+    """
+    model_dir.mkdir(parents=True, exist_ok=True)
+    for dataset_name, served in models.items():
+        served.pipeline.save(model_dir / f"{dataset_name}.pipeline.json")
+        with open(model_dir / f"{dataset_name}.model.json", "w") as file:
+            json.dump(served.describe(), file)
+
+
+def load_models(model_dir: Path) -> t.Dict[str, ServedModel]:
+    """
+    Load the models saved by save_models.
+    :param model_dir: Directory written by save_models
+    :return: Served models keyed by dataset name
+    """
+    models = {}
+    for path in sorted(model_dir.glob("*.model.json")):
+        dataset_name = path.name[:-len(".model.json")]
+        with open(path) as file:
+            state = json.load(file)
+        model = MajorityPredictor(state["problem_class"], state["label"], state["features"])
+        model.beta = state["beta"]
+        pipeline = PreprocessingPipeline.load(model_dir / f"{dataset_name}.pipeline.json")
+        models[dataset_name] = ServedModel(pipeline, model)
+    return models
+
+
+def make_server(models: t.Dict[str, ServedModel], host: str = "127.0.0.1", port: int = 8000, socket_path: Path = None,
+                max_batch: int = 4096, max_wait: float = 0.0, timeout: float = 5.0,
+                transform: bool = False) -> socketserver.BaseServer:
+    """
+    Bind a threaded server whose handlers predict through a micro-batcher.
+    :param models: Served models keyed by dataset name
+    :param host: Host to bind
+    :param port: TCP port to bind; 0 to pick a free one
+    :param socket_path: Unix socket path to bind instead of a TCP port
+    :param max_batch: Largest number of records predicted in one batch
+    :param max_wait: Seconds the batcher waits for more requests after the first one of a batch
+    :param timeout: Seconds a request waits for its batch before the server responds with an error
+    :param transform: Transform records through the fitted pipeline before predicting
+    :return: Bound server with models, stats, and a started batcher; call serve_forever, then shutdown, server_close,
+        and batcher.stop
+    """
+    if socket_path is not None:
+        Path(socket_path).unlink(missing_ok=True)
+        server = _UnixHTTPServer(str(socket_path), _UnixHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), _Handler)
+    server.models = models
+    server.stats = ServingStats()
+    server.batcher = MicroBatcher(models, server.stats, max_batch, max_wait, timeout, transform).start()
+    return server
+
+
+def serve(src_dir: Path, model_dir: Path, host: str = "127.0.0.1", port: int = 8000, socket_path: Path = None,
+          max_batch: int = 4096, max_wait: float = 0.0, transform: bool = False):
+    """
+    Serve the models in a directory, training and saving them from the source data first if any is missing.
+    :param src_dir: Input directory that provides each dataset and params files
+    :param model_dir: Directory of saved models
+    :param host: Host to bind
+    :param port: TCP port to bind
+    :param socket_path: Unix socket path to bind instead of a TCP port
+    :param max_batch: Largest number of records predicted in one batch
+    :param max_wait: Seconds the batcher waits for more requests after the first one of a batch
+    :param transform: Transform records through the fitted pipeline before predicting
+    """
+    with open(src_dir / "data_catalog.json", "r") as file:
+        data_catalog = json.load(file)
+    if not all((model_dir / f"{x}.model.json").exists() for x in data_catalog):
+        save_models(train_models(src_dir), model_dir)
+    server = make_server(load_models(model_dir), host, port, socket_path, max_batch, max_wait,
+                         transform=transform)
+    print(f"Serving {len(server.models)} models on {socket_path or f'http://{host}:{server.server_address[1]}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.stop()
+        if socket_path is not None:
+            os.unlink(socket_path)
+        print(json.dumps(server.stats.snapshot(), indent=2))
+
+
+def sample_records(src_dir: Path, n_records: int = 100) -> t.Dict[str, list]:
+    """
+    Take the first raw records of each catalog dataset as request bodies for a load test.
+    :param src_dir: Input directory that provides each dataset
+    :param n_records: Number of records per dataset
+    :return: Lists of record dicts, without labels, keyed by dataset name
+    """
+    with open(src_dir / "data_catalog.json", "r") as file:
+        data_catalog = json.load(file)
+    records = {}
+    for dataset_name, dataset_meta in data_catalog.items():
+        preprocessor = Preprocessor(dataset_name, dataset_meta, src_dir)
+        data = preprocessor.load().head(n_records)
+        data = data.drop(columns=preprocessor.names_meta.index[preprocessor.names_meta["label"]])
+        records[dataset_name] = json.loads(data.to_json(orient="records"))
+    return records
+
+
+def generate_load(address: t.Union[tuple, Path], records: t.Dict[str, list], n_requests: int = 10_000,
+                  concurrency: int = 8, batch_size: int = 1) -> dict:
+    """
+    Send prediction requests from a pool of threads, each over one persistent connection.
+    :param address: (host, port) of an HTTP server, or the path of a Unix socket
+    :param records: Lists of record dicts keyed by dataset name, as from sample_records
+    :param n_requests: Total number of requests
+    :param concurrency: Number of threads, each with one request in flight
+    :param batch_size: Number of records per request
+    :return: Dict of request and error counts, seconds, requests and records per second, and client-side latency
+        percentiles in milliseconds
+    Requests cycle through the datasets and their records.
+    """
+    bodies = []
+    for dataset_name, dataset_records in records.items():
+        for i in range(0, len(dataset_records), batch_size):
+            batch = dataset_records[i:i + batch_size]
+            bodies.append((f"/predict/{dataset_name}", json.dumps({"records": batch}).encode(), len(batch)))
+    counter, lock = itertools.count(), threading.Lock()
+    latencies, errors = [], [0]
+
+    def worker():
+        if isinstance(address, (str, Path)):
+            connection = _UnixHTTPConnection(str(address))
+        else:
+            connection = HTTPConnection(*address)
+            connection.connect()
+            connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        worker_latencies, worker_errors = [], 0
+        headers = {"Content-Type": "application/json"}
+        while True:
+            i = next(counter)
+            if i >= n_requests:
+                break
+            path, body, _ = bodies[i % len(bodies)]
+            start = time.perf_counter()
+            connection.request("POST", path, body, headers)
+            response = connection.getresponse()
+            response.read()
+            worker_latencies.append(time.perf_counter() - start)
+            worker_errors += response.status != 200
+        connection.close()
+        with lock:
+            latencies.extend(worker_latencies)
+            errors[0] += worker_errors
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+    n_records = sum(bodies[i % len(bodies)][2] for i in range(n_requests))
+    return {"requests": n_requests, "errors": errors[0], "seconds": seconds, "requests_per_s": n_requests / seconds,
+            "records_per_s": n_records / seconds, **_percentiles(np.array(latencies) * 1e3)}
+
+
+def _percentiles(latencies_ms: np.ndarray) -> dict:
+    if not len(latencies_ms):
+        return {"p50_ms": None, "p90_ms": None, "p99_ms": None, "max_ms": None}
+    p50, p90, p99 = np.percentile(latencies_ms, [50, 90, 99])
+    return {"p50_ms": p50, "p90_ms": p90, "p99_ms": p99, "max_ms": latencies_ms.max()}
+
+
+def _to_builtin(value):
+    return value.item() if isinstance(value, np.generic) else value
@@ -0,0 +1,219 @@
+"""Peter Rasmussen, Programming Assignment 1, sweep.py
+
+The run_sweep function trains and scores majority predictors over a grid of random states, fold counts, and
+validation fractions in one process.
+
+The sweep is a DAG of stages: each dataset is prepared (loaded, replaced, log transformed, imputed, dummied, and
+discretized) once, shuffled and split into folds once per random state and fold count, and scored once per
+validation fraction. Results are written as one long-form table. Each scored combination is appended to a
+checkpoint as soon as it finishes, and a resumed sweep only adds the stages of the combinations left to score.
+
+"""
+
+# Standard library imports
+from collections import defaultdict
+import itertools
+import json
+import logging
+import os
+from pathlib import Path
+import typing as t
+
+# Third party imports
+import pandas as pd
+
+# Local imports
+from p1.checkpoint import RunCheckpoint
+from p1.preprocessing import FoldMatrix, Preprocessor
+from p1.run import assign_folds, prepare_dataset, score_fold, score_folds_batched
+
+GRID_KEYS = ["random_state", "k_folds", "val_frac"]
+
+
+class StageGraph:
+    """
+    Memoized DAG of stages; each stage runs once, after its dependencies, and its result is freed once every stage
+    that depends on it has run.
+    """
+
+    def __init__(self):
+        """
+        Instantiate the StageGraph object.
+        """
+        self.stages: dict = {}
+        self.dependents: dict = defaultdict(int)
+
+    def __repr__(self):
+        counts = pd.Series([key[0] for key in self.stages]).value_counts().to_dict()
+        return f"StageGraph({counts})"
+
+    def add(self, key: tuple, func: t.Callable, *args, deps: tuple = ()) -> tuple:
+        """
+        Add a stage unless a stage with the same key exists.
+        :param key: Stage key; its first element names the kind of stage
+        :param func: Function called with the results of deps followed by args
+        :param args: Other positional arguments of func
+        :param deps: Keys of the stages whose results func needs
+        :return: Stage key
+        """
+        if key not in self.stages:
+            self.stages[key] = (func, args, tuple(deps))
+            for dep in deps:
+                self.dependents[dep] += 1
+        return key
+
+    def execute(self) -> dict:
+        """
+        Run every stage in dependency order.
+        :return: Results of the stages that no other stage depends on, keyed by stage key
+        Stages are added after their dependencies, so insertion order is a topological order.
+        """
+        results, outputs = {}, {}
+        remaining = dict(self.dependents)
+        for key, (func, args, deps) in self.stages.items():
+            result = func(*[results[dep] for dep in deps], *args)
+            for dep in deps:
+                remaining[dep] -= 1
+                if not remaining[dep]:
+                    del results[dep]
+            if self.dependents[key]:
+                results[key] = result
+            else:
+                outputs[key] = result
+        return outputs
+
+
+def run_sweep(
+        src_dir: Path,
+        dst_dir: Path,
+        grid: dict,
+        compact_dtypes: bool = False,
+        batched: bool = False,
+        store_dir: Path = None,
+        resume: bool = False,
+        fold_assignment: str = "shuffle",
+        encoding: str = "dense",
+) -> pd.DataFrame:
+    """
+    Train and score a majority predictor across six datasets for every combination of grid parameters.
+    :param src_dir: Input directory that provides each dataset and params files
+    :param dst_dir: Output directory
+    :param grid: Lists of random_state, k_folds, and val_frac values to combine
+    :param compact_dtypes: True to load and keep data in the smallest safe dtypes
+    :param batched: True to score every fold of a dataset at once with score_majority_cv
+    :param store_dir: Optional column store to load datasets from
+    :param resume: True to skip the combinations an interrupted sweep with the same grid already wrote to
+        <dst_dir>/.checkpoints
+    :param fold_assignment: 'shuffle', 'hash', or 'hash_stratified'; see p1.run.run
+    :param encoding: 'dense' or 'codes'; see p1.run.run
+    :return: Long-form results with one row per parameter combination, dataset, and fold
+    """
+    dir_path = Path(os.path.dirname(os.path.realpath(__file__)))
+    log_format = "%(asctime)s - %(levelname)s - %(message)s"
+    logging.basicConfig(filename=dir_path / "p1.log", level=logging.DEBUG, format=log_format)
+
+    with open(src_dir / "discretize.json") as file:
+        discretize_dicts = defaultdict(lambda: {}, json.load(file))
+    with open(src_dir / "data_catalog.json", "r") as file:
+        data_catalog = json.load(file)
+    config = RunCheckpoint.make_config(src_dir, data_catalog, discretize_dicts, grid=grid, batched=batched,
+                                       compact_dtypes=compact_dtypes, fold_assignment=fold_assignment)
+    checkpoint = RunCheckpoint(dst_dir / ".checkpoints", config, resume=resume)
+
+    # Build the stage DAG: datasets are prepared once and shared by every combination of parameters left to score
+    graph = StageGraph()
+    units = []
+    for dataset_name, dataset_meta in data_catalog.items():
+        prepared = ("prepare", dataset_name)
+        for random_state, k_folds in itertools.product(grid["random_state"], grid["k_folds"]):
+            folds = ("folds", dataset_name, random_state, k_folds)
+            for val_frac in grid["val_frac"]:
+                unit = (dataset_name, random_state, k_folds, val_frac)
+                units.append(unit)
+                if checkpoint.done(unit):
+                    continue
+                graph.add(prepared, prepare_dataset, dataset_name, dataset_meta, src_dir,
+                          discretize_dicts[dataset_name], compact_dtypes, store_dir, None, fold_assignment,
+                          encoding)
+                graph.add(folds, make_fold_matrix, k_folds, random_state, compact_dtypes, fold_assignment,
+                          deps=[prepared])
+                graph.add(("score", *unit), _score_checkpointed, checkpoint, unit, dataset_name, val_frac,
+                          random_state, batched, deps=[folds])
+    logging.debug(f"Begin sweep: {graph}.")
+    graph.execute()
+
+    # Gather one long-form table, including the combinations of earlier attempts
+    rows = []
+    for unit in units:
+        _, random_state, k_folds, val_frac = unit
+        rows += [[random_state, k_folds, val_frac, *row] for row in checkpoint.rows([unit])]
+    columns = [*GRID_KEYS, "dataset_name", "problem_class", "fold", "test_score", "beta"]
+    output_df = pd.DataFrame(rows, columns=columns)
+
+    # Compute mean test score across folds for each combination of parameters and dataset
+    summary = output_df.groupby([*GRID_KEYS, "problem_class", "dataset_name"])["test_score"].mean()
+    summary = summary.to_frame().round(2)
+
+    # Save outputs
+    logging.debug("Save sweep outputs.")
+    output_df.to_csv(dst_dir / "sweep_output.csv")
+    summary.to_csv(dst_dir / "sweep_summary.csv")
+    checkpoint.complete()
+    logging.debug("Finish sweep.\n")
+    return output_df
+
+
+def make_fold_matrix(preprocessor: Preprocessor, k_folds: int, random_state: int,
+                     compact_dtypes: bool = False, fold_assignment: str = "shuffle") -> FoldMatrix:
+    """
+    Shuffle a prepared dataset, assign its folds, and gather it into a FoldMatrix.
+    :param preprocessor: Preprocessor returned by prepare_dataset
+    :param k_folds: Number of folds to partition the data into
+    :param random_state: Random number seed
+    :param compact_dtypes: True if the data was prepared with compact dtypes
+    :param fold_assignment: 'shuffle', 'hash', or 'hash_stratified'; see p1.run.run
+    :return: FoldMatrix of the dataset
+    """
+    data = assign_folds(preprocessor, k_folds, random_state, compact_dtypes, fold_assignment)
+    return FoldMatrix(data, preprocessor.features, preprocessor.label, k_folds,
+                      problem_class=preprocessor.dataset_meta["problem_class"], fold_assignment=fold_assignment)
+
+
+def score_fold_matrix(fold_matrix: FoldMatrix, dataset_name: str, val_frac: float, random_state: int,
+                      batched: bool = False) -> list:
+    """
+    Score every fold of a FoldMatrix.
+    :param fold_matrix: FoldMatrix of the dataset
+    :param dataset_name: Name of the dataset in the data catalog
+    :param val_frac: Validation fraction of train-validation set
+    :param random_state: Random number seed
+    :param batched: True to score every fold at once with score_majority_cv
+    :return: Output rows of dataset name, problem class, fold, test score, and beta
+    """
+    if batched:
+        return score_folds_batched(fold_matrix, dataset_name)
+    return [score_fold(fold_matrix, dataset_name, fold, val_frac, random_state)
+            for fold in range(1, fold_matrix.k_folds + 1)]
+
+
+def _score_checkpointed(fold_matrix: FoldMatrix, checkpoint: RunCheckpoint, unit: tuple, *args) -> list:
+    # Score every fold of a FoldMatrix and append the rows to the checkpoint before the next stage runs
+    rows = score_fold_matrix(fold_matrix, *args)
+    checkpoint.append({unit: rows})
+    return rows
+
+
+def load_grid(src: Path, defaults: dict) -> dict:
+    """
+    Load a grid specification.
+    :param src: JSON file mapping any of random_state, k_folds, and val_frac to a value or a list of values
+    :param defaults: Values of the parameters the file leaves out
+    :return: Grid mapping each parameter to a list of values
+    """
+    with open(src) as file:
+        spec = json.load(file)
+    unknown = set(spec) - set(GRID_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown grid parameters: {sorted(unknown)}.")
+    grid = {**defaults, **spec}
+    return {key: value if isinstance(value, list) else [value] for key, value in grid.items()}
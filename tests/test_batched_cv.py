@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p1.algorithms import MajorityPredictor, score_majority_cv
+from p1.preprocessing.split import make_repeated_folds
+from p1.run import run
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+def score_per_fold(labels, folds, problem_class, k_folds):
+    scores = []
+    for fold in range(1, k_folds + 1):
+        y = pd.Series(labels, name="y")
+        test, train_val = y[folds == fold], y[folds != fold]
+        predictor = MajorityPredictor(problem_class, "y", [])
+        predictor.train(pd.DataFrame(index=train_val.index), train_val)
+        y_pred = predictor.predict(pd.DataFrame(index=test.index))
+        scores.append([fold, predictor.score(y_pred, test), predictor.beta])
+    return pd.DataFrame(scores, columns=["fold", "test_score", "beta"])
+
+
+@pytest.mark.parametrize("problem_class", ["classification", "regression"])
+def test_batched_scores_match_majority_predictor(problem_class):
+    rng = np.random.default_rng(0)
+    labels = rng.integers(0, 4, 300) if problem_class == "classification" else rng.normal(size=300)
+    folds = make_repeated_folds(labels, problem_class, 5, n_repeats=3, random_state=7)
+    batched = score_majority_cv(labels, folds, problem_class, 5)
+    assert batched["repeat"].tolist() == np.repeat([0, 1, 2], 5).tolist()
+    for repeat in range(3):
+        expected = score_per_fold(labels, folds[repeat], problem_class, 5)
+        result = batched[batched["repeat"] == repeat].reset_index(drop=True)
+        assert np.allclose(result["test_score"], expected["test_score"], rtol=1e-12, atol=0)
+        assert np.allclose(result["beta"].astype(float), expected["beta"].astype(float), rtol=0, atol=1e-12)
+
+
+def test_batched_run_matches_per_fold_output(tmp_path):
+    run(DATA_DIR, tmp_path, 5, 0.1, 777, batched=True)
+    result = pd.read_csv(tmp_path / "output.csv", index_col=0)
+    expected = pd.read_csv(DATA_DIR / "output.csv", index_col=0)
+    assert result[["dataset_name", "problem_class", "fold"]].equals(expected[["dataset_name", "problem_class", "fold"]])
+    assert np.allclose(result["test_score"], expected["test_score"], rtol=1e-12, atol=0)
+    assert np.allclose(result["beta"], expected["beta"], rtol=0, atol=1e-12)
+
+
+def test_repeated_folds_are_stratified_partitions():
+    labels = np.repeat([0, 1], [60, 40])
+    folds = make_repeated_folds(labels, "classification", 4, n_repeats=2, random_state=0)
+    assert folds.shape == (2, 100)
+    assert not (folds[0] == folds[1]).all()
+    for repeat_folds in folds:
+        counts = pd.crosstab(repeat_folds, labels)
+        assert counts.sum().tolist() == [60, 40]
+        assert (counts.max() - counts.min() <= 2).all()
@@ -0,0 +1,28 @@
+import json
+from pathlib import Path
+
+from p1.benchmarks import read_benchmarks, run_benchmarks, write_benchmarks, write_synthetic_catalog
+from p1.preprocessing import Preprocessor
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+def test_synthetic_catalog_loads_like_the_real_one(tmp_path):
+    data_catalog = write_synthetic_catalog(DATA_DIR, tmp_path, 250, ["forestfires", "breast-cancer-wisconsin"])
+    for dataset_name, dataset_meta in data_catalog.items():
+        real = Preprocessor(dataset_name, dataset_meta, DATA_DIR).load()
+        synthetic = Preprocessor(dataset_name, dataset_meta, tmp_path).load()
+        assert len(synthetic) == 250
+        assert synthetic.dtypes.to_dict() == real.dtypes.to_dict()
+    with open(tmp_path / "discretize.json") as file:
+        assert "forestfires" in json.load(file)
+
+
+def test_run_benchmarks_writes_one_record_per_stage(tmp_path):
+    results = run_benchmarks(DATA_DIR, tmp_path, [200], ["abalone"], repeat=1, full_run_max_rows=0)
+    assert results["stage"].tolist() == ["load", "transform_columns", "replace", "impute", "dummy", "discretize",
+                                         "compute_natural_breaks", "make_splits", "standardize", "train",
+                                         "predict", "score"]
+    assert (results["wall_time"] > 0).all() and (results["peak_bytes"] >= 0).all()
+    write_benchmarks(results, tmp_path / "bench.jsonl")
+    assert len(read_benchmarks(tmp_path / "bench.jsonl")) == len(results)
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from p1.preprocessing import PreprocessingCache
+from p1.preprocessing import cache as cache_module
+
+
+def make_frame(n_rows=100):
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        "fold": rng.integers(1, 6, n_rows),
+        "x": rng.normal(size=n_rows).astype("float32"),
+        "flag": rng.integers(0, 2, n_rows).astype(bool),
+        "name": np.where(rng.random(n_rows) < 0.2, None, rng.choice(["a", "b"], n_rows)),
+        "level": pd.Categorical(rng.choice(["u", "v"], n_rows), categories=["u", "v", "w"]),
+    })
+    data.index = pd.Index(rng.permutation(n_rows), name="index")
+    return data
+
+
+def test_cache_round_trip(tmp_path):
+    cache = PreprocessingCache(tmp_path)
+    data = make_frame()
+    cache.save("key", data, {"label": "x"})
+    loaded, meta = cache.load("key")
+    pd.testing.assert_frame_equal(loaded, data)
+    assert loaded["name"].isna().sum() == data["name"].isna().sum() > 0
+    assert meta == {"label": "x"}
+    assert cache.load("missing") == (None, None)
+
+
+def test_cache_key_depends_on_params(tmp_path, monkeypatch):
+    src = tmp_path / "data.csv"
+    src.write_text("1,2\n")
+    key = PreprocessingCache.make_key(src, {"a": 1}, {}, random_state=1, k_folds=5)
+    assert key == PreprocessingCache.make_key(src, {"a": 1}, {}, random_state=1, k_folds=5)
+    assert key != PreprocessingCache.make_key(src, {"a": 1}, {}, random_state=2, k_folds=5)
+    monkeypatch.setattr(cache_module, "_source_digest", lambda: "edited")
+    assert key != PreprocessingCache.make_key(src, {"a": 1}, {}, random_state=1, k_folds=5)
+    monkeypatch.undo()
+    src.write_text("1,3\n")
+    assert key != PreprocessingCache.make_key(src, {"a": 1}, {}, random_state=1, k_folds=5)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = PreprocessingCache(tmp_path / "cache")
+    cache.save("old", make_frame())
+    cache.save("new", make_frame())
+    cache.max_bytes = (tmp_path / "cache" / "new.npz").stat().st_size
+    cache.evict()
+    assert cache.load("old") == (None, None)
+    assert cache.load("new")[0] is not None
@@ -0,0 +1,55 @@
+import importlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from p1.checkpoint import RunCheckpoint
+from p1.run import run
+from p1.sweep import run_sweep
+
+run_module = importlib.import_module("p1.run")
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+def test_checkpoint_drops_partial_line(tmp_path):
+    checkpoint = RunCheckpoint(tmp_path, {"a": 1})
+    checkpoint.append({("x", 1): [["x", "classification", 1, np.float64(0.5), np.int64(2)]]})
+    with open(checkpoint.results_path, "a") as file:
+        file.write('{"unit": ["x", 2], "ro')
+    resumed = RunCheckpoint(tmp_path, {"a": 1}, resume=True)
+    assert resumed.done(("x", 1)) and not resumed.done(("x", 2))
+    assert resumed.rows([("x", 1), ("x", 2)]) == [["x", "classification", 1, 0.5, 2]]
+    resumed.append({("x", 2): [["x", "classification", 2, 0.25, 2]]})
+    assert RunCheckpoint(tmp_path, {"a": 1}, resume=True).done(("x", 2))
+    assert not RunCheckpoint(tmp_path, {"a": 1}).done(("x", 1))
+    assert RunCheckpoint(tmp_path, {"a": 2}).key != resumed.key
+
+
+def test_run_resumes_from_checkpoint(tmp_path, monkeypatch):
+    run(DATA_DIR, tmp_path, 5, 0.1, 777)
+    manifest = json.loads((tmp_path / ".checkpoints" / "manifest.json").read_text())
+    assert [entry["status"] for entry in manifest.values()] == ["complete"]
+
+    # Keep the first dataset's folds only, as if the run had been killed after them
+    results_path = next((tmp_path / ".checkpoints").glob("*.jsonl"))
+    results_path.write_text("".join(results_path.read_text().splitlines(keepends=True)[:5]))
+    (tmp_path / "summary.csv").unlink()
+    calls = []
+    score_fold = run_module.score_fold
+    monkeypatch.setattr(run_module, "score_fold", lambda *args: calls.append(args[1]) or score_fold(*args))
+    run(DATA_DIR, tmp_path, 5, 0.1, 777, resume=True)
+    assert "breast-cancer-wisconsin" not in calls and len(calls) == 25
+    expected = pd.read_csv(DATA_DIR / "output.csv", index_col=0)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "output.csv", index_col=0), expected)
+    assert (tmp_path / "summary.csv").exists()
+
+
+def test_sweep_resumes_from_checkpoint(tmp_path):
+    grid = {"random_state": [777, 1], "k_folds": [5], "val_frac": [0.1]}
+    output = run_sweep(DATA_DIR, tmp_path, grid)
+    results_path = next((tmp_path / ".checkpoints").glob("*.jsonl"))
+    results_path.write_text("".join(results_path.read_text().splitlines(keepends=True)[:3]))
+    pd.testing.assert_frame_equal(run_sweep(DATA_DIR, tmp_path, grid, resume=True), output)
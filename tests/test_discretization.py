@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from p1.preprocessing.discretization import apply_bins, fit_bins
+
+
+def test_equal_width_matches_pd_cut_and_keeps_maximum():
+    series = pd.Series(np.random.default_rng(0).normal(size=1000), name="x")
+    min_, max_ = series.min(), series.max()
+    edges = [min_ + i * (max_ - min_) / 4 for i in range(5)]
+    expected = pd.cut(series, bins=edges, include_lowest=True).cat.codes.to_numpy()
+    codes = apply_bins(series.to_frame(), fit_bins(series.to_frame(), {"x": {"n_bins": 4, "binning": "equal_width"}}))
+    inside = expected >= 0
+    assert (codes["x"].to_numpy()[inside] == expected[inside]).all()
+    assert codes["x"][series.idxmax()] == 3
+
+
+def test_equal_frequency_keeps_ties_together():
+    data = pd.DataFrame({"x": [1, 1, 1, 1, 2, 3, 4, 5], "y": np.arange(8.0)})
+    discretize_dict = {"x": {"n_bins": 2, "binning": "equal_frequency"},
+                       "y": {"n_bins": 4, "binning": "equal_frequency"}}
+    codes = apply_bins(data, fit_bins(data, discretize_dict))
+    assert codes["x"].tolist() == [0, 0, 0, 0, 1, 1, 1, 1]
+    assert codes["y"].tolist() == [0, 0, 1, 1, 2, 2, 3, 3]
+    ties = pd.DataFrame({"x": [1, 1, 1, 1, 1, 2, 3, 4]})
+    bins = fit_bins(ties, {"x": discretize_dict["x"]})
+    assert apply_bins(ties, bins)["x"].tolist() == [0, 0, 0, 0, 0, 1, 1, 1]
+
+
+def test_multi_column_fit_matches_single_column_fit_and_reapplies():
+    rng = np.random.default_rng(1)
+    data = pd.DataFrame(rng.exponential(size=(500, 3)), columns=["a", "b", "c"])
+    discretize_dict = {"a": {"n_bins": 5, "binning": "equal_frequency"},
+                       "b": {"n_bins": 5, "binning": "equal_frequency"},
+                       "c": {"n_bins": 3, "binning": "jenks"}}
+    bins = fit_bins(data, discretize_dict)
+    for col, bin_dict in discretize_dict.items():
+        single = fit_bins(data[[col]], {col: bin_dict})[col]
+        assert np.array_equal(bins[col]["edges"], single["edges"])
+        assert bins[col]["retbins"][0] == data[col].min() and bins[col]["retbins"][-1] == data[col].max()
+    new = pd.DataFrame({"a": [-1.0, 100.0], "b": [0.0, 0.0], "c": [0.0, 100.0]})
+    assert apply_bins(new, bins).to_numpy().tolist() == [[0, 0, 0], [4, 0, 2]]
+
+
+def test_unknown_binning():
+    with pytest.raises(ValueError):
+        fit_bins(pd.DataFrame({"x": [1.0, 2.0]}), {"x": {"n_bins": 2, "binning": "quantile"}})
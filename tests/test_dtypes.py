@@ -0,0 +1,49 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from p1.preprocessing import Preprocessor
+from p1.run import assign_folds
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+def make_preprocessor(dataset_name):
+    with open(DATA_DIR / "data_catalog.json") as file:
+        dataset_meta = json.load(file)[dataset_name]
+    return Preprocessor(dataset_name, dataset_meta, DATA_DIR)
+
+
+def test_plan_dtypes():
+    dtypes = make_preprocessor("forestfires").plan_dtypes()
+    assert dtypes["x"] == "int8"
+    assert dtypes["month"] == "category"
+    assert dtypes["ffmc"] == "float32"
+    dtypes = make_preprocessor("breast-cancer-wisconsin").plan_dtypes()
+    assert dtypes["bare_nuclei"] == "Int64"
+    assert dtypes["clump_thickness"] == "int64"
+
+
+def test_compact_pipeline():
+    preprocessor = make_preprocessor("breast-cancer-wisconsin")
+    preprocessor.load(compact=True)
+    assert preprocessor.data["bare_nuclei"].dtype == "Int8"
+    preprocessor.identify_features_label_id()
+    preprocessor.replace()
+    preprocessor.impute()
+    preprocessor.dummy()
+    report = preprocessor.compact()
+    assert report["after"] < report["before"]
+    assert set(preprocessor.data.dtypes) == {np.dtype("float32"), np.dtype("bool")}
+
+
+def test_assign_folds_compact_labels_keep_their_values():
+    preprocessor = make_preprocessor("car")
+    preprocessor.load()
+    preprocessor.identify_features_label_id()
+    preprocessor.replace()
+    preprocessor.data["class"] = preprocessor.data["class"].astype(int) * 100
+    data = assign_folds(preprocessor, 5, 777, compact_dtypes=True)
+    assert data["class"].dtype == "int16"
+    assert sorted(data["class"].unique()) == [100, 200, 300, 400]
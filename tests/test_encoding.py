@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p1.preprocessing import CategoricalCodes, Preprocessor, get_standardization_cols
+from p1.preprocessing import encoding
+from p1.run import preprocess_dataset, score_fold
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+def make_preprocessor(dataset_name):
+    with open(DATA_DIR / "data_catalog.json") as file:
+        dataset_meta = json.load(file)[dataset_name]
+    return Preprocessor(dataset_name, dataset_meta, DATA_DIR)
+
+
+@pytest.mark.parametrize("dataset_name", ["abalone", "house-votes-84", "forestfires"])
+@pytest.mark.parametrize("compact", [False, True])
+def test_codes_expand_to_dummies(dataset_name, compact):
+    preprocessors = []
+    for encoding_ in ["dense", "codes"]:
+        preprocessor = make_preprocessor(dataset_name)
+        preprocessor.load(compact=compact)
+        preprocessor.identify_features_label_id()
+        preprocessor.replace()
+        preprocessor.dummy(encoding=encoding_)
+        preprocessors.append(preprocessor)
+    dense, coded = preprocessors
+    categorical = coded.data.select_dtypes("category").columns.tolist()
+    codes = CategoricalCodes.from_frame(coded.data, categorical)
+    expected = dense.data[codes.indicator_names]
+    pd.testing.assert_frame_equal(codes.to_dense(), expected)
+    assert coded.data.columns.drop(categorical).tolist() + codes.indicator_names == dense.data.columns.tolist()
+    assert codes.codes.memory_usage(index=False).sum() < expected.memory_usage(index=False).sum()
+
+
+@pytest.mark.parametrize("dataset_name", ["house-votes-84", "abalone"])
+def test_codes_fold_matrix_matches_dense(dataset_name):
+    with open(DATA_DIR / "data_catalog.json") as file:
+        dataset_meta = json.load(file)[dataset_name]
+    dense, coded = [preprocess_dataset(dataset_name, dataset_meta, DATA_DIR, {}, 5, 1, encoding=encoding_)
+                    for encoding_ in ["dense", "codes"]]
+    assert coded.feature_cols == dense.feature_cols
+    assert coded.X.shape[1] < dense.X.shape[1]
+    for fold in range(1, 6):
+        shifts, scales = coded.get_standardization_params(fold)
+        test_rows, _ = coded.split(fold)
+        features = coded.features(test_rows, shifts, scales)
+        assert features.columns.tolist() == coded.feature_cols
+        indicators = features.columns[len(coded.numeric_cols):]
+        assert features[indicators].dtypes.eq(bool).all()
+        expected = dense.features(test_rows, *dense.get_standardization_params(fold))
+        pd.testing.assert_frame_equal(features[indicators], expected[indicators].astype(bool))
+        assert score_fold(coded, dataset_name, fold, 0.1, 1) == score_fold(dense, dataset_name, fold, 0.1, 1)
+
+
+def test_codes_take_and_missing_values():
+    data = pd.DataFrame({"a": ["x", None, "y", "x"], "b": pd.Categorical(["u", "v", "u", "u"], ["u", "v", "w"])})
+    codes = CategoricalCodes.from_frame(data, ["a", "b"])
+    assert codes.indicator_names == ["a_x", "a_y", "b_u", "b_v", "b_w"]
+    pd.testing.assert_frame_equal(codes.to_dense(), pd.get_dummies(data))
+    pd.testing.assert_frame_equal(codes.take(np.array([3, 1])).to_dense(), pd.get_dummies(data).iloc[[3, 1]])
+
+
+def test_to_csr(monkeypatch):
+    data = pd.DataFrame({"a": ["x", None, "y"], "b": ["u", "v", "u"]})
+    codes = CategoricalCodes.from_frame(data, ["a", "b"])
+    if encoding.sparse is not None:
+        assert (codes.to_csr().toarray() == codes.to_dense().to_numpy()).all()
+    monkeypatch.setattr(encoding, "sparse", None)
+    with pytest.raises(ImportError):
+        codes.to_csr()
+
+
+def test_standardization_cols_skip_indicators():
+    data = pd.DataFrame({"x": [1.0, 2.0, 3.0], "flag": [0, 1, 1], "dummy": [True, False, True], "ind": [0, 0, 0]})
+    assert get_standardization_cols(data, list(data)) == ["x", "ind"]
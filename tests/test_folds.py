@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+
+from p1.preprocessing import FoldMatrix
+
+
+def test_standardization_params_come_from_train_val_only():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        "fold": np.repeat([1, 2, 3, 4], 25),
+        "x": rng.normal(5, 2, 100),
+        "flag": rng.integers(0, 2, 100).astype(bool),
+        "y": rng.normal(size=100),
+    })
+    data.loc[data["fold"] == 2, "x"] += 100  # A test fold far from the others must not shift their statistics
+    fold_matrix = FoldMatrix(data, ["x", "flag", "y"], "y", 4)
+    for fold in range(1, 5):
+        shifts, scales = fold_matrix.get_standardization_params(fold)
+        train_val = data[data["fold"] != fold]
+        assert np.allclose(shifts, [train_val["x"].mean(), 0, train_val["y"].mean()])
+        assert np.allclose(scales, [train_val["x"].std(), 1, train_val["y"].std()])
+        test_rows, _ = fold_matrix.split(fold)
+        features = fold_matrix.features(test_rows, shifts, scales)
+        assert features.dtypes.eq(np.float32).all()
+        expected = (data.loc[data["fold"] == fold, "x"] - train_val["x"].mean()) / train_val["x"].std()
+        assert np.allclose(features["x"], expected, rtol=1e-5)
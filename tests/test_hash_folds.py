@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p1.preprocessing import Preprocessor, assign_hash_splits, hash_rows, split_train_val_hashed
+from p1.run import assign_folds, prepare_dataset
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+def make_data(n_rows=1000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({"id": rng.permutation(n_rows), "label": rng.integers(0, 3, n_rows)})
+
+
+def test_hash_folds_are_per_row():
+    data = make_data()
+    hashes = hash_rows(data[["id"]])
+    folds = assign_hash_splits(hashes, data["label"], "classification", 777, k_folds=5)
+    assert set(folds) == {1, 2, 3, 4, 5} and np.bincount(folds)[1:].min() > 150
+
+    # Chunks, appended rows, and reordered rows get the same folds
+    chunks = [assign_hash_splits(hash_rows(chunk[["id"]]), chunk["label"], "classification", 777, k_folds=5)
+              for chunk in (data.iloc[:300], data.iloc[300:])]
+    np.testing.assert_array_equal(np.concatenate(chunks), folds)
+    reordered = data.iloc[::-1]
+    reordered_folds = assign_hash_splits(hash_rows(reordered[["id"]]), reordered["label"], "classification", 777,
+                                         k_folds=5)
+    np.testing.assert_array_equal(reordered_folds[::-1], folds)
+    assert (assign_hash_splits(hashes, data["label"], "classification", 1, k_folds=5) != folds).mean() > 0.5
+
+
+def test_stratified_hash_folds_balance_classes():
+    data = make_data(1003)
+    hashes = hash_rows(data[["id"]])
+    folds = assign_hash_splits(hashes, data["label"], "classification", 777, k_folds=5, stratify=True)
+    counts = pd.crosstab(data["label"], folds)
+    assert (counts.max(axis=1) - counts.min(axis=1)).max() <= 1
+    train, val = split_train_val_hashed(hashes, data["label"].to_numpy(), "classification", 0.1, 777, stratify=True)
+    assert len(train) + len(val) == len(data) and abs(len(val) - 100) <= 3
+    with pytest.raises(ValueError):
+        assign_hash_splits(hashes, data["label"], "classification", 777)
+
+
+def test_hash_folds_follow_id_column():
+    with open(DATA_DIR / "data_catalog.json") as file:
+        dataset_meta = json.load(file)["breast-cancer-wisconsin"]
+    preprocessor = prepare_dataset("breast-cancer-wisconsin", dataset_meta, DATA_DIR, {}, fold_assignment="hash")
+    ids = Preprocessor("breast-cancer-wisconsin", dataset_meta, DATA_DIR).load()["sample_code_number"]
+    data = assign_folds(preprocessor, 5, 777, fold_assignment="hash")
+    assert data.index.equals(preprocessor.data.index)
+    assert (pd.Series(data["fold"].to_numpy()).groupby(ids.to_numpy()).nunique() == 1).all()
+    with pytest.raises(ValueError):
+        assign_folds(preprocessor, 5, 777, fold_assignment="random")
@@ -0,0 +1,40 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from p1.exploration import compute_histograms, stream_histograms
+from p1.preprocessing import Preprocessor
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+def test_histograms_match_numpy():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"a": rng.normal(size=1000), "b": rng.integers(0, 5, 1000).astype(float)})
+    data.loc[:9, "a"] = [np.nan, np.inf, -np.inf] + [0.0] * 7
+    histograms = compute_histograms(data, ["a", "b"], n_bins=20)
+    for col, (counts, edges) in histograms.items():
+        values = data[col].replace([np.inf, -np.inf], np.nan).dropna()
+        expected, expected_edges = np.histogram(values, bins=20)
+        assert np.allclose(edges, expected_edges) and (counts == expected).all()
+
+
+def test_stream_histograms_match_in_memory():
+    with open(DATA_DIR / "data_catalog.json") as file:
+        dataset_meta = json.load(file)["abalone"]
+    preprocessor = Preprocessor("abalone", dataset_meta, DATA_DIR)
+    data = preprocessor.load()
+    cols = ["length", "whole_weight", "rings"]
+    streamed = stream_histograms(lambda: preprocessor.load_chunks(500), cols, n_bins=30)
+    in_memory = compute_histograms(data, cols, n_bins=30)
+    for col in cols:
+        assert np.allclose(streamed[col][1], in_memory[col][1])
+        assert (streamed[col][0] == in_memory[col][0]).all() and streamed[col][0].sum() == len(data)
+
+
+def test_histograms_reuse_edges():
+    data = pd.DataFrame({"x": [0.0, 1.0, 2.0, 5.0, 10.0]})
+    counts, edges = compute_histograms(data, ["x"], edges={"x": [0, 2, 10]})["x"]
+    assert counts.tolist() == [2, 3] and edges.tolist() == [0.0, 2.0, 10.0]
@@ -0,0 +1,94 @@
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p1.algorithms import FoldLabelStats, score_majority_cv
+from p1.incremental import update_dataset
+from p1.run import run
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+def test_fold_label_stats_update_matches_one_batch():
+    rng = np.random.default_rng(0)
+    labels, folds = rng.normal(size=300), rng.integers(1, 6, 300)
+    labels[:10] = -np.inf
+    stats = FoldLabelStats("regression", 5, center=0.1)
+    for rows in np.array_split(np.arange(300), 3):
+        stats = FoldLabelStats.from_dict(json.loads(json.dumps(stats.to_dict()))).update(labels[rows], folds[rows])
+    imputed = np.where(np.isfinite(labels), labels, labels[10:].mean())
+    expected = score_majority_cv(imputed, folds, "regression", 5, standardize_label=True)
+    test_scores, betas = stats.score(standardize_label=True)
+    assert np.allclose(test_scores, expected["test_score"]) and np.allclose(betas, expected["beta"])
+
+    classes = FoldLabelStats("classification", 5).update([1, 1, 2], [1, 2, 3]).update([0, 3, 3], [4, 5, 5])
+    assert classes.classes.tolist() == [0, 1, 2, 3] and classes.table.sum(axis=0).tolist() == [1, 2, 1, 2]
+
+
+def test_incremental_run_parses_only_appended_rows(tmp_path, monkeypatch):
+    src_dir, dst_dir = tmp_path / "in", tmp_path / "out"
+    shutil.copytree(DATA_DIR, src_dir)
+    with open(src_dir / "data_catalog.json") as file:
+        dataset_meta = json.load(file)["abalone"]
+    src = src_dir / dataset_meta["data_filename"]
+    lines = src.read_bytes().splitlines(keepends=True)
+    src.write_bytes(b"".join(lines[:-200]))
+    update_dataset(dst_dir, "abalone", dataset_meta, src_dir, 5, 777)
+
+    # Append rows and parse only them
+    parsed = []
+    read_csv = pd.read_csv
+    monkeypatch.setattr(pd, "read_csv", lambda *args, **kwargs: parsed.append(read_csv(*args, **kwargs)) or parsed[-1])
+    with open(src, "ab") as file:
+        file.write(b"".join(lines[-200:]))
+    rows = update_dataset(dst_dir, "abalone", dataset_meta, src_dir, 5, 777)
+    assert [len(x) for x in parsed] == [200]
+    assert json.loads((dst_dir / "abalone.json").read_text())["n_rows"] == len(lines)
+
+    # A changed earlier row rebuilds the state from the whole file
+    monkeypatch.undo()
+    src.write_bytes(lines[1] + b"".join(lines[1:]))
+    rebuilt = update_dataset(dst_dir, "abalone", dataset_meta, src_dir, 5, 777)
+    assert json.loads((dst_dir / "abalone.json").read_text())["n_rows"] == len(lines)
+    assert [x[3] for x in rows] != [x[3] for x in rebuilt]
+
+    # Appended results match a full recompute
+    src.write_bytes(b"".join(lines))
+    run(src_dir, tmp_path / "full", 5, 0.1, 777, batched=True, fold_assignment="hash")
+    expected = pd.read_csv(tmp_path / "full" / "output.csv", index_col=0)
+    expected = expected[expected["dataset_name"] == "abalone"]
+    assert np.allclose([x[3] for x in rows], expected["test_score"], rtol=1e-6)
+    assert np.allclose([x[4] for x in rows], expected["beta"], rtol=1e-6, atol=1e-12)
+
+
+def test_incremental_requires_hash_folds(tmp_path):
+    with pytest.raises(ValueError):
+        run(DATA_DIR, tmp_path, 5, 0.1, 777, incremental=True)
+
+
+def test_incremental_imputes_labels_with_merged_stats(tmp_path):
+    src_dir = tmp_path / "in"
+    shutil.copytree(DATA_DIR, src_dir)
+    with open(src_dir / "data_catalog.json") as file:
+        dataset_meta = json.load(file)["forestfires"]
+    src = src_dir / dataset_meta["data_filename"]
+    lines = src.read_bytes().splitlines(keepends=True)
+    src.write_bytes(b"".join(lines[:300]))
+    update_dataset(tmp_path / "state", "forestfires", dataset_meta, src_dir, 5, 777)
+    src.write_bytes(b"".join(lines))
+    rows = update_dataset(tmp_path / "state", "forestfires", dataset_meta, src_dir, 5, 777)
+
+    # Zero areas log transform to -inf and are imputed with the mean of the finite labels of every row
+    state = json.loads((tmp_path / "state" / "forestfires.json").read_text())
+    assert sum(state["label_stats"]["missing"]) > 0
+    run(src_dir, tmp_path / "full", 5, 0.1, 777, batched=True, fold_assignment="hash")
+    expected = pd.read_csv(tmp_path / "full" / "output.csv", index_col=0)
+    expected = expected[expected["dataset_name"] == "forestfires"]
+    assert np.allclose([x[3] for x in rows], expected["test_score"], rtol=1e-6)
+
+    with pytest.raises(ValueError):
+        update_dataset(tmp_path / "state", "forestfires", dataset_meta, src_dir, 5, 777, {"area": {"n_bins": 2}})
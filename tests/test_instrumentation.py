@@ -0,0 +1,56 @@
+import logging
+import tracemalloc
+
+import numpy as np
+
+from p1.instrumentation import TimingCollector, instrument, measure
+
+
+class Stage:
+    dataset_name = "toy"
+
+    def __init__(self):
+        self.data = list(range(10))
+
+    @instrument()
+    def halve(self):
+        self.data = self.data[::2]
+
+
+def test_measurements_reach_collector():
+    collector = TimingCollector()
+    logger = logging.getLogger("p1.instrumentation")
+    logger.addHandler(collector)
+    logger.setLevel(logging.DEBUG)
+    try:
+        Stage().halve()
+        with measure("train", 8, dataset_name="toy", fold=2) as record:
+            record["rows_out"] = 8
+    finally:
+        logger.removeHandler(collector)
+    timings = collector.to_frame()
+    assert timings["stage"].tolist() == ["halve", "train"]
+    assert timings["rows_in"].tolist() == [10, 8]
+    assert timings["rows_out"].tolist() == [5, 8]
+    assert timings.loc[1, "fold"] == 2
+    assert (timings["wall_time"] >= 0).all() and (timings["cpu_time"] >= 0).all()
+    assert (timings["peak_rss_growth"].dropna() >= 0).all()
+    assert timings["peak_traced"].isna().all()
+
+
+def test_nested_stages_keep_their_traced_peaks():
+    tracemalloc.start()
+    try:
+        with measure("outer") as outer:
+            before = np.ones(4_000_000, dtype=np.uint8)
+            del before
+            with measure("inner") as inner:
+                during = np.ones(1_000_000, dtype=np.uint8)
+                del during
+            with measure("empty") as empty:
+                pass
+    finally:
+        tracemalloc.stop()
+    assert 1_000_000 <= inner["peak_traced"] < 2_000_000
+    assert outer["peak_traced"] >= 4_000_000
+    assert empty["peak_traced"] < 100_000
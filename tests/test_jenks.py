@@ -0,0 +1,52 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p1.preprocessing import Preprocessor
+from p1.preprocessing.jenks import compute_gcvf, compute_jenks_breaks, compute_sdam, compute_two_break_jenks
+
+
+def brute_force_jenks(values, n_classes):
+    """Exhaustively search every split of the distinct values into n_classes classes."""
+    values = np.asarray(values, dtype=float)
+    uniques = np.unique(values)
+    best_scdm, best_breaks = np.inf, None
+    for breaks in itertools.combinations(uniques[1:], n_classes - 1):
+        classes = np.searchsorted(breaks, values, side="right")
+        scdm = sum(compute_sdam(values[classes == c]) for c in range(n_classes))
+        if scdm < best_scdm - 1e-9:
+            best_scdm, best_breaks = scdm, list(breaks)
+    return best_breaks, compute_gcvf(compute_sdam(values), best_scdm)
+
+
+def test_two_break_jenks():
+    values = [1, 2, 2, 3, 10, 11, 12]
+    result = compute_two_break_jenks(values)
+    assert result["break_value"] == 10
+    scdm = compute_sdam([1, 2, 2, 3]) + compute_sdam([10, 11, 12])
+    assert result["gcvf"] == pytest.approx(compute_gcvf(compute_sdam(values), scdm))
+
+
+@pytest.mark.parametrize("n_classes", [2, 3, 4])
+def test_jenks_breaks_match_brute_force(n_classes):
+    rng = np.random.default_rng(n_classes)
+    for _ in range(25):
+        values = rng.integers(0, 25, rng.integers(10, 40))
+        breaks, gcvf = brute_force_jenks(values, n_classes)
+        result = compute_jenks_breaks(values, n_classes)
+        assert result["gcvf"] == pytest.approx(gcvf)
+        assert len(result["break_value"]) == n_classes - 1
+
+
+def test_jenks_breaks_too_few_values():
+    with pytest.raises(ValueError):
+        compute_jenks_breaks([1, 1, 2], 3)
+
+
+def test_jenks_discretize():
+    series = pd.Series([1.0, 1.5, 2.0, 8.0, 8.5, 9.0, 20.0, 21.0], name="x")
+    frame, retbins = Preprocessor._discretize(series, 3, "jenks")
+    assert frame["x"].sort_index().tolist() == [0, 0, 0, 1, 1, 1, 2, 2]
+    assert retbins.tolist() == [1.0, 8.0, 20.0, 21.0]
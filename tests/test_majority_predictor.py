@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from p1.algorithms import MajorityPredictor
+
+
+def make_batches(problem_class, n_batches=4, size=50):
+    rng = np.random.default_rng(0)
+    for _ in range(n_batches):
+        X = pd.DataFrame({"x": rng.normal(size=size)})
+        y = pd.Series(rng.integers(0, 3, size) if problem_class == "classification" else rng.normal(size=size),
+                      name="y")
+        yield X, y
+
+
+@pytest.mark.parametrize("problem_class", ["classification", "regression"])
+def test_partial_fit_matches_full_train(problem_class):
+    batches = list(make_batches(problem_class))
+    full = MajorityPredictor(problem_class, "y", ["x"])
+    full.train(pd.concat([X for X, _ in batches]), pd.concat([y for _, y in batches]))
+    online = MajorityPredictor(problem_class, "y", ["x"])
+    for X, y in batches:
+        online.partial_fit(X, y)
+    assert online.beta == pytest.approx(full.beta)
+
+
+@pytest.mark.parametrize("problem_class", ["classification", "regression"])
+def test_merge_shards_and_tune(problem_class):
+    (X_a, y_a), (X_b, y_b) = make_batches(problem_class, n_batches=2)
+    y = pd.concat([y_a, y_b])
+    shard_a, shard_b = MajorityPredictor(problem_class, "y", ["x"]), MajorityPredictor(problem_class, "y", ["x"])
+    shard_a.train(X_a, y_a)
+    shard_b.train(X_b, y_b)
+    tuned = MajorityPredictor(problem_class, "y", ["x"])
+    tuned.train(X_a, y_a)
+    tuned.tune(X_a, X_b, y_a, y_b)
+    expected = y.mode().loc[0] if problem_class == "classification" else y.mean()
+    assert shard_a.merge(shard_b).beta == pytest.approx(expected)
+    assert tuned.beta == pytest.approx(expected)
+    if problem_class == "regression":
+        assert tuned.variance == pytest.approx(y.var())
+
+
+def test_mode_ties_break_to_smallest_class():
+    predictor = MajorityPredictor("classification", "y", [])
+    predictor.train(pd.DataFrame(index=range(4)), pd.Series([3, 1, 3, 1]))
+    assert predictor.beta == 1
+
+
+@pytest.mark.parametrize("dtype", ["float64", "float32", "int64"])
+def test_regression_beta_is_series_mean(dtype):
+    y = pd.Series(np.random.default_rng(0).lognormal(2, 2, 517), name="y").astype(dtype)
+    predictor = MajorityPredictor("regression", "y", [])
+    predictor.train(pd.DataFrame(index=y.index), y)
+    assert predictor.beta == y.mean() and predictor.beta.dtype == y.mean().dtype
+    predictor.train(pd.DataFrame(index=y.index[:300]), y[:300])
+    predictor.partial_fit(pd.DataFrame(index=y.index[300:]), y[300:])
+    assert predictor.beta == pytest.approx(y.mean(), rel=1e-15 if dtype != "float32" else 1e-6)
+
+
+def test_regression_beta_propagates_inf():
+    predictor = MajorityPredictor("regression", "y", [])
+    predictor.train(pd.DataFrame(index=range(3)), pd.Series([1.0, np.inf, np.nan]))
+    assert predictor.beta == np.inf
+    predictor.partial_fit(pd.DataFrame(index=range(1)), pd.Series([-np.inf]))
+    assert np.isnan(predictor.beta)
@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from p1.preprocessing import PreprocessingPipeline, Preprocessor
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+def load_raw(dataset_name):
+    with open(DATA_DIR / "data_catalog.json") as file:
+        dataset_meta = json.load(file)[dataset_name]
+    with open(DATA_DIR / "discretize.json") as file:
+        discretize_dict = json.load(file).get(dataset_name)
+    return dataset_meta, discretize_dict, Preprocessor(dataset_name, dataset_meta, DATA_DIR).load()
+
+
+def test_pipeline_transforms_new_batches_and_records(tmp_path):
+    dataset_meta, discretize_dict, raw = load_raw("breast-cancer-wisconsin")
+    train, new = raw.iloc[:400], raw.iloc[400:]
+    pipeline = PreprocessingPipeline(dataset_meta, discretize_dict)
+    fitted = pipeline.fit_transform(train)
+    cols = list(pipeline.params["standardize"]["means"])
+    assert np.allclose(fitted[cols].mean(), 0) and np.allclose(fitted[cols].std(), 1)
+
+    path = tmp_path / "pipeline.json"
+    pipeline.save(path)
+    loaded = PreprocessingPipeline.load(path)
+    batch = loaded.transform(new)
+    assert batch.columns.tolist() == fitted.columns.tolist()
+    assert len(batch) == len(new)
+    record = loaded.transform(new.iloc[0].to_dict())
+    assert np.allclose(record.to_numpy(float), batch.iloc[[0]].to_numpy(float))
+
+
+def test_pipeline_dummies_fitted_levels_only():
+    dataset_meta, _, raw = load_raw("abalone")
+    pipeline = PreprocessingPipeline(dataset_meta, standardize=False).fit(raw)
+    levels = pipeline.params["dummy"]
+    record = raw.iloc[0].to_dict()
+    record[next(iter(levels))] = "unseen"
+    transformed = pipeline.transform(record)
+    assert transformed.columns.tolist() == pipeline.params["features"] + [pipeline.params["label"]]
+    assert not pd.isna(transformed).any(axis=None)
+
+
+def test_pipeline_transforms_partial_records():
+    dataset_meta, discretize_dict, raw = load_raw("abalone")
+    pipeline = PreprocessingPipeline(dataset_meta, discretize_dict).fit(raw)
+    full = pipeline.transform(raw.iloc[0].drop("rings").to_dict())
+    partial = pipeline.transform({"length": raw["length"].iloc[0]})
+    assert partial.columns.tolist() == full.columns.tolist() == pipeline.params["features"]
+    assert not partial[["sex_F", "sex_I", "sex_M"]].any(axis=None)
+    assert np.isclose(partial["length"].iloc[0], full["length"].iloc[0])
+
+    # A missing numeric column takes the fitted mean, which standardizes to zero
+    assert np.allclose(partial["diameter"], 0, atol=1e-6)
+
+    # Ordinal columns that replacement makes numeric are imputed too
+    dataset_meta, discretize_dict, raw = load_raw("car")
+    empty = PreprocessingPipeline(dataset_meta, discretize_dict).fit(raw).transform({})
+    assert np.allclose(empty.to_numpy(float), 0)
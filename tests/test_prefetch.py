@@ -0,0 +1,36 @@
+import threading
+import time
+
+import pytest
+
+from p1.prefetch import prefetch
+
+
+def test_prefetch_keeps_order_and_bounds_items_in_flight():
+    lock, started, consumed = threading.Lock(), [], []
+
+    def load(i):
+        with lock:
+            started.append(i)
+        time.sleep(0.01 * (5 - i))
+        return i * i
+
+    for item, result in prefetch(load, [(i,) for i in range(5)], depth=2):
+        # The consumer holds item i, so at most items i + 1 and i + 2 have been started
+        assert len(started) <= item[0] + 3
+        consumed.append(result)
+    assert consumed == [0, 1, 4, 9, 16]
+
+
+def test_prefetch_inline_and_errors():
+    assert list(prefetch(lambda x, y: x + y, [(1, 2), (3, 4)], depth=0)) == [((1, 2), 3), ((3, 4), 7)]
+
+    def load(i):
+        if i == 1:
+            raise ValueError("bad file")
+        return i
+
+    results = prefetch(load, [(0,), (1,), (2,)])
+    assert next(results) == ((0,), 0)
+    with pytest.raises(ValueError):
+        next(results)
@@ -0,0 +1,41 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from p1.exploration.profiling import profile_dataset, summarize_numeric, write_profiles
+from p1.preprocessing import Preprocessor
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+def test_summarize_numeric_matches_pandas():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"a": rng.exponential(size=200), "b": rng.normal(size=200)})
+    data.loc[:4, "a"] = [np.nan, np.nan, np.inf, -np.inf, 0.0]
+    summary = summarize_numeric(data)
+    finite = data.replace([np.inf, -np.inf], np.nan)
+    assert summary["n_missing"].tolist() == [2, 0] and summary["n_inf"].tolist() == [2, 0]
+    assert np.allclose(summary["mean"], finite.mean()) and np.allclose(summary["std"], finite.std())
+    assert np.allclose(summary["min"], finite.min()) and np.allclose(summary["max"], finite.max())
+    assert np.allclose(summary["skew"], finite.skew(), rtol=0.05)
+
+
+def test_profile_dataset_matches_natural_breaks():
+    with open(DATA_DIR / "data_catalog.json") as file:
+        dataset_meta = json.load(file)["forestfires"]
+    preprocessor = Preprocessor("forestfires", dataset_meta, DATA_DIR)
+    preprocessor.load()
+    profile = profile_dataset(preprocessor, top_k=3, n_jobs=4).set_index("column")
+    assert profile.index.tolist() == preprocessor.data.columns.tolist()
+    assert profile.loc["month", "cardinality"] == 12 and len(profile.loc["month", "top_values"]) == 3
+    assert profile.loc["area", "role"] == "label"
+    breaks = preprocessor.compute_natural_breaks(["ffmc", "dmc"])
+    assert np.allclose(profile.loc[["ffmc", "dmc"], "jenks_gcvf"], breaks.loc[["ffmc", "dmc"], "gcvf"])
+
+
+def test_write_profiles(tmp_path):
+    profile = write_profiles(DATA_DIR, tmp_path)
+    assert (tmp_path / "profile.json").exists()
+    assert len(pd.read_csv(tmp_path / "profile.csv")) == len(profile)
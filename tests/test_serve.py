@@ -0,0 +1,88 @@
+import json
+from http.client import HTTPConnection
+from pathlib import Path
+import threading
+
+import numpy as np
+import pytest
+
+from p1.serve import generate_load, load_models, make_server, sample_records, save_models, train_models
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+@pytest.fixture(scope="module")
+def models(tmp_path_factory):
+    model_dir = tmp_path_factory.mktemp("models")
+    save_models(train_models(DATA_DIR, ["car", "abalone", "breast-cancer-wisconsin"]), model_dir)
+    return load_models(model_dir)
+
+
+def start(models, **kwargs):
+    server = make_server(models, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop(server):
+    server.shutdown()
+    server.server_close()
+    server.batcher.stop()
+
+
+def test_models_round_trip_and_predict_majority(models):
+    assert models["car"].model.beta == 1
+    assert models["breast-cancer-wisconsin"].model.beta == 0
+    assert type(models["breast-cancer-wisconsin"].model.beta) is int
+    assert np.isclose(models["abalone"].model.beta, 9.933684462532918)
+
+    server = start(models, port=0)
+    connection = HTTPConnection(*server.server_address)
+    connection.request("POST", "/predict/abalone", json.dumps({"records": [{"sex": "M"}, {"length": 0.4}]}))
+    assert np.allclose(json.loads(connection.getresponse().read())["predictions"], models["abalone"].model.beta)
+    connection.request("POST", "/predict/car", json.dumps({"bad": 1}))
+    response = connection.getresponse()
+    assert response.status == 400 and "bad" in json.loads(response.read())["error"]
+    connection.request("POST", "/predict/machine", "{}")
+    response = connection.getresponse()
+    assert response.status == 404 and response.read()
+    stop(server)
+    assert server.stats.snapshot()["errors"] == 2
+
+
+def test_concurrent_requests_are_micro_batched(models, tmp_path):
+    records = {name: x for name, x in sample_records(DATA_DIR, 20).items() if name in models}
+    for kwargs, address in [({"port": 0}, None), ({"socket_path": tmp_path / "p1.sock"}, tmp_path / "p1.sock"),
+                            ({"port": 0, "transform": True}, None)]:
+        server = start(models, max_wait=0.001, **kwargs)
+        report = generate_load(address or server.server_address, records, n_requests=400, concurrency=8,
+                               batch_size=3)
+        stop(server)
+        stats = server.stats.snapshot()
+        assert report["errors"] == 0 and stats["requests"] == 400
+        assert np.isclose(stats["records"], report["records_per_s"] * report["seconds"])
+        assert stats["batches"] < stats["requests"]
+
+
+def test_failed_batch_returns_error_and_batcher_keeps_running(models, monkeypatch):
+    server = start(models, port=0)
+    connection = HTTPConnection(*server.server_address)
+    monkeypatch.setattr(models["car"].model, "predict_values", lambda n_rows: 1 / 0)
+    connection.request("POST", "/predict/car", json.dumps({"buying": "low"}))
+    response = connection.getresponse()
+    assert response.status == 500 and "division by zero" in json.loads(response.read())["error"]
+    monkeypatch.undo()
+    connection.request("POST", "/predict/car", json.dumps({"buying": "low"}))
+    assert json.loads(connection.getresponse().read())["predictions"] == [1]
+    stop(server)
+
+
+def test_single_record_requests_meet_sub_millisecond_p99(models):
+    records = {name: x for name, x in sample_records(DATA_DIR, 20).items() if name in models}
+    server = start(models, port=0)
+    generate_load(server.server_address, records, n_requests=200, concurrency=1)
+    server.stats.latencies.clear()
+    report = generate_load(server.server_address, records, n_requests=2000, concurrency=1)
+    stop(server)
+    assert report["errors"] == 0
+    assert server.stats.snapshot()["p99_ms"] < 1.0
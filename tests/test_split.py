@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from p1.preprocessing import split_train_val, split_train_val_indices
+from p1.preprocessing.split import assign_hash_splits, make_repeated_folds, make_splits
+
+
+@pytest.mark.parametrize("problem_class", ["classification", "regression"])
+def test_split_train_val_indices_match_split_train_val(problem_class):
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"x": rng.normal(size=200), "label": rng.integers(0, 4, 200)})
+    data.index = rng.permutation(200)
+    train, val = split_train_val(data, problem_class, "label", 0.2, random_state=7)
+    train_pos, val_pos = split_train_val_indices(data["label"], problem_class, 0.2, random_state=7)
+    assert data.index[train_pos].tolist() == train.index.tolist()
+    assert data.index[val_pos].tolist() == val.index.tolist()
+
+
+def test_make_splits_folds_are_stratified():
+    data = pd.DataFrame({"label": np.repeat([0, 1, 2], [50, 30, 20])})
+    folds = make_splits(data, "classification", "label", k_folds=5)
+    assert sorted(folds["fold"].unique()) == [1, 2, 3, 4, 5]
+    counts = folds.join(data).groupby(["fold", "label"]).size().unstack()
+    assert counts[0].tolist() == [11, 10, 10, 10, 9]
+    assert counts[1].tolist() == [7, 6, 6, 6, 5]
+    assert counts[2].tolist() == [5, 4, 4, 4, 3]
+
+
+def test_make_splits_regression_quantile_strata():
+    rng = np.random.default_rng(1)
+    data = pd.DataFrame({"label": np.sort(rng.normal(size=100))})
+    unstratified = make_splits(data, "regression", "label", k_folds=4).join(data)
+    stratified = make_splits(data, "regression", "label", k_folds=4, n_strata=5).join(data)
+    assert stratified.groupby("fold")["label"].mean().std() < unstratified.groupby("fold")["label"].mean().std()
+    assert stratified["fold"].value_counts().sort_index().tolist() == [30, 25, 25, 20]
+
+
+def test_make_splits_train_val():
+    data = pd.DataFrame({"label": np.repeat([0, 1], [40, 60])})
+    splits = make_splits(data, "classification", "label", k_folds=None, val_frac=0.1)
+    assert splits["train"].value_counts().to_dict() == {1: 88, 0: 12}
+
+
+def test_make_splits_many_folds_do_not_overflow():
+    data = pd.DataFrame({"label": np.arange(1000) % 3})
+    folds = make_splits(data, "classification", "label", k_folds=200)
+    assert folds["fold"].min() == 1 and folds["fold"].max() == 200
+    repeated = make_repeated_folds(data["label"], "classification", 200, n_repeats=2, random_state=0)
+    assert repeated.min() == 1 and repeated.max() == 200
+    hashed = assign_hash_splits(np.arange(1000, dtype=np.uint64), data["label"], "classification", 0, k_folds=200)
+    assert hashed.min() >= 1 and hashed.max() > 127
@@ -0,0 +1,54 @@
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from p1.preprocessing import ColumnStore, Preprocessor
+from p1.run import ingest
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+@pytest.fixture(scope="module")
+def data_catalog():
+    with open(DATA_DIR / "data_catalog.json") as file:
+        return json.load(file)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_store_load_matches_csv_load(tmp_path, data_catalog, compact):
+    ingest(DATA_DIR, tmp_path)
+    for dataset_name, dataset_meta in data_catalog.items():
+        expected = Preprocessor(dataset_name, dataset_meta, DATA_DIR).load(compact=compact)
+        result = Preprocessor(dataset_name, dataset_meta, DATA_DIR, store_dir=tmp_path).load(compact=compact)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_store_reads_only_requested_columns(tmp_path, data_catalog):
+    report = ingest(DATA_DIR, tmp_path, dataset_names=["house-votes-84"])
+    assert report["dataset_name"].tolist() == ["house-votes-84"]
+    dataset_meta = data_catalog["house-votes-84"]
+    columns = [meta["name"] for meta in dataset_meta["names_meta"][:2]]
+    data = Preprocessor("house-votes-84", dataset_meta, DATA_DIR, store_dir=tmp_path).load(columns=columns)
+    assert data.columns.tolist() == columns
+
+
+def test_stale_store_is_not_read(tmp_path, data_catalog):
+    dataset_meta = data_catalog["machine"]
+    src = tmp_path / "src"
+    src.mkdir()
+    dataset_src = src / dataset_meta["data_filename"]
+    dataset_src.write_bytes((DATA_DIR / dataset_meta["data_filename"]).read_bytes())
+    store = ColumnStore(tmp_path / "store")
+    data = Preprocessor("machine", dataset_meta, src).load()
+    store.write("machine", data, store.fingerprint(dataset_src, dataset_meta))
+    assert store.read("machine", store.fingerprint(dataset_src, dataset_meta)) is not None
+
+    # Appending a row changes the source's size and modification time
+    with open(dataset_src, "a") as file:
+        file.write(dataset_src.read_text().splitlines()[0] + "\n")
+    os.utime(dataset_src, ns=(0, 0))
+    assert store.read("machine", store.fingerprint(dataset_src, dataset_meta)) is None
+    assert len(Preprocessor("machine", dataset_meta, src, store_dir=tmp_path / "store").load()) == len(data) + 1
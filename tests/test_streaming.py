@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from p1.preprocessing import Preprocessor
+from p1.preprocessing.streaming import RunningStats
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+def test_running_stats_merge_matches_pandas():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"a": rng.normal(size=1000), "b": rng.integers(0, 10, 1000).astype(float)})
+    data.loc[::7, "a"] = np.nan
+    stats = RunningStats()
+    for start in range(0, 1000, 128):
+        stats.update(data.iloc[start:start + 128])
+    pd.testing.assert_series_equal(stats.means, data.mean())
+    pd.testing.assert_series_equal(stats.std_devs, data.std())
+
+
+@pytest.mark.parametrize("dataset_name", ["breast-cancer-wisconsin", "abalone"])
+def test_stream_matches_in_memory(dataset_name):
+    with open(DATA_DIR / "data_catalog.json") as file:
+        dataset_meta = json.load(file)[dataset_name]
+    preprocessor = Preprocessor(dataset_name, dataset_meta, DATA_DIR)
+    preprocessor.load()
+    preprocessor.identify_features_label_id()
+    preprocessor.replace()
+    preprocessor.log_transform()
+    numeric_cols = list(preprocessor.data.select_dtypes(np.number))
+    raw_stats = preprocessor.data[numeric_cols].agg(["mean", "std"])
+    preprocessor.impute()
+
+    streamer = Preprocessor(dataset_name, dataset_meta, DATA_DIR)
+    chunks = list(streamer.stream(chunksize=100))
+    for chunk in chunks:
+        pd.testing.assert_series_equal(chunk.dtypes, preprocessor.data.dtypes)
+    streamed = pd.concat(chunks)
+    np.testing.assert_allclose(streamed[numeric_cols], preprocessor.data[numeric_cols], rtol=1e-6)
+    np.testing.assert_allclose(streamer.running_stats.means[numeric_cols], raw_stats.loc["mean"], rtol=1e-6)
+    np.testing.assert_allclose(streamer.running_stats.std_devs[numeric_cols], raw_stats.loc["std"], rtol=1e-6)
@@ -0,0 +1,45 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from p1.sweep import StageGraph, load_grid, run_sweep
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+def test_stage_graph_runs_shared_stages_once():
+    calls = []
+
+    def stage(*args):
+        calls.append(args[-1])
+        return sum(args[:-1]) + 1
+
+    graph = StageGraph()
+    root = graph.add(("root",), stage, "root")
+    for i in range(3):
+        middle = graph.add(("middle",), stage, "middle", deps=[root])
+        graph.add(("leaf", i), stage, f"leaf{i}", deps=[middle])
+    outputs = graph.execute()
+    assert calls == ["root", "middle", "leaf0", "leaf1", "leaf2"]
+    assert outputs == {("leaf", 0): 3, ("leaf", 1): 3, ("leaf", 2): 3}
+
+
+def test_load_grid_fills_defaults(tmp_path):
+    src = tmp_path / "grid.json"
+    src.write_text(json.dumps({"random_state": [1, 2], "val_frac": 0.2}))
+    grid = load_grid(src, {"random_state": 777, "k_folds": 5, "val_frac": 0.1})
+    assert grid == {"random_state": [1, 2], "k_folds": [5], "val_frac": [0.2]}
+    src.write_text(json.dumps({"seed": [1]}))
+    with pytest.raises(ValueError):
+        load_grid(src, {})
+
+
+def test_sweep_matches_run_output(tmp_path):
+    grid = {"random_state": [777, 1], "k_folds": [5], "val_frac": [0.1]}
+    output = run_sweep(DATA_DIR, tmp_path, grid)
+    assert (tmp_path / "sweep_output.csv").exists() and (tmp_path / "sweep_summary.csv").exists()
+    expected = pd.read_csv(DATA_DIR / "output.csv", index_col=0)
+    result = output[output["random_state"] == 777][expected.columns].reset_index(drop=True)
+    pd.testing.assert_frame_equal(result, expected.reset_index(drop=True), check_dtype=False)
@@ -0,0 +1,35 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from p1.preprocessing import Preprocessor
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+def make_preprocessor(dataset_name):
+    with open(DATA_DIR / "data_catalog.json") as file:
+        dataset_meta = json.load(file)[dataset_name]
+    return Preprocessor(dataset_name, dataset_meta, DATA_DIR)
+
+
+def test_transform_columns_matches_separate_stages():
+    for dataset_name in ["car", "forestfires", "breast-cancer-wisconsin"]:
+        for compact in [False, True]:
+            separate, fused = make_preprocessor(dataset_name), make_preprocessor(dataset_name)
+            for preprocessor in [separate, fused]:
+                preprocessor.load(compact=compact)
+                preprocessor.identify_features_label_id()
+            separate.replace()
+            separate.log_transform()
+            separate.impute()
+            fused.transform_columns()
+            pd.testing.assert_frame_equal(fused.data, separate.data, check_exact=True)
+
+
+def test_replace_values_matches_series_replace():
+    series = pd.Series(["low", "high", None, "med", "low"], dtype="str")
+    replacements = {"low": 1, "med": 2, "high": 3}
+    result = Preprocessor._replace_values(series, replacements)
+    pd.testing.assert_series_equal(result, series.replace(replacements))